@@ -0,0 +1,69 @@
+""" Node-counted alpha-beta search for knight's Isolation
+
+`AlphaBetaSearch` is the fixed-depth alpha-beta search shared by the opening
+book builder (opening_book.py), the parallel root-splitting agent
+(parallel_search.py) and the SPSA tuning tool (tuning.py). Every node calls
+`visit()`, which counts it in `nodes`; subclasses override `visit()` to stop
+the search by raising an exception, and `score()` to change the evaluation of
+the leaves.
+"""
+import math
+
+from evaluation import mobility
+from isolation.bitboard import terminal_utility
+
+
+class AlphaBetaSearch:
+    """ Fixed-depth alpha-beta search from the point of view of `player_id`
+
+    Leaves are scored by the number of moves available to the player minus the
+    number available to its opponent (like MinimaxPlayer.score).
+    """
+    def __init__(self, player_id=None):
+        self.player_id = player_id
+        self.nodes = 0
+
+    def visit(self):
+        """ Count a node; subclasses may raise an exception to abort the search """
+        self.nodes += 1
+
+    def score(self, state):
+        own_loc, opp_loc = state.locs[self.player_id], state.locs[1 - self.player_id]
+        return mobility(state.board, own_loc) - mobility(state.board, opp_loc)
+
+    def search_root(self, state, actions, depth):
+        """ Return the action with the highest value for the active player of
+        `state` from a search `depth` plies deep (ties are broken by the order
+        of `actions`)
+        """
+        self.player_id = state.player()
+        alpha, best = -math.inf, None
+        for action in actions:
+            value = self.min_value(state.result(action), depth - 1, alpha, math.inf)
+            if best is None or value > alpha:
+                alpha, best = value, action
+        return best
+
+    def max_value(self, state, depth, alpha, beta):
+        self.visit()
+        terminal, utility = terminal_utility(state, self.player_id)
+        if terminal: return utility
+        if depth <= 0: return self.score(state)
+        value = -math.inf
+        for action in state.actions():
+            value = max(value, self.min_value(state.result(action), depth - 1, alpha, beta))
+            if value >= beta: return value
+            alpha = max(alpha, value)
+        return value
+
+    def min_value(self, state, depth, alpha, beta):
+        self.visit()
+        terminal, utility = terminal_utility(state, self.player_id)
+        if terminal: return utility
+        if depth <= 0: return self.score(state)
+        value = math.inf
+        for action in state.actions():
+            value = min(value, self.max_value(state.result(action), depth - 1, alpha, beta))
+            if value <= alpha: return value
+            beta = min(beta, value)
+        return value
@@ -0,0 +1,130 @@
+""" Partition detection and exact endgame solver for knight's Isolation
+
+Late in the game the two tokens are often separated into disconnected regions
+of the board. Once that happens neither player can interfere with the other,
+so the winner is decided entirely by the longest knight's path that each
+player can make within its own region: the active player wins if (and only if)
+its longest path is strictly longer than the opponent's.
+
+Regions are found with a bit-parallel flood fill over the bitboard (all eight
+knight moves of every cell in the frontier are computed with eight shifts), and
+the longest path is computed exactly by a depth-first search memoized on the
+(open cells, location) pair.
+"""
+from collections import namedtuple
+
+from isolation.bitboard import NEIGHBORS
+from isolation.isolation import Action, _SIZE
+
+ENDGAME_MAX_CELLS = 20  # largest region that search agents should solve exactly
+
+EndgameResult = namedtuple("EndgameResult", "action wins own_length opponent_length")
+
+# the knight move offsets on the bitboard (the two-bit border on each row
+# means that shifted moves never wrap around a row)
+_OFFSETS = tuple(int(a) for a in Action)
+
+
+def popcount(x):
+    return bin(x).count("1")
+
+
+def knight_spread(cells):
+    """ Return a bitmask of every cell one knight move away from any cell in
+    the `cells` bitmask (including cells that are blocked or off the board)
+    """
+    out = 0
+    for offset in _OFFSETS:
+        out |= (cells << offset) if offset > 0 else (cells >> -offset)
+    return out
+
+
+def reachable(board, loc):
+    """ Return a bitmask of the open cells of `board` that a knight at `loc` can
+    reach by any sequence of moves through open cells (excluding `loc` itself)
+    """
+    region, frontier = 0, 1 << loc
+    while frontier:
+        frontier = knight_spread(frontier) & board & ~region
+        region |= frontier
+    return region
+
+
+def partition(state):
+    """ Return the pair of regions (bitmasks) reachable by each player if the
+    players are separated into disjoint regions, otherwise return None
+    """
+    if None in state.locs:
+        return None
+    regions = tuple(reachable(state.board, loc) for loc in state.locs)
+    return None if regions[0] & regions[1] else regions
+
+
+def longest_path(open_cells, loc, memo=None):
+    """ Return the number of moves in the longest knight's path that starts at
+    `loc` and only visits cells in the `open_cells` bitmask
+
+    Parameters
+    ----------
+    open_cells : int
+        Bitmask of the cells that can be visited (typically one region)
+
+    loc : int
+        Starting location of the knight
+
+    memo : dict (optional)
+        Cache of (open cells, location) -> path length results that can be
+        shared between calls in the same region
+    """
+    memo = {} if memo is None else memo
+
+    def search(cells, loc):
+        cells = reachable(cells, loc)
+        key = (cells, loc)
+        if key not in memo:
+            bound, best = popcount(cells), 0
+            for target in NEIGHBORS[loc]:
+                if best == bound: break  # a path can't visit more cells than the region holds
+                if cells & (1 << target):
+                    best = max(best, 1 + search(cells & ~(1 << target), target))
+            memo[key] = best
+        return memo[key]
+
+    return search(open_cells, loc)
+
+
+def solve_endgame(state, max_cells=None):
+    """ Solve a partitioned game state exactly for the active player
+
+    Parameters
+    ----------
+    state : isolation.Isolation
+        The current game state
+
+    max_cells : int (optional)
+        Skip the solver (return None) if either region has more open cells
+
+    Returns
+    -------
+    EndgameResult or None
+        None if the players are not partitioned (or a region is too large);
+        otherwise the action starting the active player's longest path (None
+        if the active player has no moves), whether the active player wins,
+        and the longest path length for each player
+    """
+    regions = partition(state)
+    if regions is None or (max_cells is not None and max(map(popcount, regions)) > max_cells):
+        return None
+    player = state.player()
+    own_loc, opp_loc = state.locs[player], state.locs[1 - player]
+    own_cells, opp_cells = regions[player], regions[1 - player]
+    opp_length = longest_path(opp_cells, opp_loc)
+
+    memo, best_action, own_length = {}, None, 0
+    for action in Action:
+        target = own_loc + action
+        if 0 <= target < _SIZE and own_cells & (1 << target):
+            length = 1 + longest_path(own_cells & ~(1 << target), target, memo)
+            if best_action is None or length > own_length:
+                best_action, own_length = action, length
+    return EndgameResult(best_action, own_length > opp_length, own_length, opp_length)
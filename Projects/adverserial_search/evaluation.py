@@ -0,0 +1,137 @@
+""" Leaf evaluation features for knight's Isolation
+
+Heuristic scores are usually built from a handful of features of the leaf
+states of a search tree, and evaluating leaves is the hot path of a search
+once move generation is fast. The functions in this module compute the
+features directly on the bitboard integer with precomputed neighbor masks and
+popcounts instead of building lists with `Isolation.liberties()`.
+
+`child_features()` and `child_mobility()` evaluate every child of a state in
+one pass without creating the child `Isolation` objects, which is how one-ply
+agents (like GreedyPlayer) and move ordering should use them:
+
+    >>> for action, f in child_features(state, player_id):
+    ...     score = f.own_moves - f.opp_moves
+"""
+from collections import namedtuple
+
+from isolation import Isolation
+from isolation.isolation import Action, _HEIGHT, _SIZE, _WIDTH
+from isolation.bitboard import NEIGHBOR_MASKS
+from endgame import knight_spread, partition, popcount
+
+Features = namedtuple("Features", [
+    "own_moves",       # number of open cells one knight move from the player
+    "opp_moves",       # ...and from the opponent
+    "own_moves2",      # number of open cells within two knight moves of the player
+    "opp_moves2",      # ...and of the opponent
+    "own_center",      # manhattan distance from the player to the center cell
+    "opp_center",      # ...and from the opponent
+    "own_region",      # open cells reachable by the player if the players are
+    "opp_region",      # partitioned (see endgame.partition), otherwise None
+])
+
+_CENTER = (_WIDTH // 2, _HEIGHT // 2)
+_CENTER_DISTANCE = tuple(abs(loc % (_WIDTH + 2) - _CENTER[0]) + abs(loc // (_WIDTH + 2) - _CENTER[1])
+                         for loc in range(_SIZE))
+
+
+def mobility(board, loc):
+    """ Return the number of open cells a token at `loc` can move to (this is
+    equal to `len(state.liberties(loc))`)
+    """
+    if loc is None:
+        return popcount(board)
+    return popcount(board & NEIGHBOR_MASKS[loc])
+
+
+def second_order_mobility(board, loc):
+    """ Return the number of open cells a token at `loc` can reach in one or
+    two moves
+    """
+    if loc is None:
+        return popcount(board)
+    first = board & NEIGHBOR_MASKS[loc]
+    return popcount(first | (knight_spread(first) & board))
+
+
+def center_distance(loc):
+    """ Return the manhattan distance from `loc` to the center of the board
+    (zero for a token that has not been placed)
+    """
+    return 0 if loc is None else _CENTER_DISTANCE[loc]
+
+
+def features(board, locs, player_id, regions=False):
+    """ Return the Features of a state from the perspective of `player_id`
+
+    Parameters
+    ----------
+    board : int
+        Bitboard of the open cells
+
+    locs : tuple
+        The location of each player (or None)
+
+    player_id : int
+        The player to compute the features for
+
+    regions : bool (optional)
+        Compute the region sizes if the players are partitioned; the flood
+        fill makes this several times more expensive than the other features
+    """
+    own_loc, opp_loc = locs[player_id], locs[1 - player_id]
+    own_region = opp_region = None
+    if regions and own_loc is not None and opp_loc is not None:
+        cells = partition(Isolation(board, 0, locs))
+        if cells is not None:
+            own_region, opp_region = popcount(cells[player_id]), popcount(cells[1 - player_id])
+    return Features(mobility(board, own_loc), mobility(board, opp_loc),
+                    second_order_mobility(board, own_loc), second_order_mobility(board, opp_loc),
+                    center_distance(own_loc), center_distance(opp_loc), own_region, opp_region)
+
+
+def batch_features(states, player_id, regions=False):
+    """ Return a list with the Features of each state for `player_id` """
+    return [features(s.board, s.locs, player_id, regions) for s in states]
+
+
+def child_features(state, player_id, regions=False):
+    """ Return a list of (action, Features) pairs for every child of `state`
+    (in the order of `state.actions()`), evaluated for `player_id` without
+    creating the child states
+    """
+    children = []
+    for action, board, locs in _children(state):
+        children.append((action, features(board, locs, player_id, regions)))
+    return children
+
+
+def child_mobility(state, player_id):
+    """ Return a list of (action, own_moves, opp_moves) triples for every child
+    of `state` (in the order of `state.actions()`) for `player_id`
+
+    This is the cheapest batch evaluation: it only computes the two mobility
+    features, which are all that the sample agents use.
+    """
+    children = []
+    for action, board, locs in _children(state):
+        own_loc, opp_loc = locs[player_id], locs[1 - player_id]
+        own = popcount(board) if own_loc is None else popcount(board & NEIGHBOR_MASKS[own_loc])
+        opp = popcount(board) if opp_loc is None else popcount(board & NEIGHBOR_MASKS[opp_loc])
+        children.append((action, own, opp))
+    return children
+
+
+def _children(state):
+    """ Yield the (action, board, locs) fields of every child of `state` """
+    active = state.player()
+    loc, board = state.locs[active], state.board
+    if loc is None:
+        moves = [(c, c) for c in range(_SIZE) if board & (1 << c)]
+    else:
+        moves = [(a, loc + a) for a in Action if loc + a >= 0 and board & (1 << (loc + a))]
+    for action, cell in moves:
+        locs = (cell, state.locs[1]) if active == 0 else (state.locs[0], cell)
+        yield action, board ^ (1 << cell), locs
+
@@ -0,0 +1,242 @@
+""" Compact binary game record store for knight's Isolation matches
+
+Game records are appended to a single file as games finish, so the file can be
+read (and re-indexed) while a tournament is still running. The file is a short
+magic string followed by length-prefixed records; each record holds the match
+id, the initial state (packed with `opening_book.state_key`), the result, the
+agent names, and one fixed-size entry per move with the action, the time the
+agent took to choose it, and the search depth it reached (if known; depths
+above 65535 are stored as 65535). A record that was only partially written
+(e.g., if the writer was killed) is ignored.
+
+`GameRecordIndex` scans the file once and indexes the records by agent, by
+winner, and by opening (the cells where each player placed their token), then
+loads matching records on demand.
+
+Example Usage:
+
+    $ python run_match.py -r 50 --record matches.games
+    $ python game_records.py matches.games
+"""
+import argparse
+import struct
+
+from collections import defaultdict, namedtuple
+
+from isolation import Status
+from isolation.isolation import Action
+from opening_book import key_state, state_key
+
+MAGIC = b"ISOGAME2"
+_LENGTH = struct.Struct(">I")  # payload size of each record
+_HEADER = struct.Struct(">q17sBbH")  # match id, initial state key, status, winner id, number of moves
+_NAME = struct.Struct(">B")  # length of each agent name
+_MOVE = struct.Struct(">bfH")  # action, think time (ms), search depth (0 if unknown)
+_MAX_DEPTH = 2**16 - 1  # larger reported depths are stored as this value
+
+
+class GameRecord(namedtuple("GameRecord", [
+        "match_id", "initial_state", "agents", "status", "winner_id", "history", "think_times", "depths"])):
+    """ A game loaded from a record file
+
+    Attributes
+    ----------
+    agents : tuple
+        The name of each agent (in player id order)
+
+    winner_id : int
+        The player id of the winning agent (or None)
+
+    history : list
+        The actions applied to the initial state
+
+    think_times : list
+        The number of milliseconds each agent took to choose each action
+
+    depths : list
+        The search depth reached for each action (None if unknown)
+    """
+    @property
+    def winner(self):
+        return None if self.winner_id is None else self.agents[self.winner_id]
+
+    @property
+    def opening(self):
+        """ The cells where each player placed their token (None if the game
+        ended before both players moved)
+        """
+        state = self.initial_state
+        for action in self.history[:max(0, 2 - state.ply_count)]:
+            state = state.result(action)
+        return None if None in state.locs else state.locs
+
+
+def encode_result(result):
+    """ Pack an isolation.GameResult into the bytes of one record payload """
+    names = [agent.name.encode("utf-8")[:255] for agent in result.agents]
+    winner_id = -1 if result.winner_id is None else result.winner_id
+    out = [_HEADER.pack(result.match_id, state_key(result.initial_state), result.status.value,
+                        winner_id, len(result.history))]
+    out.extend(_NAME.pack(len(name)) + name for name in names)
+    out.extend(_MOVE.pack(int(action), think_time, min(depth or 0, _MAX_DEPTH))
+               for action, think_time, depth in zip(result.history, result.think_times, result.depths))
+    return b"".join(out)
+
+
+def decode_record(payload):
+    """ Unpack the bytes of one record payload into a GameRecord """
+    match_id, key, status, winner_id, num_moves = _HEADER.unpack_from(payload)
+    offset, names = _HEADER.size, []
+    for _ in range(2):
+        size, = _NAME.unpack_from(payload, offset)
+        offset += _NAME.size
+        names.append(payload[offset:offset + size].decode("utf-8"))
+        offset += size
+    initial_state = key_state(key)
+    history, think_times, depths = [], [], []
+    for ply, (action, think_time, depth) in enumerate(_MOVE.iter_unpack(payload[offset:]),
+                                                      initial_state.ply_count):
+        history.append(action if ply < 2 else Action(action))  # the first move of each player is a cell
+        think_times.append(think_time)
+        depths.append(depth or None)
+    assert len(history) == num_moves, "Corrupt game record"
+    return GameRecord(match_id, initial_state, tuple(names), Status(status),
+                      None if winner_id < 0 else winner_id, history, think_times, depths)
+
+
+class GameRecordWriter:
+    """ Append game results to a record file (created if it does not exist)
+
+    Every record is flushed as soon as it is written, so readers can index the
+    file while games are still being played. A partially written record at the
+    end of an existing file is discarded before appending.
+    """
+    def __init__(self, filename):
+        self.filename = filename
+        self._file = open(filename, "ab")
+        if self._file.tell() == 0:
+            self._file.write(MAGIC)
+            return
+        end = len(MAGIC)
+        for offset, payload in _read_payloads(filename):
+            end = offset + _LENGTH.size + len(payload)
+        if end < self._file.tell():
+            self._file.truncate(end)
+            self._file.seek(end)
+
+    def write(self, result):
+        payload = encode_result(result)
+        self._file.write(_LENGTH.pack(len(payload)) + payload)
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self): return self
+    def __exit__(self, *args): self.close()
+
+
+def _check_magic(filename):
+    with open(filename, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError("{} is not a game record file".format(filename))
+
+
+def read_records(filename, offset=None):
+    """ Yield (offset, GameRecord) pairs for every complete record in the file
+    starting from `offset` (the first record by default)
+    """
+    for start, payload in _read_payloads(filename, offset):
+        yield start, decode_record(payload)
+
+
+def _read_payloads(filename, offset=None):
+    _check_magic(filename)
+    with open(filename, "rb") as f:
+        f.seek(len(MAGIC) if offset is None else offset)
+        while True:
+            start = f.tell()
+            prefix = f.read(_LENGTH.size)
+            if len(prefix) < _LENGTH.size: return
+            size, = _LENGTH.unpack(prefix)
+            payload = f.read(size)
+            if len(payload) < size: return
+            yield start, payload
+
+
+class GameRecordIndex:
+    """ Index the records in a game record file by agent name, by winner name
+    and by opening
+
+    Examples
+    --------
+    >>> index = GameRecordIndex("matches.games")
+    >>> games = index.games(agent="Greedy Agent", winner="Custom Agent")
+    """
+    def __init__(self, filename):
+        self.filename = filename
+        self.by_agent = defaultdict(list)
+        self.by_winner = defaultdict(list)
+        self.by_opening = defaultdict(list)
+        self.offsets = []
+        self._end = None
+        self.refresh()
+
+    def refresh(self):
+        """ Index records appended since the last refresh and return the number
+        of new records
+        """
+        count = 0
+        for offset, payload in _read_payloads(self.filename, self._end):
+            record = decode_record(payload)
+            self.offsets.append(offset)
+            for name in set(record.agents):
+                self.by_agent[name].append(offset)
+            self.by_winner[record.winner].append(offset)
+            self.by_opening[record.opening].append(offset)
+            self._end = offset + _LENGTH.size + len(payload)
+            count += 1
+        return count
+
+    def __len__(self): return len(self.offsets)
+
+    def games(self, agent=None, winner=None, opening=None):
+        """ Return the list of records matching every given key """
+        offsets = set(self.offsets)
+        if agent is not None: offsets &= set(self.by_agent.get(agent, ()))
+        if winner is not None: offsets &= set(self.by_winner.get(winner, ()))
+        if opening is not None: offsets &= set(self.by_opening.get(tuple(opening), ()))
+        return [self.load(offset) for offset in sorted(offsets)]
+
+    def load(self, offset):
+        """ Load the record at a file offset """
+        return next(read_records(self.filename, offset))[1]
+
+    def opening_stats(self, agent):
+        """ Return a dict mapping each opening to the (wins, games) of `agent` """
+        stats = {}
+        for opening, offsets in self.by_opening.items():
+            games = set(offsets) & set(self.by_agent.get(agent, ()))
+            if games:
+                wins = len(games & set(self.by_winner.get(agent, ())))
+                stats[opening] = (wins, len(games))
+        return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Summarize a game record file.")
+    parser.add_argument('filename', help="Game record file written by run_match.py --record")
+    parser.add_argument('-a', '--agent', type=str, default="Custom Agent",
+                        help="Agent name to report opening win rates for.")
+    parser.add_argument('-n', '--num_openings', type=int, default=10,
+                        help="Number of most frequent openings to report.")
+    args = parser.parse_args()
+
+    index = GameRecordIndex(args.filename)
+    print("{} games".format(len(index)))
+    for name, offsets in sorted(index.by_agent.items()):
+        print("{:<24}{:>8} games{:>8} wins".format(name, len(offsets), len(index.by_winner.get(name, ()))))
+    stats = index.opening_stats(args.agent)
+    print("\nMost frequent openings for {}:".format(args.agent))
+    for opening, (wins, games) in sorted(stats.items(), key=lambda x: -x[1][1])[:args.num_openings]:
+        print("{!s:<24}{:>8} games{:>8.1%} wins".format(opening, games, wins / games))
@@ -4,23 +4,47 @@
 ###############################################################################
 import inspect
 import logging
+import math
+import random
 import sys
 import textwrap
 import time
 
 from collections import namedtuple
+from ctypes import c_bool, c_double, c_int
 from enum import Enum
 from multiprocessing import Process, Pipe
+from multiprocessing.connection import wait
+from multiprocessing.sharedctypes import RawArray, RawValue
 from queue import Empty
+from threading import Timer
 
-from .isolation import Isolation, DebugState
+from .isolation import Isolation, DebugState, Action
+from .geometry import GeometryIsolation, make_isolation
 
-__all__ = ['Isolation', 'DebugState', 'Status', 'play', 'fork_get_action']
+__all__ = ['Isolation', 'DebugState', 'GeometryIsolation', 'make_isolation', 'Status', 'GameResult',
+           'Telemetry', 'NodeBudgetQueue', 'play', 'play_game', 'fork_get_action']
 logger = logging.getLogger(__name__)
 
 Agent = namedtuple("Agent", "agent_class name")
 
+# the agents and initial state of a game, the actions applied to the initial
+# state, the time each agent took to choose each action (in milliseconds), the
+# search depth reached for each action (None if unknown), the Status at the
+# end of the game, the winning agent & its player id, and the Telemetry that
+# the agent reported for each action
+GameResult = namedtuple(
+    "GameResult",
+    "agents initial_state history think_times depths status winner winner_id match_id telemetry")
+
+# search statistics reported by an agent for one move with TimedQueue.report();
+# commit_time is the number of milliseconds from the start of the turn until
+# the final action was sent, and fields the agent did not report are None
+Telemetry = namedtuple("Telemetry", "nodes depth tt_hits commit_time")
+
 PROCESS_TIMEOUT = 5  # time to interrupt agent search processes (in seconds)
+START_POLL_INTERVAL = 0.005  # seconds between checks for the start of the agent's turn timer
+COUNT_INTERVAL = 256  # nodes counted between checks of the stop flag by TimedQueue.count()
 GAME_INFO = """\
 Initial game state: {}
 First agent: {!s}
@@ -56,28 +80,179 @@ class StopSearch(Exception): pass  # Exception class used to halt search
 class TimedQueue:
     """Modified queue class to block .put() after a time limit expires,
     and to include both a context object & action choice in the queue.
+
+    Agents can also query the time remaining in the turn, check a stop flag
+    that the parent process sets in shared memory when the time limit
+    expires, and publish their best move through shared memory instead of
+    sending it through the pipe with every call to .put().
+
+    The turn starts when the agent process calls .start_timer(), which also
+    records the start time in shared memory so that the parent sets the stop
+    flag at the same deadline (process start up does not count against the
+    time limit). .put() and .publish() still raise StopSearch on their own
+    once the deadline has passed.
+
+    If `drain` is True then .put() discards any unread message before sending
+    a new one (for callers that only read the pipe after the agent returns).
     """
-    def __init__(self, receiver, sender, time_limit):
+    def __init__(self, receiver, sender, time_limit, drain=True):
         self.__sender = sender
         self.__receiver = receiver
+        self.__drain = drain
         self.__time_limit = time_limit / 1000
         self.__stop_time = None
+        self.__start_time = RawValue(c_double, -1.)
+        self.__stop_flag = RawValue(c_bool, False)
+        self.__best = RawArray(c_int, 2)  # [action state (see __store), action]
+        self.__telemetry = RawArray(c_double, [-1.] * len(Telemetry._fields))
+        self.__unsent_context = False
+        self.__nodes = 0
+        self.__next_check = COUNT_INTERVAL
+        self.__reported_nodes = False
         self.agent = None
 
     def start_timer(self):
-        self.__stop_time = self.__time_limit + time.perf_counter()
+        start = time.perf_counter()
+        self.__stop_time = self.__time_limit + start
+        self.__start_time.value = start
+
+    def stop_time(self):
+        """ Return the perf_counter() deadline of the turn, or None if the
+        agent has not started its timer
+        """
+        start = self.__start_time.value
+        return None if start < 0 else start + self.__time_limit
+
+    def __expired(self):
+        return self.__stop_flag.value or (self.__stop_time is not None and time.perf_counter() > self.__stop_time)
+
+    def count(self, nodes=1):
+        """ Count nodes searched during this move
+
+        The count is reported as the node telemetry for the move (unless the
+        agent reports nodes explicitly), and StopSearch is raised once the
+        stop flag is set (checked every COUNT_INTERVAL nodes). Agents that
+        count nodes also obey node budgets (see NodeBudgetQueue).
+        """
+        self.__nodes += nodes
+        if self.__nodes >= self.__next_check:
+            self.__next_check = self.__nodes + COUNT_INTERVAL
+            if not self.__reported_nodes:
+                self.__telemetry[0] = self.__nodes
+            if self.__stop_flag.value:
+                raise StopSearch
+
+    def report(self, nodes=None, depth=None, tt_hits=None):
+        """ Report search statistics for the current move to the match runner
+
+        Each call overwrites the values given, so agents should report running
+        totals (e.g., the total number of nodes searched during this turn).
+        """
+        self.__reported_nodes |= nodes is not None
+        for idx, value in enumerate((nodes, depth, tt_hits)):
+            if value is not None:
+                self.__telemetry[idx] = value
+
+    def telemetry(self):
+        """ Return the Telemetry reported for this move """
+        values = [None if value < 0 else value for value in self.__telemetry]
+        return Telemetry(*[None if value is None else int(value) for value in values[:3]], values[3])
+
+    def __commit(self):
+        if self.__stop_time is not None:
+            elapsed = time.perf_counter() - self.__stop_time + self.__time_limit
+            self.__telemetry[3] = 1000 * elapsed
+
+    def time_left(self):
+        """ Return the number of milliseconds remaining before the time limit """
+        if self.__stop_time is None:
+            return self.__time_limit * 1000
+        return max(0., (self.__stop_time - time.perf_counter()) * 1000)
+
+    def stop_requested(self):
+        """ Return True if the parent process has asked the search to stop
+
+        This only reads a flag in shared memory, so it is cheap enough to call
+        every few nodes of a search.
+        """
+        return self.__stop_flag.value
+
+    def request_stop(self):
+        """ Set the shared stop flag; every later put() or publish() raises StopSearch """
+        self.__stop_flag.value = True
+
+    def publish(self, action):
+        """ Record the best action so far in shared memory
+
+        Unlike put(), this does not send anything through the pipe. The agent
+        context is sent once when get_action() returns or the search is
+        stopped, so the context is lost if the search process is killed.
+        """
+        if self.__expired():
+            raise StopSearch
+        stored = self.__store(action)
+        self.__commit()
+        if stored:
+            self.__unsent_context = True
+        else:
+            self.__send(action)
+
+    def __store(self, action):
+        """ Record an action in shared memory and return True, or mark the
+        action as only available through the pipe (e.g., None or any other
+        value that is not an integer) and return False
+        """
+        if isinstance(action, int) and -2**31 <= action < 2**31:
+            self.__best[1] = action
+            self.__best[0] = 1
+            return True
+        self.__best[0] = 2
+        return False
+
+    def published(self, message=None):
+        """ Return the last action recorded by put() or publish()
+
+        Actions that cannot be stored in shared memory are taken from the last
+        message received through the pipe (a (context, action) tuple), so the
+        caller can reject them as invalid moves.
+
+        Raises
+        ------
+        queue.Empty
+            If the agent did not put or publish any action
+        """
+        if not self.__best[0] or (self.__best[0] == 2 and message is None):
+            raise Empty
+        return self.__best[1] if self.__best[0] == 1 else message[1]
+
+    def flush(self):
+        """ Send the current context through the pipe if publish() was called
+        since the last call to put()
+        """
+        if self.__nodes and not self.__reported_nodes:
+            self.__telemetry[0] = self.__nodes
+        if self.__unsent_context:
+            self.__send(self.__best[1])
 
     def put(self, item, block=True, timeout=None):
-        if self.__stop_time and time.perf_counter() > self.__stop_time:
+        if self.__expired():
             raise StopSearch
-        if self.__receiver.poll():
+        self.__store(item)
+        self.__commit()
+        self.__send(item)
+
+    def __send(self, item):
+        if self.__drain and self.__receiver.poll():
             self.__receiver.recv()
         self.__sender.send((getattr(self.agent, "context", None), item))
+        self.__unsent_context = False
 
     def put_nowait(self, item):
         self.put(item, block=False)
 
     def get(self, block=True, timeout=None):
+        if not block and not self.__receiver.poll():
+            raise Empty
         return self.__receiver.recv()
 
     def get_nowait(self):
@@ -88,9 +263,65 @@ class TimedQueue:
     def full(self): return self.__receiver.poll()
 
 
+class NodeBudgetQueue:
+    """ Queue for matches with a node budget instead of a time limit
+
+    The agent runs in the calling process, and StopSearch is raised when the
+    agent counts more than `node_limit` nodes with .count(). Agents that do not
+    count nodes run until get_action() returns. The queue implements the same
+    agent-facing methods as TimedQueue.
+    """
+    def __init__(self, node_limit):
+        self.node_limit = node_limit
+        self.nodes = 0
+        self.agent = None
+        self.__action = None
+        self.__has_action = False
+        self.__telemetry = [None, None, None]
+
+    def start_timer(self): pass
+
+    def count(self, nodes=1):
+        self.nodes += nodes
+        if self.nodes > self.node_limit:
+            raise StopSearch
+
+    def time_left(self): return math.inf
+
+    def stop_requested(self): return self.nodes >= self.node_limit
+
+    def put(self, item, block=True, timeout=None):
+        if self.nodes > self.node_limit:
+            raise StopSearch
+        self.__action, self.__has_action = item, True
+
+    put_nowait = publish = put
+
+    def published(self):
+        if not self.__has_action:
+            raise Empty
+        return self.__action
+
+    def report(self, nodes=None, depth=None, tt_hits=None):
+        for idx, value in enumerate((nodes, depth, tt_hits)):
+            if value is not None:
+                self.__telemetry[idx] = value
+
+    def telemetry(self):
+        nodes, depth, tt_hits = self.__telemetry
+        if nodes is None and self.nodes:
+            nodes = self.nodes
+        return Telemetry(nodes, depth, tt_hits, None)
+
+    def flush(self): pass
+
+
 def play(args): return _play(*args)  # multithreading ThreadPool.map doesn't expand args
 
 
+def play_game(args): return _play_game(*args)
+
+
 def _play(agents, game_state, time_limit, match_id, debug=False):
     """ Run a match between two agents by alternately soliciting them to
     select a move and applying it to advance the game state.
@@ -115,10 +346,31 @@ def _play(agents, game_state, time_limit, match_id, debug=False):
         Return multiple including the winning agent, the actions that
         were applied to the initial state, a status code describing the
         reason the game ended, and any error information
+
+    See Also
+    --------
+        play_game() returns the full GameResult instead of this summary
+    """
+    result = _play_game(agents, game_state, time_limit, match_id, debug)
+    return result.winner, result.history, result.match_id
+
+
+def _play_game(agents, game_state, time_limit, match_id, debug=False, node_limit=None, seed=0):
+    """ Run a match between two agents (see _play()) and return a GameResult
+    that also records the status, initial state, the time that each agent
+    took to choose each move (in milliseconds), and the search telemetry
+    reported by the agents
+
+    If `node_limit` is not None, each move is limited to a node budget instead
+    of the time limit (see NodeBudgetQueue); agents run in this process, and
+    the random module is seeded from (seed, match_id, ply) before every move,
+    so the game can be replayed exactly.
     """
     initial_state = game_state
     game_history = []
-    winner = None
+    think_times = []
+    telemetry = []
+    winner = winner_id = None
     status = Status.NORMAL
     players = [a.agent_class(player_id=i) for i, a in enumerate(agents)]
     logger.info(GAME_INFO.format(initial_state, *agents))
@@ -127,9 +379,16 @@ def _play(agents, game_state, time_limit, match_id, debug=False):
 
         # any problems during get_action means the active player loses
         winner, loser = agents[1 - active_idx], agents[active_idx]
+        winner_id = 1 - active_idx
 
         try:
-            action = fork_get_action(game_state, players[active_idx], time_limit, debug)
+            start = time.perf_counter()
+            if node_limit is None:
+                action, move_telemetry = _fork_search(game_state, players[active_idx], time_limit, debug)
+            else:
+                move_seed = "{}:{}:{}".format(seed, match_id, game_state.ply_count)
+                action, move_telemetry = _budget_search(game_state, players[active_idx], node_limit, move_seed)
+            think_time = 1000 * (time.perf_counter() - start)
         except Empty:
             status = Status.TIMEOUT
             logger.warn(textwrap.dedent("""\
@@ -152,35 +411,114 @@ def _play(agents, game_state, time_limit, match_id, debug=False):
 
         game_state = game_state.result(action)
         game_history.append(action)
+        think_times.append(think_time)
+        telemetry.append(move_telemetry)
     else:
         status = Status.GAME_OVER
         if game_state.utility(active_idx) > 0:
             winner, loser = loser, winner  # swap winner/loser if active player won
+            winner_id = active_idx
 
     logger.info(RESULT_INFO.format(status, game_state, game_history, winner, loser))
-    return winner, game_history, match_id
+    return GameResult(agents, initial_state, game_history, think_times, [t.depth for t in telemetry],
+                      status, winner, winner_id, match_id, telemetry)
 
 
 def fork_get_action(game_state, active_player, time_limit, debug=False):
+    action, _ = _fork_search(game_state, active_player, time_limit, debug)
+    return action
+
+
+def _fork_search(game_state, active_player, time_limit, debug=False):
+    """ Run fork_get_action() and return the action and the Telemetry that the
+    agent reported for the move
+    """
     receiver, sender = Pipe()
-    action_queue = TimedQueue(receiver, sender, time_limit)
+    action_queue = TimedQueue(receiver, sender, time_limit, drain=debug)
+    message = None
     if debug:  # run the search in the main process and thread
         from copy import deepcopy
         active_player.queue = None
         active_player = deepcopy(active_player)
         active_player.queue = action_queue
+        timer = Timer(time_limit / 1000, action_queue.request_stop)
+        timer.start()
         _request_action(active_player, action_queue, game_state)
-        time.sleep(time_limit / 1000)
+        timer.join()
+        if action_queue.qsize(): message = action_queue.get_nowait()
     else:  # spawn a new process to run the search function
         try:
             p = Process(target=_request_action, args=(active_player, action_queue, game_state))
             p.start()
-            p.join(timeout=PROCESS_TIMEOUT + time_limit / 1000)
+            message = _wait_for_agent(p, receiver, action_queue, time_limit)
         finally:
             if p and p.is_alive(): p.terminate()
-    new_context, action = action_queue.get_nowait()  # raises Empty if agent did not respond
-    active_player.context = new_context
-    return action
+    action = action_queue.published(message)  # raises Empty if agent did not respond
+    if message is not None:
+        active_player.context, _ = message
+    if game_state.locs[game_state.player()] is not None and action in game_state.actions():
+        action = Action(action)
+    return action, action_queue.telemetry()
+
+
+def _budget_search(game_state, active_player, node_limit, seed):
+    """ Run the agent search in this process with a node budget and return the
+    action and Telemetry (see NodeBudgetQueue)
+
+    The agent is not copied, so the data it loaded when it was created (and
+    any other attribute, not only its context) is kept between its moves;
+    _play_game() creates new agents for every game.
+    """
+    action_queue = NodeBudgetQueue(node_limit)
+    random_state = random.getstate()
+    random.seed(seed)
+    try:
+        _request_action(active_player, action_queue, game_state)
+    finally:
+        random.setstate(random_state)
+        active_player.queue = None
+    action = action_queue.published()  # raises Empty if agent did not respond
+    return action, action_queue.telemetry()
+
+
+def _wait_for_agent(process, receiver, action_queue, time_limit):
+    """ Receive messages from the agent process until it exits, setting the
+    stop flag when the time limit of the turn expires and giving up
+    PROCESS_TIMEOUT seconds later; return the last message received (or None)
+
+    The turn is timed from the moment the agent process starts its timer
+    (see TimedQueue.start_timer), so process start up is not charged to the
+    agent; a process that never starts its timer is given up on after the
+    time limit plus PROCESS_TIMEOUT, like a process that never returns.
+
+    The pipe is read while the agent is running so that sending a large
+    context never blocks the agent process.
+    """
+    message = None
+    stop_time = None
+    kill_time = time.perf_counter() + time_limit / 1000 + PROCESS_TIMEOUT
+    while True:
+        if stop_time is None:
+            stop_time = action_queue.stop_time()
+            if stop_time is not None:
+                kill_time = stop_time + PROCESS_TIMEOUT
+        now = time.perf_counter()
+        if now >= kill_time:
+            return message
+        if stop_time is None:
+            timeout = min(START_POLL_INTERVAL, kill_time - now)
+        elif now < stop_time:
+            timeout = stop_time - now
+        else:
+            action_queue.request_stop()
+            timeout = kill_time - now
+        ready = wait([receiver, process.sentinel], timeout)
+        if receiver in ready:
+            message = receiver.recv()
+        elif ready:  # the agent process exited, so any remaining messages are complete
+            while receiver.poll():
+                message = receiver.recv()
+            return message
 
 
 def _request_action(agent, queue, game_state):
@@ -194,3 +532,5 @@ def _request_action(agent, queue, game_state):
         agent.get_action(game_state)
     except StopSearch:
         pass
+    finally:
+        queue.flush()
@@ -0,0 +1,44 @@
+""" Precomputed knight move tables and a fast terminal test for the standard
+11 x 9 board of `isolation.Isolation`
+
+The game state classes in isolation.py are part of the graded project and are
+not modified; search code that needs the knight moves of a cell, or the
+terminal test and utility of a state at every node, should use the tables and
+functions in this module instead of rebuilding them.
+"""
+from .isolation import Action, _BLANK_BOARD, _SIZE
+from .geometry import GeometryIsolation
+
+__all__ = ['NEIGHBORS', 'NEIGHBOR_MASKS', 'terminal_utility']
+
+# the open cells of the blank board one knight move from each location (the
+# two-bit border on each row of the bitboard means moves never wrap a row)
+NEIGHBORS = tuple(tuple(loc + a for a in Action if 0 <= loc + a < _SIZE and _BLANK_BOARD & (1 << (loc + a)))
+                  for loc in range(_SIZE))
+
+# bitmask of the cells in NEIGHBORS[loc]
+NEIGHBOR_MASKS = tuple(sum(1 << c for c in cells) for cells in NEIGHBORS)
+
+# Isolation._has_liberties() tests the truth of the open cell indices, so an
+# open cell 0 never counts as a liberty; the masks below match that scoring
+_LIBERTY_MASKS = tuple(mask & ~1 for mask in NEIGHBOR_MASKS)
+_OPEN_MASK = ~1  # liberties of a player that has not placed its token
+
+
+def terminal_utility(state, player_id):
+    """ Return a pair (terminal, utility) equal to (state.terminal_test(),
+    state.utility(player_id)), computed with at most two bitmask tests
+
+    Search functions should call this once per node instead of calling
+    terminal_test() and utility() separately.
+    """
+    if isinstance(state, GeometryIsolation):
+        return state.terminal_utility(player_id)
+    board, active = state.board, state.ply_count % 2
+    loc = state.locs[active]
+    if not board & (_OPEN_MASK if loc is None else _LIBERTY_MASKS[loc]):
+        return True, (float("-inf") if player_id == active else float("inf"))
+    loc = state.locs[1 - active]
+    if not board & (_OPEN_MASK if loc is None else _LIBERTY_MASKS[loc]):
+        return True, (float("inf") if player_id == active else float("-inf"))
+    return False, 0
@@ -0,0 +1,187 @@
+""" Knight's Isolation game states for boards of any size
+
+`make_isolation(width, height, blocked)` returns a game state class for one
+board geometry. The class has the same fields (board, ply_count, locs) and the
+same methods as `isolation.Isolation`, and states are immutable and hashable
+in the same way, but every per-cell quantity (the legal knight moves from each
+cell, the neighborhood bitmasks, and the blank board) is computed once when the
+class is created instead of on every call. Classes are cached, so every call
+with the same geometry returns the same class, and states pickle by geometry
+rather than by class so they can be sent to search processes.
+
+The bitboard layout is the same as `isolation.Isolation`: each row of the board
+is padded with two blocked cells, so the board with the default geometry
+(11 x 9, no blocked cells) is the board of the standard game and its actions
+are the members of `isolation.Action`; for other widths, actions are the
+integer offsets of the knight moves on the bitboard. Unlike
+`Isolation._has_liberties()`, which never counts an open cell 0 as a liberty,
+the terminal test counts every open cell, so the two classes disagree about
+states where a player's only move is to cell 0.
+
+Examples
+--------
+>>> Board = make_isolation(15, 15, blocked=[0, 1])
+>>> state = Board().result(110).result(130)
+>>> state.actions()
+[33, 15, -19, -35, -33, -15, 19, 35]
+"""
+from functools import lru_cache
+from typing import NamedTuple
+
+from .isolation import Action, _HEIGHT, _WIDTH
+
+__all__ = ['GeometryIsolation', 'make_isolation']
+
+
+class GeometryIsolation(NamedTuple('GeometryIsolation', [('board', int), ('ply_count', int), ('locs', int)])):
+    """ Base class for the game states created by make_isolation()
+
+    Attributes
+    ----------
+    See isolation.Isolation
+
+    Class Attributes
+    ----------------
+    width, height : int
+        The board dimensions
+
+    blocked : tuple
+        Indices of the cells that are blocked in the initial state
+
+    blank_board : int
+        Bitboard of the initial state
+    """
+    __slots__ = ()
+    width = height = None
+    blocked = ()
+    blank_board = 0
+    _cells = ()   # every open cell index of the blank board
+    _moves = ()   # _moves[loc] is a tuple of (action, target cell) pairs on the blank board
+    _masks = ()   # _masks[loc] is the bitmask of the target cells in _moves[loc]
+    _action_set = frozenset()
+
+    def __new__(cls, board=None, ply_count=0, locs=(None, None)):
+        if cls.width is None:
+            raise TypeError("Use make_isolation() to create a state class for a board geometry")
+        board = cls.blank_board if board is None else board
+        return super(GeometryIsolation, cls).__new__(cls, board, ply_count, locs)
+
+    def __reduce__(self):
+        return _make_state, (self.width, self.height, self.blocked, tuple(self))
+
+    def actions(self):
+        """ Return a list of the legal actions in the current state """
+        loc = self.locs[self.ply_count % 2]
+        board = self.board
+        if loc is None:
+            return [c for c in self._cells if board & (1 << c)]
+        return [a for a, target in self._moves[loc] if board & (1 << target)]
+
+    def player(self):
+        """ Return the id of the active player """
+        return self.ply_count % 2
+
+    def result(self, action):
+        """ Return the resulting game state after applying the action specified
+        to the current game state
+        """
+        player = self.ply_count % 2
+        player_location = self.locs[player]
+        assert player_location is None or action in self._action_set, \
+            "{} is not a valid action from the set {}".format(action, sorted(self._action_set))
+        player_location = int(action) + (0 if player_location is None else player_location)
+        if not (0 <= player_location and self.board & (1 << player_location)):
+            raise RuntimeError("Invalid move: target cell blocked")
+        board = self.board ^ (1 << player_location)
+        locs = (self.locs[0], player_location) if player else (player_location, self.locs[1])
+        return self.__class__(board, self.ply_count + 1, locs)
+
+    def terminal_test(self):
+        """ Return True if either player has no legal moves, otherwise False """
+        return not (self._has_liberties(0) and self._has_liberties(1))
+
+    def utility(self, player_id):
+        """ Return +inf if `player_id` has won, -inf if it has lost, and 0 if
+        the game is not over (see isolation.Isolation.utility)
+        """
+        return self.terminal_utility(player_id)[1]
+
+    def terminal_utility(self, player_id):
+        """ Return the pair (terminal_test(), utility(player_id)) (see
+        isolation.bitboard.terminal_utility)
+        """
+        board, active = self.board, self.ply_count % 2
+        loc = self.locs[active]
+        if not (board if loc is None else board & self._masks[loc]):
+            return True, (float("-inf") if player_id == active else float("inf"))
+        loc = self.locs[1 - active]
+        if not (board if loc is None else board & self._masks[loc]):
+            return True, (float("inf") if player_id == active else float("-inf"))
+        return False, 0
+
+    def liberties(self, loc):
+        """ Return a list of the open cells in the neighborhood of `loc` """
+        board = self.board
+        if loc is None:
+            return [c for c in self._cells if board & (1 << c)]
+        return [target for _, target in self._moves[loc] if board & (1 << target)]
+
+    def _has_liberties(self, player_id):
+        loc = self.locs[player_id]
+        return bool(self.board if loc is None else self.board & self._masks[loc])
+
+
+def make_isolation(width=_WIDTH, height=_HEIGHT, blocked=()):
+    """ Return the game state class for a board geometry
+
+    Parameters
+    ----------
+    width, height : int
+        The number of columns and rows on the board
+
+    blocked : iterable (optional)
+        Indices (on the bitboard) of cells that are blocked at the start of the
+        game; the index of column x and row y is `x + y * (width + 2)`
+    """
+    return _make_class(width, height, tuple(sorted(set(blocked))))
+
+
+@lru_cache(maxsize=None)
+def _make_class(width, height, blocked):
+    if width < 1 or height < 1:
+        raise ValueError("The board must have at least one row and column")
+    stride = width + 2
+    size = stride * height - 2
+    cells = [x + y * stride for y in range(height) for x in range(width)]
+    if any(c not in cells for c in blocked):
+        raise ValueError("Blocked cells must be on the board")
+    blank_board = sum(1 << c for c in cells if c not in blocked)
+
+    N, E = stride, -1
+    offsets = [N + N + E, E + N + E, E - N + E, -N - N + E, -N - N - E, -E - N - E, -E + N - E, N + N - E]
+    if width == _WIDTH:
+        offsets = list(Action)
+    moves = []
+    for loc in range(size):
+        targets = [(a, loc + a) for a in offsets
+                   if 0 <= loc + a < size and blank_board & (1 << (loc + a))]
+        moves.append(tuple(targets))
+    masks = tuple(sum(1 << t for _, t in targets) for targets in moves)
+
+    name = "Isolation{}x{}".format(width, height) + ("b{}".format(len(blocked)) if blocked else "")
+    return type(name, (GeometryIsolation,), {
+        "__slots__": (),
+        "__module__": __name__,
+        "width": width,
+        "height": height,
+        "blocked": blocked,
+        "blank_board": blank_board,
+        "_cells": tuple(c for c in cells if c not in blocked),
+        "_moves": tuple(moves),
+        "_masks": masks,
+        "_action_set": frozenset(offsets),
+    })
+
+
+def _make_state(width, height, blocked, fields):
+    return make_isolation(width, height, blocked)(*fields)
@@ -0,0 +1,253 @@
+""" Monte Carlo Tree Search (UCT) agents for knight's Isolation
+
+The tree and the playouts both work directly on the bitboard integer and the
+pair of player locations instead of creating `Isolation` objects and action
+lists, which makes playouts several times faster than playing out games with
+`Isolation.result()` and `Isolation.actions()`.
+
+The search tree is saved in `self.context` after every turn, so the subtree
+below the move that was actually played (and the opponent's reply) is reused
+at the start of the next turn.
+
+Run this module to benchmark the playout rate of each rollout policy:
+
+    $ python mcts.py -s 2
+"""
+import argparse
+import math
+import random
+import time
+
+from isolation import Isolation
+from isolation.bitboard import NEIGHBORS
+from isolation.isolation import Action, _SIZE
+from endgame import solve_endgame, ENDGAME_MAX_CELLS
+from sample_players import BasePlayer
+
+_CELLS = tuple(range(_SIZE))
+
+
+def _moves(board, loc):
+    """ Return the list of cells that a token at `loc` can move to """
+    if loc is None:
+        return [c for c in _CELLS if board & (1 << c)]
+    return [c for c in NEIGHBORS[loc] if board & (1 << c)]
+
+
+def random_rollout(board, locs, player, rng=random, moves=None):
+    """ Play uniformly random moves until the active player can't move, and
+    return the id of the winning player (the cells moved to are appended to
+    the `moves` list, if given)
+    """
+    locs = list(locs)
+    while True:
+        options = _moves(board, locs[player])
+        if not options:
+            return 1 - player
+        cell = options[int(rng.random() * len(options))]
+        if moves is not None: moves.append(cell)
+        board ^= 1 << cell
+        locs[player] = cell
+        player ^= 1
+
+
+def mobility_rollout(board, locs, player, rng=random, moves=None):
+    """ Play the move that leaves the active player with the most liberties
+    (ties broken at random) until the active player can't move, and return
+    the id of the winning player (see random_rollout)
+    """
+    locs = list(locs)
+    while True:
+        options = _moves(board, locs[player])
+        if not options:
+            return 1 - player
+        best, best_score = [], -1
+        for cell in options:
+            after = board ^ (1 << cell)
+            score = sum(1 for c in NEIGHBORS[cell] if after & (1 << c))
+            if score > best_score:
+                best, best_score = [cell], score
+            elif score == best_score:
+                best.append(cell)
+        cell = best[int(rng.random() * len(best))]
+        if moves is not None: moves.append(cell)
+        board ^= 1 << cell
+        locs[player] = cell
+        player ^= 1
+
+
+ROLLOUT_POLICIES = {"random": random_rollout, "mobility": mobility_rollout}
+
+
+class _Node:
+    """ A node in the search tree; `wins` counts the playouts won by the player
+    who made the move into this node
+    """
+    __slots__ = ["board", "locs", "ply", "cell", "parent", "children", "untried", "wins", "visits"]
+
+    def __init__(self, board, locs, ply, cell=None, parent=None):
+        self.board = board
+        self.locs = locs
+        self.ply = ply
+        self.cell = cell
+        self.parent = parent
+        self.children = []
+        self.wins = 0
+        self.visits = 0
+        player = ply % 2
+        self.untried = _moves(board, locs[player])
+        if self.untried and locs[1 - player] is not None and not _moves(board, locs[1 - player]):
+            self.untried = []  # the opponent can't move, so the game is over
+
+    def expand(self, cell):
+        player = self.ply % 2
+        locs = (cell, self.locs[1]) if player == 0 else (self.locs[0], cell)
+        child = _Node(self.board ^ (1 << cell), locs, self.ply + 1, cell, self)
+        self.untried.remove(cell)
+        self.children.append(child)
+        return child
+
+    def select(self, exploration):
+        log_n = math.log(self.visits)
+        return max(self.children, key=lambda c: c.wins / c.visits + exploration * math.sqrt(log_n / c.visits))
+
+    def winner(self):
+        """ Return the winner if the node is terminal (the active player loses
+        if it has no moves, otherwise the opponent has no moves and loses)
+        """
+        player = self.ply % 2
+        return 1 - player if not _moves(self.board, self.locs[player]) else player
+
+
+class MCTSPlayer(BasePlayer):
+    """ Agent that chooses moves with UCT Monte Carlo tree search
+
+    Attributes
+    ----------
+    rollout : str
+        Name of the rollout policy in ROLLOUT_POLICIES
+
+    exploration : float
+        UCB1 exploration constant
+
+    report_interval : int
+        Number of playouts between publishing the best move and reporting
+        telemetry; moves are published through shared memory, and the tree
+        (the context) is only sent to the parent once the search stops
+    """
+    rollout = "random"
+    exploration = math.sqrt(2)
+    report_interval = 32
+
+    def get_action(self, state):
+        """ Run MCTS iterations until the parent asks the search to stop,
+        publishing the most visited root move periodically
+        """
+        endgame = None if state.ply_count < 2 else solve_endgame(state, ENDGAME_MAX_CELLS)
+        if endgame is not None and endgame.action is not None:
+            self.queue.put(endgame.action)
+            return
+
+        root = self._reuse_tree(state)
+        if not (root.untried or root.children):  # the game is already over
+            self.queue.put(random.choice(state.actions()))
+            return
+        self.context = root
+        rollout = ROLLOUT_POLICIES[self.rollout]
+        iterations, depth = 0, 0
+        self.queue.publish(self._to_action(state, root) if root.children else random.choice(state.actions()))
+        while not self.queue.stop_requested():
+            self.queue.count()  # one node per playout; raises StopSearch when stopped
+            depth = max(depth, self.search(root, rollout))
+            iterations += 1
+            if iterations % self.report_interval == 0:
+                self.queue.publish(self._to_action(state, root))
+                self.queue.report(depth=depth)
+        self.queue.report(depth=depth)
+        self.queue.publish(self._to_action(state, root))  # raises StopSearch after a time limit
+
+    def search(self, root, rollout):
+        """ Run one selection, expansion, playout & backpropagation iteration
+        and return the depth of the tree node where the playout started
+        """
+        node = root
+        while not node.untried and node.children:
+            node = node.select(self.exploration)
+        depth = node.ply - root.ply
+        if node.untried:
+            node = node.expand(random.choice(node.untried))
+            winner = rollout(node.board, node.locs, node.ply % 2)
+            depth += 1
+        else:
+            winner = node.winner()
+        while node is not None:
+            node.visits += 1
+            if winner != node.ply % 2:  # the player who moved into this node won
+                node.wins += 1
+            node = node.parent
+        return depth
+
+    def _reuse_tree(self, state):
+        """ Return the subtree of the previous search matching the current state
+        (the grandchild of the previous root), or a new root node
+        """
+        previous = self.context
+        if isinstance(previous, _Node):
+            for child in previous.children:
+                for grandchild in child.children:
+                    if (grandchild.board, grandchild.ply, grandchild.locs) == state:
+                        grandchild.parent = None
+                        return grandchild
+        return _Node(state.board, state.locs, state.ply_count)
+
+    @staticmethod
+    def _to_action(state, root):
+        cell = max(root.children, key=lambda c: c.visits).cell
+        loc = state.locs[state.player()]
+        return cell if loc is None else Action(cell - loc)
+
+
+class MobilityMCTSPlayer(MCTSPlayer):
+    """ MCTS agent using mobility-greedy rollouts instead of random rollouts """
+    rollout = "mobility"
+
+
+def benchmark(rollout, seconds=1., num_states=20, seed=0):
+    """ Return the number of playouts per second for the rollout policy from a
+    fixed set of midgame positions
+    """
+    rng = random.Random(seed)
+    states = []
+    while len(states) < num_states:
+        state = Isolation()
+        for _ in range(rng.randint(2, 20)):
+            if state.terminal_test(): break
+            state = state.result(rng.choice(state.actions()))
+        if not state.terminal_test():
+            states.append(state)
+
+    playouts, start = 0, time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        for state in states:
+            rollout(state.board, state.locs, state.player(), rng)
+        playouts += len(states)
+    return playouts / (time.perf_counter() - start)
+
+
+def _reference_rollout(state, rng):
+    """ Random playout through the Isolation API (used as a benchmark baseline) """
+    while not state.terminal_test():
+        state = state.result(rng.choice(state.actions()))
+    return state
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark MCTS playouts per second.")
+    parser.add_argument('-s', '--seconds', type=float, default=2.,
+                        help="Number of seconds to run each benchmark.")
+    args = parser.parse_args()
+
+    print("{:<20}{:>16}".format("Rollout policy", "Playouts/sec"))
+    reference = lambda board, locs, player, rng: _reference_rollout(Isolation(board, player, locs), rng)
+    for name, rollout in [("Isolation API", reference)] + sorted(ROLLOUT_POLICIES.items()):
+        print("{:<20}{:>16,.0f}".format(name, benchmark(rollout, args.seconds)))
@@ -1,5 +1,26 @@
+import os
+
+from functools import lru_cache
+
 from Projects.adverserial_search.sample_players import DataPlayer
 
+BOOK_FILE = "data.book"
+
+
+@lru_cache()
+def _load_book(filename):
+    """ Open the memory-mapped opening book once per process, or return None
+    if the book file or opening_book.py is missing (neither one is submitted
+    for grading, so the agent must play without them)
+    """
+    if not os.path.isfile(filename):
+        return None
+    try:
+        from opening_book import OpeningBook
+        return OpeningBook(filename)
+    except (ImportError, OSError, ValueError):
+        return None
+
 
 class CustomPlayer(DataPlayer):
     """ Implement your own agent to play knight's Isolation
@@ -42,4 +63,6 @@ class CustomPlayer(DataPlayer):
         #          call self.queue.put(ACTION) at least once before time expires
         #          (the timer is automatically managed for you)
         import random
-        self.queue.put(random.choice(state.actions()))
+        book = _load_book(BOOK_FILE)  # play instantly from the opening book (if any)
+        action = None if book is None else book.get(state)
+        self.queue.put(action if action is not None else random.choice(state.actions()))
@@ -0,0 +1,173 @@
+""" Build and query a compact, memory-mapped opening book for knight's Isolation
+
+The book file is a short header followed by fixed-size records sorted by their
+key. Each key packs the bitboard and both player locations into 17 bytes (the
+ply count is implied by the number of blocked cells on the board), and each
+record stores the best action found by a deep search from that state. Lookups
+memory-map the file and binary search the records, so opening the book is
+instant, the file pages are shared between every process that uses it (e.g.,
+the per-move search processes created by `isolation.fork_get_action`), and
+nothing needs to be unpickled.
+
+Example Usage:
+
+    $ python opening_book.py -d 2 -s 3 -o data.book
+"""
+import argparse
+import mmap
+import os
+import struct
+
+from multiprocessing import Pool
+
+from alphabeta import AlphaBetaSearch
+from isolation import Isolation
+from isolation.isolation import Action, _BLANK_BOARD, _SIZE
+
+MAGIC = b"ISOBOOK1"
+_HEADER = struct.Struct(">8sI")  # magic, number of records
+_RECORD = struct.Struct(">17sb")  # state key, action
+_KEY_SIZE = 17
+_BOARD_BYTES = (_SIZE + 7) // 8
+_NO_LOC = 255  # location byte used for players that have not placed their token
+
+assert _BOARD_BYTES + 2 == _KEY_SIZE
+
+
+def state_key(state):
+    """ Pack a game state into a fixed-width byte string that sorts in the
+    same order as the (board, loc0, loc1) integers it encodes
+    """
+    locs = bytes(_NO_LOC if loc is None else loc for loc in state.locs)
+    return state.board.to_bytes(_BOARD_BYTES, "big") + locs
+
+
+def key_state(key):
+    """ Unpack a key created by state_key() into an Isolation state """
+    board = int.from_bytes(key[:_BOARD_BYTES], "big")
+    locs = tuple(None if loc == _NO_LOC else loc for loc in key[_BOARD_BYTES:])
+    ply_count = bin(_BLANK_BOARD).count("1") - bin(board).count("1")
+    return Isolation(board, ply_count, locs)
+
+
+def best_action(state, search_depth):
+    """ Return the best action for the active player using a fixed-depth
+    alpha-beta search (ties are broken by the order of state.actions())
+    """
+    return AlphaBetaSearch().search_root(state, state.actions(), search_depth)
+
+
+def _book_entry(args):
+    state, search_depth = args
+    return state_key(state), int(best_action(state, search_depth))
+
+
+def opening_states(depth, initial_state=None):
+    """ Return every distinct non-terminal state that can be reached from the
+    initial state in fewer than `depth` plies
+    """
+    frontier = [initial_state or Isolation()]
+    states = []
+    for _ in range(depth):
+        states.extend(s for s in frontier if not s.terminal_test())
+        frontier = list({s.result(a) for s in frontier if not s.terminal_test() for a in s.actions()})
+    return states
+
+
+def build_book(depth=2, search_depth=3, processes=None):
+    """ Search every opening state shallower than `depth` plies and return a
+    dict mapping state keys to the best action found for the active player
+
+    Parameters
+    ----------
+    depth : int
+        Number of plies covered by the opening book
+
+    search_depth : int
+        Depth limit of the alpha-beta search used to choose each book move
+
+    processes : int
+        Number of worker processes (defaults to the number of CPUs)
+    """
+    tasks = [(state, search_depth) for state in opening_states(depth)]
+    with Pool(processes) as pool:
+        return dict(pool.imap_unordered(_book_entry, tasks, chunksize=16))
+
+
+def write_book(book, filename):
+    """ Write a {state key: action} dict to disk in the sorted record format """
+    with open(filename, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, len(book)))
+        for key in sorted(book):
+            f.write(_RECORD.pack(key, book[key]))
+
+
+class OpeningBook:
+    """ Read-only view of an opening book file backed by a memory map
+
+    Examples
+    --------
+    >>> book = OpeningBook("data.book")
+    >>> action = book.get(state)  # None if the state is not in the book
+    """
+    def __init__(self, filename):
+        self.filename = filename
+        with open(filename, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self._count = _HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            raise ValueError("{} is not an opening book file".format(filename))
+
+    def __len__(self):
+        return self._count
+
+    def __contains__(self, state):
+        return self._find(state_key(state)) is not None
+
+    def __getstate__(self):
+        return {"filename": self.filename}  # mmaps can't be pickled; reopen the file instead
+
+    def __setstate__(self, state):
+        self.__init__(state["filename"])
+
+    def _find(self, key):
+        mm, lo, hi = self._mmap, 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            offset = _HEADER.size + mid * _RECORD.size
+            probe = mm[offset:offset + _KEY_SIZE]
+            if probe < key:
+                lo = mid + 1
+            elif probe > key:
+                hi = mid
+            else:
+                return offset
+        return None
+
+    def get(self, state, default=None):
+        """ Return the book action for the state, or default if it is missing """
+        offset = self._find(state_key(state))
+        if offset is None:
+            return default
+        _, action = _RECORD.unpack_from(self._mmap, offset)
+        return action if state.locs[state.player()] is None else Action(action)
+
+    def close(self):
+        self._mmap.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build an opening book for knight's Isolation.")
+    parser.add_argument('-d', '--depth', type=int, default=2,
+                        help="Number of plies from the empty board covered by the book.")
+    parser.add_argument('-s', '--search_depth', type=int, default=3,
+                        help="Depth of the alpha-beta search used to choose each book move.")
+    parser.add_argument('-p', '--processes', type=int, default=os.cpu_count(),
+                        help="Number of worker processes used to search book states.")
+    parser.add_argument('-o', '--output', type=str, default="data.book",
+                        help="Name of the opening book file to write.")
+    args = parser.parse_args()
+
+    book = build_book(args.depth, args.search_depth, args.processes)
+    write_book(book, args.output)
+    print("Wrote {} positions to {}".format(len(book), args.output))
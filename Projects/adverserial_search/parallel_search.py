@@ -0,0 +1,157 @@
+""" Parallel root-splitting alpha-beta search for knight's Isolation
+
+Agents run inside the single process that `isolation.fork_get_action` creates
+for each move, so a single-threaded search can only use one core no matter how
+many the machine has. `ParallelAlphaBetaPlayer` starts a pool of worker
+processes for every move and splits the root moves of an iterative deepening
+alpha-beta search between them:
+
+- the search is a flat list of tasks, (depth 1, move 1), (depth 1, move 2),
+  ..., (depth 2, move 1), ...; each worker takes the next task from a shared
+  counter, so idle workers start the next depth while others finish the last
+- each result is written to a shared score table, and the best score found so
+  far at each depth is shared as the alpha bound for the remaining root moves
+  at that depth (moves that fail low are recorded as -inf)
+- the agent process polls the score table and sends the best move of every
+  completed depth to the match runner with `queue.put()`
+
+Workers stop when the agent is stopped or when the move deadline passes, so
+they never outlive the turn. The agent process counts the nodes searched by the
+workers with `queue.count()`, so the agent respects node budgets, but the
+search is not deterministic under a node budget because the budget is only
+checked between polls.
+"""
+import math
+import os
+import random
+import time
+
+from ctypes import c_bool, c_double, c_int, c_longlong
+from multiprocessing import Lock, Process, Value
+from multiprocessing.sharedctypes import RawArray, RawValue
+
+from alphabeta import AlphaBetaSearch
+from evaluation import child_mobility
+from sample_players import BasePlayer
+
+_CHECK_INTERVAL = 1024  # nodes between checks of the stop flag and deadline
+
+
+class _Abort(Exception): pass
+
+
+class _Search(AlphaBetaSearch):
+    """ Alpha-beta search for one worker, counting nodes in shared memory and
+    aborting when the stop flag is set or the deadline passes
+    """
+    def __init__(self, player_id, stop, deadline, nodes, worker_id):
+        super().__init__(player_id)
+        self.stop = stop
+        self.deadline = deadline
+        self.shared_nodes = nodes
+        self.worker_id = worker_id
+
+    def visit(self):
+        self.nodes += 1
+        if self.nodes % _CHECK_INTERVAL == 0:
+            self.shared_nodes[self.worker_id] = self.nodes
+            if self.stop.value or time.monotonic() > self.deadline:
+                raise _Abort
+
+
+def _worker(state, actions, max_depth, shared, worker_id, deadline):
+    """ Search (depth, root move) tasks until every task is taken, the stop
+    flag is set, or the deadline passes
+    """
+    counter, lock, scores, best, done, nodes, stop = shared
+    search = _Search(state.player(), stop, deadline, nodes, worker_id)
+    children = [state.result(action) for action in actions]
+    n = len(actions)
+    try:
+        while True:
+            with counter.get_lock():
+                task = counter.value
+                counter.value += 1
+            depth, idx = 1 + task // n, task % n
+            if depth > max_depth:
+                break
+            alpha = best[depth - 1]
+            value = search.min_value(children[idx], depth - 1, alpha, math.inf)
+            with lock:
+                # a fail-low value is only an upper bound, so it can't be best
+                scores[(depth - 1) * n + idx] = value if value > alpha or alpha == -math.inf else -math.inf
+                best[depth - 1] = max(best[depth - 1], value)
+                done[depth - 1] += 1
+    except _Abort:
+        pass
+    nodes[worker_id] = search.nodes
+
+
+class ParallelAlphaBetaPlayer(BasePlayer):
+    """ Iterative deepening alpha-beta agent that splits the root moves of
+    each iteration between several worker processes
+
+    Attributes
+    ----------
+    workers : int
+        Number of worker processes (defaults to the number of CPUs available
+        to the agent process; when run_match.py pins parallel games to their
+        own CPUs, that is the share of the CPUs given to this game)
+
+    max_depth : int
+        Depth limit of the iterative deepening search (None to search until
+        the tree is exhausted)
+
+    poll_interval : float
+        Seconds between checks of the shared score table
+    """
+    workers = None
+    max_depth = None
+    poll_interval = 0.002
+
+    def get_action(self, state):
+        if None in state.locs:  # opening moves: place the token randomly
+            self.queue.put(random.choice(state.actions()))
+            return
+        actions = state.actions()
+        # send the one-ply greedy move first in case no iteration finishes
+        self.queue.put(max(child_mobility(state, self.player_id), key=lambda child: child[1])[0])
+
+        workers = self.workers or _available_cpus()
+        max_depth = bin(state.board).count("1")  # every open cell filled
+        if self.max_depth is not None:
+            max_depth = min(max_depth, self.max_depth)
+        n = len(actions)
+        shared = (Value(c_longlong, 0), Lock(), RawArray(c_double, max_depth * n),
+                  RawArray(c_double, [-math.inf] * max_depth), RawArray(c_int, max_depth),
+                  RawArray(c_longlong, workers), RawValue(c_bool, False))
+        _, _, scores, _, done, nodes, stop = shared
+        deadline = time.monotonic() + self.queue.time_left() / 1000
+        processes = [Process(target=_worker, args=(state, actions, max_depth, shared, idx, deadline), daemon=True)
+                     for idx in range(workers)]
+        try:
+            for p in processes: p.start()
+            depth = counted = 0
+            while depth < max_depth and not self.queue.stop_requested():
+                total = sum(nodes)
+                self.queue.count(total - counted)  # node budgets are enforced between polls
+                counted = total
+                if done[depth] < n:
+                    if not any(p.is_alive() for p in processes): break
+                    time.sleep(self.poll_interval)
+                    continue
+                depth += 1
+                row = scores[(depth - 1) * n:depth * n]
+                self.queue.put(actions[row.index(max(row))])
+                self.queue.report(depth=depth)
+        finally:
+            stop.value = True
+            for p in processes:
+                p.join(timeout=0.1)
+                if p.is_alive(): p.terminate()
+
+
+def _available_cpus():
+    if hasattr(os, "sched_getaffinity"):
+        return max(1, len(os.sched_getaffinity(0)))
+    return os.cpu_count() or 1
@@ -0,0 +1,169 @@
+""" Perft: move generation benchmark and correctness check for knight's Isolation
+
+`perft(state, depth)` walks the complete game tree below a state and counts its
+leaves: the states `depth` plies below the root, plus any terminal state found
+before that depth. The count exercises `actions()`, `result()` and
+`terminal_test()` at every node, so two state implementations that agree on
+every position and depth almost certainly generate the same moves; the time
+taken gives the leaf nodes per second of each implementation.
+
+Every engine in ENGINES is run on the fixed POSITIONS and compared with the
+reference `isolation.Isolation`:
+
+    isolation   the reference game state class
+    geometry    the class returned by `isolation.make_isolation()`
+    bitboard    a raw integer move generator (`bitboard_perft`), the fastest a
+                pure Python state representation can be
+
+Example Usage:
+
+    $ python perft.py                     # every engine and position
+    $ python perft.py -e geometry -d 4    # one engine, depth 4 for every position
+    $ python perft.py --divide midgame -e geometry
+"""
+import argparse
+import time
+
+from isolation import Isolation, make_isolation
+from isolation.bitboard import NEIGHBOR_MASKS
+from isolation.isolation import _BLANK_BOARD
+
+# name -> ((board, ply_count, locs), default depth); the midgame and endgame
+# positions are from seeded random games
+POSITIONS = {
+    "empty": ((_BLANK_BOARD, 0, (None, None)), 3),
+    "placed": (tuple(Isolation().result(57).result(33)), 6),
+    "midgame": ((41521813899566013887797102718216191, 16, (47, 71)), 7),
+    "endgame": ((39859161801187766882471420095981522, 40, (42, 15)), 12),
+}
+
+
+def perft(state, depth):
+    """ Return the number of leaves of the game tree below `state` to `depth`
+    plies, counting terminal states above that depth as leaves
+    """
+    if depth == 0 or state.terminal_test():
+        return 1
+    return sum(perft(state.result(action), depth - 1) for action in state.actions())
+
+
+def perft_divide(state, depth):
+    """ Return a dict mapping each legal action in `state` to the perft count
+    of its child to `depth - 1` plies
+    """
+    return {action: perft(state.result(action), depth - 1) for action in state.actions()}
+
+
+def bitboard_perft(board, ply_count, locs, depth):
+    """ Perft on the raw (board, ply_count, locs) fields of a state, without
+    creating state objects
+    """
+    player = ply_count % 2
+    own, opp = locs[player], locs[1 - player]
+    targets = board if own is None else board & NEIGHBOR_MASKS[own]
+    if depth == 0 or not targets or not (board if opp is None else board & NEIGHBOR_MASKS[opp]):
+        return 1
+    count = 0
+    while targets:
+        bit = targets & -targets
+        targets ^= bit
+        loc = bit.bit_length() - 1
+        count += bitboard_perft(board ^ bit, ply_count + 1, (opp, loc) if player else (loc, opp), depth - 1)
+    return count
+
+
+def _state_engine(state_class):
+    return lambda fields, depth: perft(state_class(*fields), depth)
+
+
+ENGINES = {
+    "isolation": _state_engine(Isolation),
+    "geometry": _state_engine(make_isolation()),
+    "bitboard": lambda fields, depth: bitboard_perft(*fields, depth),
+}
+
+
+def run(engines=None, positions=None, depth=None):
+    """ Run perft for each engine on each position and return a list of
+    (position, engine, depth, leaves, seconds) tuples
+
+    Parameters
+    ----------
+    engines : iterable (optional)
+        Names of ENGINES to run (default: every engine)
+
+    positions : iterable (optional)
+        Names of POSITIONS to search (default: every position)
+
+    depth : int (optional)
+        Search depth for every position (default: the depth in POSITIONS)
+    """
+    rows = []
+    for position in positions or POSITIONS:
+        fields, default_depth = POSITIONS[position]
+        for engine in engines or ENGINES:
+            search_depth = default_depth if depth is None else depth
+            start = time.perf_counter()
+            leaves = ENGINES[engine](fields, search_depth)
+            rows.append((position, engine, search_depth, leaves, time.perf_counter() - start))
+    return rows
+
+
+def mismatches(rows):
+    """ Return the rows whose leaf count differs from the reference engine on
+    the same position and depth (computing the reference count if needed)
+    """
+    reference, bad = {}, []
+    for position, engine, depth, leaves, _ in rows:
+        key = (position, depth)
+        if key not in reference:
+            reference[key] = ENGINES["isolation"](POSITIONS[position][0], depth)
+        if leaves != reference[key]:
+            bad.append((position, engine, depth, leaves, reference[key]))
+    return bad
+
+
+def format_table(rows):
+    """ Format perft results with nodes per second and the speedup over the
+    reference engine (when it was run on the same position)
+    """
+    reference = {(p, d): t for p, e, d, _, t in rows if e == "isolation"}
+    fmt = "{:<10}{:<12}{:>6}{:>12}{:>10}{:>14}{:>9}"
+    lines = [fmt.format("Position", "Engine", "Depth", "Leaves", "Time", "Leaves/sec", "Speedup")]
+    for position, engine, depth, leaves, seconds in rows:
+        ref = reference.get((position, depth))
+        lines.append(fmt.format(position, engine, depth, "{:,}".format(leaves), "{:.3f}s".format(seconds),
+                                "{:,.0f}".format(leaves / seconds) if seconds else "-",
+                                "{:.2f}x".format(ref / seconds) if ref and seconds else "-"))
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Count and time the leaves of Isolation game trees.")
+    parser.add_argument('-e', '--engines', nargs='+', choices=list(ENGINES), default=list(ENGINES),
+                        help="State implementations to run (the reference engine is always checked).")
+    parser.add_argument('-p', '--positions', nargs='+', choices=list(POSITIONS), default=list(POSITIONS),
+                        help="Positions to search.")
+    parser.add_argument('-d', '--depth', type=int, default=None,
+                        help="Search depth for every position (default: a depth per position).")
+    parser.add_argument('--divide', choices=list(POSITIONS), metavar='POSITION',
+                        help="Print the count below each root move of POSITION for the first state engine.")
+    args = parser.parse_args()
+
+    if args.divide:
+        fields, default_depth = POSITIONS[args.divide]
+        depth = default_depth if args.depth is None else args.depth
+        state_classes = {"isolation": Isolation, "geometry": make_isolation()}
+        engine = next((e for e in args.engines if e in state_classes), "isolation")
+        reference = perft_divide(Isolation(*fields), depth)
+        for action, leaves in perft_divide(state_classes[engine](*fields), depth).items():
+            flag = "" if reference.get(action) == leaves else "  MISMATCH (expected {})".format(reference.get(action))
+            print("{!s:<12}{:>12,}{}".format(getattr(action, "name", action), leaves, flag))
+    else:
+        rows = run(args.engines, args.positions, args.depth)
+        print(format_table(rows))
+        bad = mismatches(rows)
+        for position, engine, depth, leaves, expected in bad:
+            print("MISMATCH: {} on {} at depth {}: {} leaves (expected {})".format(
+                engine, position, depth, leaves, expected))
+        raise SystemExit(1 if bad else 0)
@@ -9,11 +9,17 @@ import random
 import textwrap
 
 from collections import namedtuple
-from multiprocessing.pool import ThreadPool as Pool
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import Queue
 
-from isolation import Isolation, Agent, play
-from sample_players import RandomPlayer, GreedyPlayer, MinimaxPlayer
+from isolation import Isolation, Agent, play_game
+from sample_players import RandomPlayer, GreedyPlayer, MinimaxPlayer, EndgameMinimaxPlayer
+from mcts import MCTSPlayer
+from parallel_search import ParallelAlphaBetaPlayer
 from my_custom_player import CustomPlayer
+from sequential_test import SPRT, wilson_interval
+from game_records import GameRecordWriter
+from telemetry import TelemetrySummary, format_table
 
 logger = logging.getLogger(__name__)
 
@@ -25,18 +31,94 @@ TEST_AGENTS = {
     "RANDOM": Agent(RandomPlayer, "Random Agent"),
     "GREEDY": Agent(GreedyPlayer, "Greedy Agent"),
     "MINIMAX": Agent(MinimaxPlayer, "Minimax Agent"),
+    "ENDGAME": Agent(EndgameMinimaxPlayer, "Endgame Minimax Agent"),
+    "MCTS": Agent(MCTSPlayer, "MCTS Agent"),
+    "PARALLEL": Agent(ParallelAlphaBetaPlayer, "Parallel Alpha-Beta Agent"),
     "SELF": Agent(CustomPlayer, "Custom TestAgent")
 }
 
-Match = namedtuple("Match", "players initial_state time_limit match_id debug_flag")
+Match = namedtuple("Match", "players initial_state time_limit match_id debug_flag node_limit seed",
+                   defaults=(None, 0))
 
 
-def _run_matches(matches, name, num_processes=NUM_PROCS, debug=False):
+def _pin_worker(cpu_sets):
+    """ Pin the calling match worker (and every per-move search process it
+    forks) to its own set of CPUs so that agents in parallel games cannot
+    steal time from each other's search budgets.
+    """
+    os.sched_setaffinity(0, cpu_sets.get())
+
+
+def _cpu_sets(available, num_processes):
+    """ Split the available CPUs into one set per worker process
+
+    The CPUs are divided into disjoint sets of (nearly) equal size, so that a
+    multi-process agent like ParallelAlphaBetaPlayer, which starts one search
+    process per CPU in its set, still runs in parallel inside a pinned worker.
+    With more workers than CPUs, the CPUs are assigned round-robin one each.
+    """
+    if num_processes >= len(available):
+        return [{available[idx % len(available)]} for idx in range(num_processes)]
+    size, extra = divmod(len(available), num_processes)
+    bounds = [idx * size + min(idx, extra) for idx in range(num_processes + 1)]
+    return [set(available[lo:hi]) for lo, hi in zip(bounds, bounds[1:])]
+
+
+def _make_executor(num_processes, pin_cpus=True):
+    """ Create a process pool for running whole matches in parallel
+
+    Pool workers are NOT daemonic processes (on Python 3.9 or later), so each
+    game can still fork a new search process for every move (see
+    isolation.fork_get_action), and the PARALLEL agent can start its own
+    search workers. Workers are
+    pinned to disjoint sets of the CPUs available to the parent process (see
+    _cpu_sets).
+    """
+    if not (pin_cpus and hasattr(os, "sched_setaffinity")):
+        return ProcessPoolExecutor(num_processes)
+    cpu_sets = Queue()
+    for cpus in _cpu_sets(sorted(os.sched_getaffinity(0)), num_processes):
+        cpu_sets.put(cpus)
+    return ProcessPoolExecutor(num_processes, initializer=_pin_worker, initargs=(cpu_sets,))
+
+
+def _stream_matches(matches, num_processes=NUM_PROCS, debug=False, pin_cpus=True, on_result=None,
+                    ordered=False):
+    """ Yield the result (an isolation.GameResult) of each match as soon as the
+    game finishes, after passing it to the `on_result` callback (if given)
+
+    Matches are played in the current process when running in debug mode or
+    with a single process; otherwise whole games are distributed across a
+    process pool so that game loops do not share a single interpreter lock.
+    If `ordered` is True, the results are yielded in the order of `matches`
+    instead of the order the games finish. Closing the generator early
+    cancels every game that has not started.
+    """
+    if debug or num_processes < 2:
+        for match in matches:
+            result = play_game(match)
+            if on_result is not None: on_result(result)
+            yield result
+        return
+
+    executor = _make_executor(num_processes, pin_cpus)
+    futures = []
+    try:
+        futures.extend(executor.submit(play_game, match) for match in matches)
+        for future in (futures if ordered else as_completed(futures)):
+            result = future.result()
+            if on_result is not None: on_result(result)
+            yield result
+    finally:
+        for future in futures: future.cancel()  # only games that have not started
+        executor.shutdown(wait=True)
+
+
+def _run_matches(matches, name, num_processes=NUM_PROCS, debug=False, pin_cpus=True, on_result=None):
     results = []
-    pool = Pool(1) if debug else Pool(num_processes)
     print("Running {} games:".format(len(matches)))
-    for result in pool.imap_unordered(play, matches):
-        print("+" if result[0].name == name else '-', end="")
+    for result in _stream_matches(matches, num_processes, debug, pin_cpus, on_result):
+        print("+" if result.winner.name == name else '-', end="", flush=True)
         results.append(result)
     print()
     return results
@@ -44,7 +126,8 @@ def _run_matches(matches, name, num_processes=NUM_PROCS, debug=False):
 
 def make_fair_matches(matches, results):
     new_matches = []
-    for _, game_history, match_id in results:
+    for result in results:
+        game_history, match_id = result.history, result.match_id
         if len(game_history) < 2:
             logger.warn(textwrap.dedent("""\
                 Unable to duplicate match {}
@@ -57,12 +140,33 @@ def make_fair_matches(matches, results):
                           initial_state=state,
                           time_limit=match.time_limit,
                           match_id=-match.match_id,
-                          debug_flag=match.debug_flag)
+                          debug_flag=match.debug_flag,
+                          node_limit=match.node_limit,
+                          seed=match.seed)
         new_matches.append(fair_match)
     return new_matches
 
 
-def play_matches(custom_agent, test_agent, cli_args):
+def _make_round(custom_agent, test_agent, round_id, cli_args):
+    """ Return the pair of matches in one round; each agent moves first once """
+    state = Isolation()
+    return [Match(players=(test_agent, custom_agent),
+                  initial_state=state,
+                  time_limit=cli_args.time_limit,
+                  match_id=2 * round_id,
+                  debug_flag=cli_args.debug,
+                  node_limit=cli_args.node_limit,
+                  seed=cli_args.seed),
+            Match(players=(custom_agent, test_agent),
+                  initial_state=state,
+                  time_limit=cli_args.time_limit,
+                  match_id=2 * round_id + 1,
+                  debug_flag=cli_args.debug,
+                  node_limit=cli_args.node_limit,
+                  seed=cli_args.seed)]
+
+
+def play_matches(custom_agent, test_agent, cli_args, on_result=None):
     """ Play a specified number of rounds between two agents. Each round
     consists of two games, and each player plays as first player in one
     game and second player in the other. (This mitigates "unfair" games
@@ -76,37 +180,98 @@ def play_matches(custom_agent, test_agent, cli_args):
     time, and then lose when their opponent uses that move against them).
     """
     matches = []
-    for match_id in range(cli_args.rounds):
-        state = Isolation()
-        matches.append(Match(
-            players=(test_agent, custom_agent),
-            initial_state=state,
-            time_limit=cli_args.time_limit,
-            match_id=2 * match_id,
-            debug_flag=cli_args.debug))
-        matches.append(Match(
-            players=(custom_agent, test_agent),
-            initial_state=state,
-            time_limit=cli_args.time_limit,
-            match_id=2 * match_id + 1,
-            debug_flag=cli_args.debug))
+    for round_id in range(cli_args.rounds):
+        matches.extend(_make_round(custom_agent, test_agent, round_id, cli_args))
 
     # Run all matches -- must be done before fair matches in order to populate
     # the first move from each player; these moves are reused in the fair matches
-    results = _run_matches(matches, custom_agent.name, cli_args.processes)
+    results = _run_matches(matches, custom_agent.name, cli_args.processes,
+                           cli_args.debug, not cli_args.no_pin, on_result)
 
     if cli_args.fair_matches:
         _matches = make_fair_matches(matches, results)
-        results.extend(_run_matches(_matches, custom_agent.name, cli_args.processes))
+        results.extend(_run_matches(_matches, custom_agent.name, cli_args.processes,
+                                    cli_args.debug, not cli_args.no_pin, on_result))
 
-    wins = sum(int(r[0].name == custom_agent.name) for r in results)
+    wins = sum(int(r.winner.name == custom_agent.name) for r in results)
     return wins, len(matches) * (1 + int(cli_args.fair_matches))
 
 
+def play_sequential(custom_agent, test_agent, cli_args, on_result=None):
+    """ Play rounds between two agents until a sequential probability ratio
+    test (SPRT) decides whether the custom agent's win rate is at least p1 or
+    at most p0, or until the maximum number of rounds has been played.
+
+    Rounds are scheduled in batches (one round per worker process), and the
+    fair matches for each batch are played as soon as the batch finishes. The
+    test is updated after every game, so the run stops as soon as the result
+    is settled at the requested error rates instead of playing a fixed number
+    of rounds. Results are fed to the test in the order the games were
+    scheduled rather than the order they finish, since short games (e.g.,
+    quick losses) would otherwise reach the test first and bias the decision.
+    """
+    test = SPRT(*cli_args.sprt, alpha=cli_args.alpha, beta=cli_args.beta)
+    batch_size = max(1, cli_args.processes)
+    matches = []
+    print("Running up to {} games:".format(
+        2 * cli_args.rounds * (1 + int(cli_args.fair_matches))))
+
+    def _play_batch(batch):
+        results = []
+        games = _stream_matches(batch, cli_args.processes, cli_args.debug, not cli_args.no_pin, on_result,
+                                ordered=True)
+        for result in games:
+            won = result.winner.name == custom_agent.name
+            print("+" if won else '-', end="", flush=True)
+            results.append(result)
+            if test.update(won) is not None:
+                games.close()  # cancel the games in the batch that have not started
+                break
+        return results
+
+    while len(matches) < 2 * cli_args.rounds and test.decision is None:
+        first_round = len(matches) // 2
+        batch = []
+        for round_id in range(first_round, min(first_round + batch_size, cli_args.rounds)):
+            batch.extend(_make_round(custom_agent, test_agent, round_id, cli_args))
+        matches.extend(batch)
+        results = _play_batch(batch)
+        if cli_args.fair_matches and test.decision is None:
+            _play_batch(make_fair_matches(matches, results))
+    print()
+
+    logger.info(str(test))
+    print("{}\n{}".format(test, {
+        "H1": "Win rate is at least {:.1%} (accept H1)".format(test.p1),
+        "H0": "Win rate is at most {:.1%} (accept H0)".format(test.p0),
+        None: "No decision before reaching the maximum number of rounds"}[test.decision]))
+    low, high = wilson_interval(test.wins, test.games, 1 - cli_args.alpha)
+    print("Win rate {:.1%} ({:.0%} CI: {:.1%} - {:.1%}) after {} games".format(
+        test.wins / max(1, test.games), 1 - cli_args.alpha, low, high, test.games))
+    return test.wins, test.games
+
+
 def main(args):
     test_agent = TEST_AGENTS[args.opponent.upper()]
     custom_agent = Agent(CustomPlayer, "Custom Agent")
-    wins, num_games = play_matches(custom_agent, test_agent, args)
+    records = GameRecordWriter(args.record) if args.record else None
+    telemetry = TelemetrySummary(args.time_limit)
+
+    def on_result(result):
+        if records is not None: records.write(result)
+        game = telemetry.add(result)
+        logger.info("Search telemetry for match {}:\n{}".format(result.match_id, format_table(game)))
+
+    try:
+        if args.sprt:
+            wins, num_games = play_sequential(custom_agent, test_agent, args, on_result)
+        else:
+            wins, num_games = play_matches(custom_agent, test_agent, args, on_result)
+    finally:
+        if records is not None: records.close()
+
+    logger.info("Search telemetry:\n{}".format(telemetry))
+    print(telemetry)
 
     logger.info("Your agent won {:.1f}% of matches against {}".format(
        100. * wins / num_games, test_agent.name))
@@ -130,6 +295,16 @@ if __name__ == "__main__":
             - Run 100 rounds (100 rounds = 200 games) against the minimax agent with 1 process:
 
                 $python run_match.py -r 100
+
+            - Play fair matches against the minimax agent until an SPRT decides whether
+              your agent wins at most 45% or at least 55% of games (up to 500 rounds):
+
+                $python run_match.py -f -r 500 --sprt 0.45 0.55 -p 4
+
+            - Play reproducible matches against the MCTS agent with a budget of 2000 nodes
+              per move instead of a time limit:
+
+                $python run_match.py -r 20 -o MCTS --node_limit 2000 --seed 1
         """)
     )
     parser.add_argument(
@@ -170,12 +345,64 @@ if __name__ == "__main__":
     parser.add_argument(
         '-p', '--processes', type=int, default=NUM_PROCS,
         help="""\
-            Set the number of parallel processes to use for running matches.  WARNING: 
-            Windows users may see inconsistent performance using >1 thread.  Check the 
-            log file for time out errors and increase the time limit (add 50-100ms) if 
-            your agent performs poorly.
+            Set the number of parallel processes to use for running matches. Whole games
+            are distributed across a pool of worker processes and results are reported as
+            each game finishes (requires Python 3.9 or later, whose pool workers can
+            start the search process of every move).  WARNING: Windows users may see
+            inconsistent performance using >1 process.  Check the log file for time out
+            errors and increase the time limit (add 50-100ms) if your agent performs poorly.
+        """
+    )
+    parser.add_argument(
+        '--no_pin', action="store_true",
+        help="""\
+            Disable pinning each parallel match worker to its own CPUs. By default, the
+            available CPUs are split evenly between the worker processes, and every worker
+            (and the agent search processes it creates) is restricted to its share so that
+            games running in parallel do not interfere with each other. The PARALLEL agent
+            starts one search process per CPU in its worker's share, so with as many
+            processes as CPUs it searches on a single CPU; use fewer processes (or
+            --no_pin) to give it more.
+        """
+    )
+    parser.add_argument(
+        '--sprt', type=float, nargs=2, metavar=('P0', 'P1'),
+        help="""\
+            Run a sequential probability ratio test instead of a fixed number of rounds.
+            Games are scheduled until the test decides that your agent's win rate is at
+            most P0 or at least P1; the --rounds value is used as the maximum number of
+            rounds to play before giving up without a decision.
         """
     )
+    parser.add_argument(
+        '--alpha', type=float, default=0.05,
+        help="SPRT false positive rate (probability of accepting P1 when P0 is true)."
+    )
+    parser.add_argument(
+        '--beta', type=float, default=0.05,
+        help="SPRT false negative rate (probability of accepting P0 when P1 is true)."
+    )
+    parser.add_argument(
+        '--record', type=str, metavar='FILE',
+        help="""\
+            Append a binary record of every game (initial state, moves, think time per move
+            and result) to FILE as each game finishes. Summarize the file by running
+            `python game_records.py FILE` (see game_records.py).
+        """
+    )
+    parser.add_argument(
+        '--node_limit', type=int, metavar='NODES',
+        help="""\
+            Limit each move to a budget of NODES nodes counted by the agent with
+            self.queue.count() instead of the time limit. Agents run in the match process,
+            and every game is deterministic given --seed, so results do not depend on the
+            machine load. Agents that do not count nodes search until get_action() returns.
+        """
+    )
+    parser.add_argument(
+        '--seed', type=int, default=0,
+        help="Seed for the random module of agents in matches with a --node_limit."
+    )
     parser.add_argument(
         '-t', '--time_limit', type=int, default=TIME_LIMIT,
         help="Set the maximum allowed time (in milliseconds) for each call to agent.get_action()."
@@ -187,9 +414,14 @@ if __name__ == "__main__":
         "Search Configuration:\n" +
         "Opponent: {}\n".format(args.opponent) +
         "Rounds: {}\n".format(args.rounds) +
+        "SPRT: {}\n".format(args.sprt) +
         "Fair Matches: {}\n".format(args.fair_matches) +
         "Time Limit: {}\n".format(args.time_limit) +
+        "Node Limit: {}\n".format(args.node_limit) +
+        "Seed: {}\n".format(args.seed) +
         "Processes: {}\n".format(args.processes) +
+        "CPU Pinning: {}\n".format(not args.no_pin) +
+        "Game Records: {}\n".format(args.record) +
         "Debug Mode: {}".format(args.debug)
     )
 
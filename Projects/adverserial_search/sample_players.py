@@ -5,8 +5,30 @@ import logging
 import pickle
 import random
 
+from functools import lru_cache
+
+from endgame import ENDGAME_MAX_CELLS, solve_endgame
+from evaluation import child_mobility, mobility
+from isolation.bitboard import terminal_utility
+
 logger = logging.getLogger(__name__)
 
+DATA_FILE = "data.pickle"
+
+
+@lru_cache()
+def _load_data(filename):
+    """ Load the pickled agent data once per process; every player created by
+    the same process shares the same object, so agents must not modify it
+    """
+    try:
+        with open(filename, "rb") as f:
+            return pickle.load(f)
+    except (IOError, TypeError) as e:
+        logger.info(str(e))
+        return None
+
+
 
 class BasePlayer:
     def __init__(self, player_id):
@@ -25,14 +47,14 @@ class BasePlayer:
 
 
 class DataPlayer(BasePlayer):
+    """ Player that loads initialization data from `data.pickle` if it exists.
+
+    The file is read once per process rather than once per player, so
+    creating a new player for every game does not repeat the load.
+    """
     def __init__(self, player_id):
         super().__init__(player_id)
-        try:
-            with open("data.pickle", "rb") as f:
-                self.data = pickle.load(f)
-        except (IOError, TypeError) as e:
-            logger.info(str(e))
-            self.data = None
+        self.data = _load_data(DATA_FILE)
 
 
 class RandomPlayer(BasePlayer):
@@ -53,9 +75,7 @@ class GreedyPlayer(BasePlayer):
     equivalent to a minimax search agent with a search depth of one.
     """
     def score(self, state):
-        own_loc = state.locs[self.player_id]
-        own_liberties = state.liberties(own_loc)
-        return len(own_liberties)
+        return mobility(state.board, state.locs[self.player_id])
 
     def get_action(self, state):
         """Select the move from the available legal moves with the highest
@@ -67,7 +87,9 @@ class GreedyPlayer(BasePlayer):
             An instance of `isolation.Isolation` encoding the current state of the
             game (e.g., player locations and blocked cells)
         """
-        self.queue.put(max(state.actions(), key=lambda x: self.score(state.result(x))))
+        children = child_mobility(state, self.player_id)
+        self.queue.put(max(children, key=lambda child: child[1])[0])
+        self.queue.report(nodes=len(children), depth=1)
 
 
 class MinimaxPlayer(BasePlayer):
@@ -105,12 +127,19 @@ class MinimaxPlayer(BasePlayer):
         if state.ply_count < 2:
             self.queue.put(random.choice(state.actions()))
         else:
+            self.nodes = 0
             self.queue.put(self.minimax(state, depth=3))
+            self.queue.report(nodes=self.nodes, depth=3)
 
     def minimax(self, state, depth):
+        """ Return the best action from a minimax search to a fixed depth; the
+        number of nodes visited is added to `self.nodes`
+        """
 
         def min_value(state, depth):
-            if state.terminal_test(): return state.utility(self.player_id)
+            self.nodes += 1
+            terminal, utility = terminal_utility(state, self.player_id)
+            if terminal: return utility
             if depth <= 0: return self.score(state)
             value = float("inf")
             for action in state.actions():
@@ -118,7 +147,9 @@ class MinimaxPlayer(BasePlayer):
             return value
 
         def max_value(state, depth):
-            if state.terminal_test(): return state.utility(self.player_id)
+            self.nodes += 1
+            terminal, utility = terminal_utility(state, self.player_id)
+            if terminal: return utility
             if depth <= 0: return self.score(state)
             value = float("-inf")
             for action in state.actions():
@@ -130,6 +161,17 @@ class MinimaxPlayer(BasePlayer):
     def score(self, state):
         own_loc = state.locs[self.player_id]
         opp_loc = state.locs[1 - self.player_id]
-        own_liberties = state.liberties(own_loc)
-        opp_liberties = state.liberties(opp_loc)
-        return len(own_liberties) - len(opp_liberties)
+        return mobility(state.board, own_loc) - mobility(state.board, opp_loc)
+
+
+class EndgameMinimaxPlayer(MinimaxPlayer):
+    """ MinimaxPlayer that plays the exact solution (see endgame.solve_endgame)
+    once the players are separated into regions of at most ENDGAME_MAX_CELLS
+    open cells
+    """
+    def get_action(self, state):
+        endgame = None if state.ply_count < 2 else solve_endgame(state, max_cells=ENDGAME_MAX_CELLS)
+        if endgame is not None and endgame.action is not None:
+            self.queue.put(endgame.action)
+        else:
+            super().get_action(state)
@@ -0,0 +1,108 @@
+import math
+
+from statistics import NormalDist
+
+
+class SPRT:
+    """ Wald's sequential probability ratio test on the win rate of an agent
+
+    The test compares the null hypothesis that the agent wins with probability
+    p0 against the alternative hypothesis that it wins with probability p1
+    (p0 < p1). Results are added one game at a time, and the test reaches a
+    decision as soon as the log-likelihood ratio of the observed games crosses
+    either bound, which usually takes far fewer games than a fixed-length run
+    when the difference between the agents is large.
+
+    Attributes
+    ----------
+    llr : float
+        The log-likelihood ratio of the games observed so far
+
+    lower : float
+        Accept the null hypothesis (win rate <= p0) when llr <= lower
+
+    upper : float
+        Accept the alternative hypothesis (win rate >= p1) when llr >= upper
+
+    wins : int
+        The number of games won by the agent
+
+    games : int
+        The number of games observed
+    """
+    def __init__(self, p0=0.45, p1=0.55, alpha=0.05, beta=0.05):
+        """
+        Parameters
+        ----------
+        p0 : float
+            Win rate under the null hypothesis
+
+        p1 : float
+            Win rate under the alternative hypothesis
+
+        alpha : float
+            Probability of accepting H1 when H0 is true (false positive rate)
+
+        beta : float
+            Probability of accepting H0 when H1 is true (false negative rate)
+        """
+        if not 0 < p0 < p1 < 1:
+            raise ValueError("SPRT requires 0 < p0 < p1 < 1")
+        if not (0 < alpha < 1 and 0 < beta < 1):
+            raise ValueError("SPRT error rates must be in the open interval (0, 1)")
+        self.p0, self.p1 = p0, p1
+        self.alpha, self.beta = alpha, beta
+        self.lower = math.log(beta / (1 - alpha))
+        self.upper = math.log((1 - beta) / alpha)
+        self._win_llr = math.log(p1 / p0)
+        self._loss_llr = math.log((1 - p1) / (1 - p0))
+        self.llr = 0.
+        self.wins = 0
+        self.games = 0
+
+    def update(self, won):
+        """ Add the outcome of one game and return the current decision """
+        self.games += 1
+        if won:
+            self.wins += 1
+            self.llr += self._win_llr
+        else:
+            self.llr += self._loss_llr
+        return self.decision
+
+    @property
+    def decision(self):
+        """ Return "H1" if the win rate is at least p1, "H0" if it is at most p0,
+        or None if the test needs more games to reach a decision
+        """
+        if self.llr >= self.upper: return "H1"
+        if self.llr <= self.lower: return "H0"
+        return None
+
+    def __str__(self):
+        return "SPRT(p0={}, p1={}, alpha={}, beta={}): LLR={:.3f} [{:.3f}, {:.3f}]".format(
+            self.p0, self.p1, self.alpha, self.beta, self.llr, self.lower, self.upper)
+
+
+def wilson_interval(wins, games, confidence=0.95):
+    """ Return the Wilson score confidence interval (low, high) for a win rate
+
+    Parameters
+    ----------
+    wins : int
+        The number of games won
+
+    games : int
+        The total number of games played
+
+    confidence : float
+        The two-sided confidence level of the interval
+    """
+    if games == 0:
+        return 0., 1.
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    p = wins / games
+    denom = 1 + z * z / games
+    center = (p + z * z / (2 * games)) / denom
+    margin = z * math.sqrt(p * (1 - p) / games + z * z / (4 * games * games)) / denom
+    return max(0., center - margin), min(1., center + margin)
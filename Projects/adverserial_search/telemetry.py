@@ -0,0 +1,112 @@
+""" Aggregate the search telemetry that agents report during matches
+
+Agents report statistics for each move with `self.queue.report(nodes=...,
+depth=..., tt_hits=...)`, and the queue records when the final action of the
+turn was committed. `summarize_game()` turns the per-move isolation.Telemetry
+in a GameResult into per-agent totals, and `TelemetrySummary` accumulates the
+totals over a tournament:
+
+    nps         nodes searched per second of think time
+    depth       average search depth reached per move
+    tt hits     average transposition table hits per move
+    margin      milliseconds between the final commit and the time limit
+                (average and minimum over every move)
+"""
+
+
+class AgentTelemetry:
+    """ Running totals of the telemetry reported by one agent """
+    def __init__(self):
+        self.games = 0
+        self.moves = 0
+        self.nodes = self.node_time = 0   # node_time counts think time (ms) of moves reporting nodes
+        self.depth = self.depth_moves = 0
+        self.tt_hits = self.tt_moves = 0
+        self.margin = self.margin_moves = 0
+        self.min_margin = None
+
+    def add_move(self, telemetry, think_time, time_limit):
+        self.moves += 1
+        if telemetry.nodes is not None:
+            self.nodes += telemetry.nodes
+            self.node_time += think_time
+        if telemetry.depth is not None:
+            self.depth += telemetry.depth
+            self.depth_moves += 1
+        if telemetry.tt_hits is not None:
+            self.tt_hits += telemetry.tt_hits
+            self.tt_moves += 1
+        if telemetry.commit_time is not None:
+            margin = time_limit - telemetry.commit_time
+            self.margin += margin
+            self.margin_moves += 1
+            self.min_margin = margin if self.min_margin is None else min(self.min_margin, margin)
+
+    def update(self, other):
+        """ Add the totals from another AgentTelemetry """
+        for name in ("games", "moves", "nodes", "node_time", "depth", "depth_moves",
+                     "tt_hits", "tt_moves", "margin", "margin_moves"):
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+        if other.min_margin is not None:
+            self.min_margin = other.min_margin if self.min_margin is None else min(self.min_margin, other.min_margin)
+
+    @property
+    def nps(self): return 1000 * self.nodes / self.node_time if self.node_time else None
+
+    @property
+    def avg_depth(self): return self.depth / self.depth_moves if self.depth_moves else None
+
+    @property
+    def avg_tt_hits(self): return self.tt_hits / self.tt_moves if self.tt_moves else None
+
+    @property
+    def avg_margin(self): return self.margin / self.margin_moves if self.margin_moves else None
+
+
+def summarize_game(result, time_limit):
+    """ Return a dict mapping each agent name to the AgentTelemetry for one game
+
+    Parameters
+    ----------
+    result : isolation.GameResult
+
+    time_limit : numeric
+        The move time limit of the game in milliseconds
+    """
+    stats = {agent.name: AgentTelemetry() for agent in result.agents}
+    for agent_stats in stats.values():
+        agent_stats.games = 1
+    player_id = result.initial_state.player()
+    for telemetry, think_time in zip(result.telemetry, result.think_times):
+        stats[result.agents[player_id].name].add_move(telemetry, think_time, time_limit)
+        player_id = 1 - player_id
+    return stats
+
+
+class TelemetrySummary:
+    """ Accumulate per-agent telemetry over every game in a tournament """
+    def __init__(self, time_limit):
+        self.time_limit = time_limit
+        self.agents = {}
+
+    def add(self, result):
+        """ Add a game to the summary and return its per-agent telemetry """
+        game = summarize_game(result, self.time_limit)
+        for name, stats in game.items():
+            self.agents.setdefault(name, AgentTelemetry()).update(stats)
+        return game
+
+    def __str__(self):
+        return format_table(self.agents)
+
+
+def format_table(stats):
+    """ Format a dict of agent name -> AgentTelemetry as a text table """
+    fmt = "{:<24}{:>8}{:>12}{:>8}{:>10}{:>12}{:>12}"
+    lines = [fmt.format("Agent", "Moves", "NPS", "Depth", "TT hits", "Avg margin", "Min margin")]
+    for name, s in sorted(stats.items()):
+        values = [s.nps, s.avg_depth, s.avg_tt_hits, s.avg_margin, s.min_margin]
+        specs = ["{:,.0f}", "{:.2f}", "{:.1f}", "{:.1f}ms", "{:.1f}ms"]
+        lines.append(fmt.format(name, s.moves, *["-" if v is None else spec.format(v)
+                                                 for v, spec in zip(values, specs)]))
+    return "\n".join(lines)
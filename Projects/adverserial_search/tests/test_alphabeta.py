@@ -0,0 +1,37 @@
+import math
+import unittest
+
+from random import Random
+
+from Projects.adverserial_search.alphabeta import AlphaBetaSearch
+from Projects.adverserial_search.isolation import Isolation
+
+
+class _MinimaxSearch(AlphaBetaSearch):
+    """ Reference search without pruning """
+    def max_value(self, state, depth, alpha, beta):
+        return self._minimax(state, depth, max)
+
+    def min_value(self, state, depth, alpha, beta):
+        return self._minimax(state, depth, min)
+
+    def _minimax(self, state, depth, choose):
+        self.visit()
+        if state.terminal_test(): return state.utility(self.player_id)
+        if depth <= 0: return self.score(state)
+        child_value = self.min_value if choose is max else self.max_value
+        return choose(child_value(state.result(a), depth - 1, None, None) for a in state.actions())
+
+
+class AlphaBetaSearchTest(unittest.TestCase):
+    def test_matches_minimax(self):
+        """ Alpha-beta finds the minimax value of the root while visiting fewer nodes """
+        rng = Random(0)
+        state = Isolation()
+        for _ in range(6):
+            state = state.result(rng.choice(state.actions()))
+        search, minimax = AlphaBetaSearch(state.player()), _MinimaxSearch(state.player())
+        values = [minimax.min_value(state.result(a), 2, None, None) for a in state.actions()]
+        action = search.search_root(state, state.actions(), 3)
+        self.assertEqual(search.min_value(state.result(action), 2, -math.inf, math.inf), max(values))
+        self.assertLess(search.nodes, minimax.nodes)
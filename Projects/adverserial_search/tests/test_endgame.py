@@ -0,0 +1,68 @@
+
+import unittest
+
+from random import Random
+
+from Projects.adverserial_search.isolation import Isolation, fork_get_action
+from Projects.adverserial_search.endgame import ENDGAME_MAX_CELLS, partition, popcount, reachable, solve_endgame
+from Projects.adverserial_search.sample_players import EndgameMinimaxPlayer
+
+
+def _minimax_wins(state):
+    """ Return True if the active player wins the game with perfect play """
+    if state.terminal_test(): return state.utility(state.player()) > 0
+    return any(not _minimax_wins(state.result(a)) for a in state.actions())
+
+
+def _longest_path(state, player_id):
+    best = 0
+    for cell in state.liberties(state.locs[player_id]):
+        locs = tuple(cell if i == player_id else loc for i, loc in enumerate(state.locs))
+        child = Isolation(state.board ^ (1 << cell), state.ply_count, locs)
+        best = max(best, 1 + _longest_path(child, player_id))
+    return best
+
+
+class EndgameTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        # collect the first partitioned state with small regions from random games
+        rng = Random(1)
+        cls.states = []
+        while len(cls.states) < 6:
+            state = Isolation()
+            while not state.terminal_test():
+                state = state.result(rng.choice(state.actions()))
+                regions = partition(state)
+                if regions is not None and not state.terminal_test():
+                    if max(map(popcount, regions)) <= 8:
+                        cls.states.append(state)
+                    break
+
+    def test_reachable_open_board(self):
+        """ A knight can reach every other open cell on an empty board """
+        state = Isolation().result(57)
+        self.assertEqual(reachable(state.board, 57), state.board)
+
+    def test_no_partition_early(self):
+        self.assertIsNone(partition(Isolation().result(57).result(0)))
+
+    def test_solver_matches_minimax(self):
+        """ The endgame solver agrees with an exhaustive minimax search """
+        for state in self.states:
+            result = solve_endgame(state)
+            self.assertEqual(result.wins, _minimax_wins(state), state)
+            self.assertEqual(result.own_length, _longest_path(state, state.player()))
+            self.assertEqual(result.opponent_length, _longest_path(state, 1 - state.player()))
+            self.assertIn(result.action, state.actions())
+
+    def test_max_cells(self):
+        """ solve_endgame() skips regions larger than max_cells """
+        for state in self.states:
+            self.assertIsNone(solve_endgame(state, max_cells=0))
+
+    def test_endgame_player(self):
+        """ EndgameMinimaxPlayer plays the solver's move in partitioned states """
+        for state in self.states[:3]:
+            action = fork_get_action(state, EndgameMinimaxPlayer(state.player()), 150)
+            self.assertEqual(action, solve_endgame(state, ENDGAME_MAX_CELLS).action)
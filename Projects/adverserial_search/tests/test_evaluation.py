@@ -0,0 +1,65 @@
+
+import unittest
+
+from random import Random
+
+from Projects.adverserial_search.isolation import Isolation
+from Projects.adverserial_search.endgame import partition, popcount
+from Projects.adverserial_search.evaluation import (
+    batch_features, child_features, child_mobility, features, second_order_mobility
+)
+
+
+def _random_states(count, seed=0):
+    rng = Random(seed)
+    states = []
+    while len(states) < count:
+        state = Isolation()
+        for _ in range(rng.randint(0, 40)):
+            if state.terminal_test(): break
+            state = state.result(rng.choice(state.actions()))
+        states.append(state)
+    return states
+
+
+class EvaluationTest(unittest.TestCase):
+    def setUp(self):
+        self.states = _random_states(50)
+
+    def test_mobility_matches_liberties(self):
+        for state in self.states:
+            for player_id in (0, 1):
+                f = features(state.board, state.locs, player_id)
+                self.assertEqual(f.own_moves, len(state.liberties(state.locs[player_id])))
+                self.assertEqual(f.opp_moves, len(state.liberties(state.locs[1 - player_id])))
+
+    def test_second_order_mobility(self):
+        """ Second order mobility counts the open cells within two moves """
+        for state in self.states:
+            loc = state.locs[0]
+            if loc is None: continue
+            cells = set(state.liberties(loc))
+            for cell in list(cells):
+                cells.update(state.liberties(cell))
+            cells.discard(loc)
+            self.assertEqual(second_order_mobility(state.board, loc), len(cells))
+
+    def test_regions(self):
+        for state in self.states:
+            f = features(state.board, state.locs, 1, regions=True)
+            regions = partition(state)
+            if regions is None:
+                self.assertIsNone(f.own_region)
+            else:
+                self.assertEqual((f.own_region, f.opp_region), (popcount(regions[1]), popcount(regions[0])))
+
+    def test_child_features(self):
+        """ Batched child evaluation matches evaluating each child state """
+        for state in self.states:
+            if state.terminal_test(): continue
+            for player_id in (0, 1):
+                children = [state.result(a) for a in state.actions()]
+                expected = batch_features(children, player_id)
+                self.assertEqual(child_features(state, player_id), list(zip(state.actions(), expected)))
+                self.assertEqual(child_mobility(state, player_id),
+                                 [(a, f.own_moves, f.opp_moves) for a, f in zip(state.actions(), expected)])
@@ -0,0 +1,85 @@
+
+import os
+import tempfile
+import unittest
+
+from Projects.adverserial_search.isolation import Agent, Isolation, play_game
+from Projects.adverserial_search.sample_players import RandomPlayer, GreedyPlayer
+from Projects.adverserial_search.game_records import (
+    GameRecordIndex, GameRecordWriter, read_records
+)
+
+
+class GameRecordTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        agents = (Agent(RandomPlayer, "Random"), Agent(GreedyPlayer, "Greedy"))
+        fair_state = Isolation().result(57).result(0)
+        cls.results = [play_game((agents, Isolation(), 150, 0)),
+                       play_game((agents[::-1], Isolation(), 150, 1)),
+                       play_game((agents, fair_state, 150, -1))]
+
+    def setUp(self):
+        fd, self.filename = tempfile.mkstemp(suffix=".games")
+        os.close(fd)
+        os.remove(self.filename)
+
+    def tearDown(self):
+        os.remove(self.filename)
+
+    def test_round_trip(self):
+        """ Records read back the same games that were written """
+        with GameRecordWriter(self.filename) as records:
+            for result in self.results:
+                records.write(result)
+        loaded = [record for _, record in read_records(self.filename)]
+        self.assertEqual(len(loaded), len(self.results))
+        for record, result in zip(loaded, self.results):
+            self.assertEqual(record.match_id, result.match_id)
+            self.assertEqual(record.initial_state, result.initial_state)
+            self.assertEqual(record.history, result.history)
+            self.assertEqual(record.status.name, result.status.name)
+            self.assertEqual(record.winner, result.winner.name)
+            self.assertEqual(record.agents, tuple(a.name for a in result.agents))
+            for loaded_time, think_time in zip(record.think_times, result.think_times):
+                self.assertAlmostEqual(loaded_time, think_time, places=3)
+
+    def test_large_depths(self):
+        """ Search depths above 255 are recorded, and depths too large to store are capped """
+        result = self.results[0]
+        depths = [300 + ply for ply in range(len(result.history))]
+        depths[-1] = 10**6
+        with GameRecordWriter(self.filename) as records:
+            records.write(result._replace(depths=depths))
+        (_, record), = read_records(self.filename)
+        self.assertEqual(record.depths, depths[:-1] + [2**16 - 1])
+
+    def test_append_after_truncated_record(self):
+        """ A partially written record is ignored and replaced by later writes """
+        with GameRecordWriter(self.filename) as records:
+            records.write(self.results[0])
+            records.write(self.results[1])
+        with open(self.filename, "r+b") as f:
+            f.truncate(os.path.getsize(self.filename) - 3)
+        self.assertEqual(len(list(read_records(self.filename))), 1)
+        with GameRecordWriter(self.filename) as records:
+            records.write(self.results[2])
+        match_ids = [record.match_id for _, record in read_records(self.filename)]
+        self.assertEqual(match_ids, [self.results[0].match_id, self.results[2].match_id])
+
+    def test_index(self):
+        """ Records are indexed by agent, winner and opening """
+        with GameRecordWriter(self.filename) as records:
+            records.write(self.results[0])
+            index = GameRecordIndex(self.filename)
+            for result in self.results[1:]:
+                records.write(result)
+        self.assertEqual(len(index), 1)
+        self.assertEqual(index.refresh(), 2)
+        self.assertEqual(len(index.games(agent="Random")), 3)
+        winners = [r.winner.name for r in self.results]
+        self.assertEqual(len(index.games(winner="Greedy")), winners.count("Greedy"))
+        games = index.games(opening=(57, 0))
+        self.assertEqual([g.match_id for g in games], [-1])
+        wins, count = index.opening_stats("Random")[(57, 0)]
+        self.assertEqual(count, 1)
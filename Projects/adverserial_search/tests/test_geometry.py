@@ -0,0 +1,69 @@
+
+import pickle
+import unittest
+
+from random import Random
+
+from Projects.adverserial_search.isolation import Isolation, make_isolation
+from Projects.adverserial_search.isolation.isolation import Action
+
+
+def _knight_targets(width, height, x, y):
+    steps = [(1, 2), (2, 1), (2, -1), (1, -2), (-1, -2), (-2, -1), (-2, 1), (-1, 2)]
+    return {(x + dx, y + dy) for dx, dy in steps if 0 <= x + dx < width and 0 <= y + dy < height}
+
+
+class GeometryTest(unittest.TestCase):
+    def test_default_geometry_matches_isolation(self):
+        """ Random games on the default geometry match the standard game """
+        Board = make_isolation()
+        rng = Random(0)
+        for _ in range(20):
+            state, other = Isolation(), Board()
+            self.assertEqual(tuple(state), tuple(other))
+            while not state.terminal_test():
+                self.assertFalse(other.terminal_test())
+                self.assertEqual(state.actions(), other.actions())
+                self.assertEqual(state.liberties(state.locs[1]), other.liberties(other.locs[1]))
+                action = rng.choice(state.actions())
+                state, other = state.result(action), other.result(action)
+                self.assertEqual(tuple(state), tuple(other))
+            self.assertTrue(other.terminal_test())
+            self.assertEqual(state.utility(0), other.utility(0))
+            self.assertEqual(state.utility(1), other.utility(1))
+        self.assertIsInstance(Board().result(57).result(0).actions()[0], Action)
+
+    def test_knight_moves(self):
+        """ Liberties are the knight moves that stay on the board """
+        Board = make_isolation(7, 5)
+        stride = Board.width + 2
+        state = Board()
+        for y in range(Board.height):
+            for x in range(Board.width):
+                cells = {(c % stride, c // stride) for c in state.liberties(x + y * stride)}
+                self.assertEqual(cells, _knight_targets(7, 5, x, y))
+
+    def test_blocked_cells(self):
+        Board = make_isolation(5, 5, blocked=[0, 8, 8])
+        self.assertEqual(Board.blocked, (0, 8))
+        self.assertEqual(len(Board().actions()), 23)
+        self.assertNotIn(8, Board().liberties(15))
+        with self.assertRaises(RuntimeError):
+            Board().result(8)
+
+    def test_cache_and_pickle(self):
+        Board = make_isolation(13, 13, blocked=[16])
+        self.assertIs(Board, make_isolation(13, 13, blocked=(16,)))
+        state = Board().result(30).result(60)
+        copy = pickle.loads(pickle.dumps(state))
+        self.assertIs(type(copy), Board)
+        self.assertEqual(copy, state)
+        self.assertEqual(hash(copy), hash(state))
+
+    def test_large_board_game(self):
+        """ A random game on a large board ends with a winner """
+        state = make_isolation(21, 21)()
+        rng = Random(1)
+        while not state.terminal_test():
+            state = state.result(rng.choice(state.actions()))
+        self.assertEqual({state.utility(0), state.utility(1)}, {float("inf"), float("-inf")})
@@ -0,0 +1,94 @@
+import time
+import unittest
+
+from multiprocessing import Pipe
+from random import Random
+
+from Projects.adverserial_search.isolation import (
+    Agent, Isolation, Status, StopSearch, TimedQueue, make_isolation, play_game
+)
+from Projects.adverserial_search.isolation.bitboard import terminal_utility
+from Projects.adverserial_search.isolation.isolation import Action
+from Projects.adverserial_search.sample_players import BasePlayer, RandomPlayer
+
+
+def _has_moves(state, player_id):
+    loc = state.locs[player_id]
+    cells = range(200) if loc is None else (loc + a for a in Action)
+    return any(c >= 0 and state.board & (1 << c) for c in cells)
+
+
+class TerminalUtilityTest(unittest.TestCase):
+    def test_matches_state(self):
+        """ terminal_utility agrees with terminal_test and utility of each state class """
+        rng = Random(0)
+        for state_class in (Isolation, make_isolation()):
+            for _ in range(20):
+                state = state_class()
+                while True:
+                    for player_id in (0, 1):
+                        expected = (state.terminal_test(), state.utility(player_id))
+                        self.assertEqual(terminal_utility(state, player_id), expected)
+                    if state.terminal_test(): break
+                    state = state.result(rng.choice(state.actions()))
+
+    def test_geometry_matches_liberties(self):
+        """ The default geometry is terminal when a player has no open knight moves """
+        rng = Random(0)
+        for _ in range(20):
+            state = make_isolation()()
+            while not state.terminal_test():
+                self.assertTrue(_has_moves(state, 0) and _has_moves(state, 1))
+                state = state.result(rng.choice(state.actions()))
+            self.assertFalse(_has_moves(state, 0) and _has_moves(state, 1))
+
+    def test_move_to_cell_zero(self):
+        """ Isolation never counts a move to cell 0 as a liberty, but geometry states do """
+        state = Isolation(board=(1 << 0) | (1 << 30), ply_count=2, locs=(27, 5))
+        self.assertEqual(state.actions(), [Action.SSE])
+        self.assertTrue(state.terminal_test())
+        self.assertEqual(terminal_utility(state, 0), (True, float("-inf")))
+        self.assertEqual(terminal_utility(state, 1), (True, float("inf")))
+        state = make_isolation()(*state)  # geometry states count cell 0 as a liberty
+        self.assertFalse(state.terminal_test())
+        self.assertEqual(terminal_utility(state, 0), (False, 0))
+
+
+class OffBoardPlayer(BasePlayer):
+    def get_action(self, state):
+        self.queue.put(5)  # not one of the knight offsets
+
+
+class NonePlayer(BasePlayer):
+    def get_action(self, state):
+        self.queue.put(None)
+
+
+class InvalidMoveTest(unittest.TestCase):
+    def test_invalid_moves(self):
+        """ An agent that puts an illegal action or a non-integer loses with INVALID_MOVE """
+        state = Isolation().result(57).result(33)
+        for agent_class in (OffBoardPlayer, NonePlayer):
+            for debug in (False, True):
+                agents = (Agent(agent_class, "Invalid"), Agent(RandomPlayer, "Random"))
+                result = play_game((agents, state, 150, 0, debug))
+                self.assertEqual(result.status, Status.INVALID_MOVE, (agent_class, debug))
+                self.assertEqual(result.winner_id, 1)
+
+
+class TimedQueueTest(unittest.TestCase):
+    def test_deadline(self):
+        """ The turn deadline is shared from start_timer(), and put() stops after it """
+        queue = TimedQueue(*Pipe(), time_limit=50)
+        self.assertIsNone(queue.stop_time())
+        start = time.perf_counter()
+        queue.start_timer()
+        self.assertAlmostEqual(queue.stop_time(), start + 0.05, places=2)
+        queue.put(1)
+        time.sleep(0.06)
+        self.assertFalse(queue.stop_requested())
+        with self.assertRaises(StopSearch):
+            queue.put(2)
+        with self.assertRaises(StopSearch):
+            queue.publish(2)
+        self.assertEqual(queue.published(), 1)
@@ -0,0 +1,48 @@
+
+import unittest
+
+from random import Random
+
+from Projects.adverserial_search.isolation import Isolation, fork_get_action
+from Projects.adverserial_search.mcts import MCTSPlayer, ROLLOUT_POLICIES
+
+
+class RolloutTest(unittest.TestCase):
+    def test_rollouts_match_isolation(self):
+        """ Bitboard rollouts agree with replaying the same game with Isolation """
+        initial = Isolation().result(57).result(0)
+        for name, rollout in ROLLOUT_POLICIES.items():
+            for seed in range(5):
+                moves = []
+                winner = rollout(initial.board, initial.locs, initial.player(), Random(seed), moves)
+                self.assertEqual(winner, rollout(initial.board, initial.locs, initial.player(), Random(seed)))
+                state = initial
+                for cell in moves:
+                    if state.terminal_test(): break  # rollouts let the winner move once more
+                    action = cell - state.locs[state.player()]
+                    self.assertIn(action, state.actions(), name)
+                    state = state.result(action)
+                self.assertTrue(state.terminal_test(), name)
+                self.assertEqual(state.utility(winner), float("inf"), name)
+
+
+class MCTSPlayerTest(unittest.TestCase):
+    def test_get_action(self):
+        """ MCTSPlayer returns a legal move and saves its tree in the context """
+        state = Isolation().result(57).result(0)
+        player = MCTSPlayer(state.player())
+        action = fork_get_action(state, player, 150)
+        self.assertIn(action, state.actions())
+        self.assertGreater(player.context.visits, 0)
+
+    def test_tree_reuse(self):
+        """ The subtree for the opponent's reply is reused on the next turn """
+        state = Isolation().result(57).result(0)
+        player = MCTSPlayer(state.player())
+        fork_get_action(state, player, 150)
+        child = next(c for c in player.context.children if c.children)
+        reply = child.children[0]
+        next_state = Isolation(reply.board, reply.ply, reply.locs)
+        root = player._reuse_tree(next_state)
+        self.assertIs(root, reply)
+        self.assertIsNone(root.parent)
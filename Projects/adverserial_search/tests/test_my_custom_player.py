@@ -1,4 +1,6 @@
 
+import os
+import tempfile
 import unittest
 
 from collections import deque
@@ -7,7 +9,7 @@ from textwrap import dedent
 
 from Projects.adverserial_search.isolation import Isolation, Agent, fork_get_action, play, DebugState
 from Projects.adverserial_search.sample_players import RandomPlayer
-from Projects.adverserial_search.my_custom_player import CustomPlayer
+from Projects.adverserial_search.my_custom_player import CustomPlayer, _load_book
 
 
 class BaseCustomPlayerTest(unittest.TestCase):
@@ -48,6 +50,18 @@ class CustomPlayerGetActionTest(BaseCustomPlayerTest):
         self._test_state(self.terminal_state)
 
 
+class CustomPlayerBookTest(unittest.TestCase):
+    def test_missing_book(self):
+        """ The agent plays without a book when the book file is missing or invalid """
+        self.assertIsNone(_load_book("no_such_file.book"))
+        fd, filename = tempfile.mkstemp(suffix=".book")
+        os.close(fd)
+        try:
+            self.assertIsNone(_load_book(filename))
+        finally:
+            os.remove(filename)
+
+
 class CustomPlayerPlayTest(BaseCustomPlayerTest):
     def test_custom_player(self):
         """ CustomPlayer successfully completes a game against itself """
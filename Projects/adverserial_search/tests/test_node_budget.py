@@ -0,0 +1,66 @@
+import random
+import unittest
+
+from Projects.adverserial_search.isolation import Agent, Isolation, NodeBudgetQueue, play_game
+from Projects.adverserial_search.isolation import StopSearch
+from Projects.adverserial_search.mcts import MCTSPlayer
+from Projects.adverserial_search.sample_players import RandomPlayer
+from Projects.adverserial_search.tuning import TunedPlayer
+
+
+class MoveCountingPlayer(RandomPlayer):
+    moves = []  # the number of moves made by the agent object before each move
+
+    def get_action(self, state):
+        self.count = getattr(self, "count", 0) + 1
+        self.moves.append(self.count)
+        super().get_action(state)
+
+
+class NodeBudgetQueueTest(unittest.TestCase):
+    def test_budget(self):
+        """ count() raises StopSearch only after the budget is exceeded """
+        queue = NodeBudgetQueue(10)
+        queue.count(9)
+        self.assertFalse(queue.stop_requested())
+        queue.count()
+        self.assertTrue(queue.stop_requested())
+        queue.put(3)
+        with self.assertRaises(StopSearch):
+            queue.count()
+        with self.assertRaises(StopSearch):
+            queue.put(4)
+        self.assertEqual(queue.published(), 3)
+        self.assertEqual(queue.telemetry().nodes, 11)
+
+
+class NodeBudgetMatchTest(unittest.TestCase):
+    def _play(self, agents, seed, match_id=0):
+        state = Isolation().result(57).result(33)
+        return play_game((agents, state, 150, match_id, False, 100, seed))
+
+    def test_replayable(self):
+        """ Games with the same seed are identical regardless of the global random state """
+        agents = (Agent(MCTSPlayer, "MCTS"), Agent(RandomPlayer, "Random"))
+        first = self._play(agents, seed=7)
+        random.random()
+        second = self._play(agents, seed=7)
+        self.assertEqual(first.history, second.history)
+        self.assertEqual(first.winner_id, second.winner_id)
+        self.assertEqual(first.status.name, "GAME_OVER")
+
+    def test_agents_are_not_copied(self):
+        """ Each agent object plays every one of its moves in a game """
+        MoveCountingPlayer.moves = []
+        agents = (Agent(MoveCountingPlayer, "Counting"), Agent(RandomPlayer, "Random"))
+        result = self._play(agents, seed=3)
+        self.assertEqual(MoveCountingPlayer.moves, list(range(1, len(MoveCountingPlayer.moves) + 1)))
+        self.assertEqual(len(MoveCountingPlayer.moves), (len(result.history) + 1) // 2)
+
+    def test_node_telemetry(self):
+        """ Agents that count nodes never exceed the budget """
+        agents = (Agent(MCTSPlayer, "MCTS"), Agent(TunedPlayer, "Tuned"))
+        result = self._play(agents, seed=1)
+        self.assertEqual(result.status.name, "GAME_OVER")
+        self.assertTrue(all(t.nodes is None or t.nodes <= 101 for t in result.telemetry))
+        self.assertTrue(any(t.nodes == 100 for t in result.telemetry))
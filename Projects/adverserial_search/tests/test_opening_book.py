@@ -0,0 +1,48 @@
+
+import os
+import pickle
+import tempfile
+import unittest
+
+from random import Random
+
+from Projects.adverserial_search.isolation import Isolation
+from Projects.adverserial_search.opening_book import (
+    OpeningBook, best_action, build_book, opening_states, state_key, write_book
+)
+
+
+class OpeningBookTest(unittest.TestCase):
+    def setUp(self):
+        rng = Random(0)
+        self.states = rng.sample(opening_states(3), 20)
+        self.book = {state_key(s): int(best_action(s, 1)) for s in self.states}
+        fd, self.filename = tempfile.mkstemp(suffix=".book")
+        os.close(fd)
+        write_book(self.book, self.filename)
+
+    def tearDown(self):
+        os.remove(self.filename)
+
+    def test_lookup(self):
+        """ Every state in the book returns its action; other states return None """
+        book = OpeningBook(self.filename)
+        self.assertEqual(len(book), len(self.book))
+        for state in self.states:
+            self.assertIn(state, book)
+            action = book.get(state)
+            self.assertIn(action, state.actions())
+            self.assertEqual(int(action), self.book[state_key(state)])
+        missing = Isolation().result(0).result(1)
+        self.assertNotIn(missing, book)
+        self.assertIsNone(book.get(missing))
+
+    def test_pickle(self):
+        """ Opening books can be pickled by reopening the same file """
+        book = pickle.loads(pickle.dumps(OpeningBook(self.filename)))
+        self.assertEqual(book.get(self.states[0]), self.book[state_key(self.states[0])])
+
+    def test_build_book(self):
+        """ build_book covers the empty board when depth is one """
+        book = build_book(depth=1, search_depth=1, processes=1)
+        self.assertEqual(list(book), [state_key(Isolation())])
@@ -0,0 +1,30 @@
+
+import math
+import unittest
+
+from Projects.adverserial_search.isolation import Isolation, fork_get_action
+from Projects.adverserial_search.alphabeta import AlphaBetaSearch
+from Projects.adverserial_search.parallel_search import ParallelAlphaBetaPlayer
+
+
+class _DepthLimitedPlayer(ParallelAlphaBetaPlayer):
+    workers = 2
+    max_depth = 3
+
+
+class ParallelSearchTest(unittest.TestCase):
+    def test_root_split_matches_alphabeta(self):
+        """ The move from a completed depth-3 search has the best alpha-beta value """
+        state = Isolation().result(57).result(0).result(25).result(27)
+        player = _DepthLimitedPlayer(state.player())
+        action = fork_get_action(state, player, 1000)
+        search = AlphaBetaSearch(state.player())
+        values = {a: search.min_value(state.result(a), 2, -math.inf, math.inf) for a in state.actions()}
+        self.assertEqual(values[action], max(values.values()))
+
+    def test_time_limit(self):
+        """ An unlimited search still returns a legal move before the time limit """
+        state = Isolation().result(57).result(0)
+        for state in (state, state.result(state.actions()[0])):
+            player = ParallelAlphaBetaPlayer(state.player())
+            self.assertIn(fork_get_action(state, player, 150), state.actions())
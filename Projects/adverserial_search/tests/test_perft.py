@@ -0,0 +1,26 @@
+import unittest
+
+from Projects.adverserial_search.isolation import Isolation
+from Projects.adverserial_search.perft import ENGINES, POSITIONS, mismatches, perft, perft_divide, run
+
+
+class PerftTest(unittest.TestCase):
+    def test_known_counts(self):
+        """ The reference engine reproduces hand-checkable leaf counts """
+        self.assertEqual(perft(Isolation(), 1), 99)
+        self.assertEqual(perft(Isolation(), 2), 99 * 98)
+        state = Isolation().result(0).result(1)  # a corner token has two moves
+        self.assertEqual(perft_divide(state, 1), {a: 1 for a in state.actions()})
+        self.assertEqual(perft(Isolation(*POSITIONS["midgame"][0]), 5), 3304)
+        self.assertEqual(perft(Isolation(*POSITIONS["endgame"][0]), 8), 1373)
+
+    def test_engines_agree(self):
+        """ Every engine matches the reference counts on every position """
+        rows = run(positions=list(POSITIONS), depth=3)
+        self.assertEqual(len(rows), len(POSITIONS) * len(ENGINES))
+        self.assertEqual(mismatches(rows), [])
+
+    def test_mismatch_reported(self):
+        """ A wrong count is reported against the reference count """
+        row = ("endgame", "bitboard", 8, 1372, 0.)
+        self.assertEqual(mismatches([row]), [("endgame", "bitboard", 8, 1372, 1373)])
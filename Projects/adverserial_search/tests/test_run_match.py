@@ -0,0 +1,22 @@
+import unittest
+
+from Projects.adverserial_search.isolation import Agent, Isolation
+from Projects.adverserial_search.run_match import Match, _cpu_sets, _stream_matches
+from Projects.adverserial_search.sample_players import GreedyPlayer, RandomPlayer
+
+
+class StreamMatchesTest(unittest.TestCase):
+    def test_ordered_results(self):
+        """ Ordered streams yield the results in the order of the matches """
+        agents = (Agent(RandomPlayer, "Random"), Agent(GreedyPlayer, "Greedy"))
+        matches = [Match(agents, Isolation(), 150, idx, False, 100, idx) for idx in range(6)]
+        results = list(_stream_matches(matches, num_processes=2, pin_cpus=False, ordered=True))
+        self.assertEqual([r.match_id for r in results], list(range(6)))
+
+
+class CPUSetsTest(unittest.TestCase):
+    def test_cpu_sets(self):
+        """ Workers get disjoint shares of the CPUs, or one CPU each if there are too few """
+        self.assertEqual(_cpu_sets(list(range(8)), 3), [{0, 1, 2}, {3, 4, 5}, {6, 7}])
+        self.assertEqual(_cpu_sets([0, 1], 3), [{0}, {1}, {0}])
+        self.assertEqual(_cpu_sets([0, 1, 2, 3], 1), [{0, 1, 2, 3}])
@@ -0,0 +1,44 @@
+
+import unittest
+
+from Projects.adverserial_search.sequential_test import SPRT, wilson_interval
+
+
+class SPRTTest(unittest.TestCase):
+    def test_accepts_h1_for_winning_agent(self):
+        """ SPRT accepts H1 at the first win that takes the LLR past the upper bound """
+        test = SPRT(0.45, 0.55)
+        decisions = [test.update(True) for _ in range(100)]
+        self.assertEqual(test.decision, "H1")
+        # log(19) / log(0.55 / 0.45) = 14.7, so the 15th straight win is decisive
+        self.assertEqual(decisions.index("H1"), 14)
+        self.assertEqual(decisions[:14], [None] * 14)
+
+    def test_accepts_h0_for_losing_agent(self):
+        """ SPRT accepts H0 after a run of losses """
+        test = SPRT(0.45, 0.55)
+        while test.update(False) is None: pass
+        self.assertEqual(test.decision, "H0")
+        self.assertEqual((test.wins, test.games), (0, 15))
+
+    def test_undecided_for_even_results(self):
+        """ SPRT keeps asking for games when wins and losses alternate """
+        test = SPRT(0.45, 0.55)
+        for idx in range(20): test.update(idx % 2 == 0)
+        self.assertIsNone(test.decision)
+
+    def test_invalid_hypotheses(self):
+        with self.assertRaises(ValueError):
+            SPRT(0.6, 0.4)
+
+
+class WilsonIntervalTest(unittest.TestCase):
+    def test_interval_contains_observed_rate(self):
+        low, high = wilson_interval(30, 50)
+        self.assertLess(low, 0.6)
+        self.assertGreater(high, 0.6)
+
+    def test_interval_narrows_with_more_games(self):
+        low_a, high_a = wilson_interval(30, 50)
+        low_b, high_b = wilson_interval(300, 500)
+        self.assertLess(high_b - low_b, high_a - low_a)
@@ -0,0 +1,48 @@
+
+import unittest
+
+from Projects.adverserial_search.isolation import Agent, GameResult, Isolation, Status, Telemetry, play_game
+from Projects.adverserial_search.sample_players import GreedyPlayer, RandomPlayer
+from Projects.adverserial_search.telemetry import TelemetrySummary, summarize_game
+
+
+class TelemetryTest(unittest.TestCase):
+    def test_agents_report(self):
+        """ Telemetry reported by agents is returned with the game result """
+        agents = (Agent(GreedyPlayer, "Greedy"), Agent(RandomPlayer, "Random"))
+        result = play_game((agents, Isolation(), 150, 0))
+        self.assertEqual(len(result.telemetry), len(result.history))
+        for ply, telemetry in enumerate(result.telemetry):
+            self.assertIsNotNone(telemetry.commit_time)
+            self.assertLess(telemetry.commit_time, 150)
+            if ply % 2 == 0:  # greedy agent
+                self.assertEqual(telemetry.depth, 1)
+                self.assertGreater(telemetry.nodes, 0)
+            else:
+                self.assertIsNone(telemetry.nodes)
+                self.assertIsNone(telemetry.depth)
+        self.assertEqual(result.depths[0], 1)
+
+    def test_summary(self):
+        agents = (Agent(GreedyPlayer, "A"), Agent(RandomPlayer, "B"))
+        telemetry = [Telemetry(100, 2, None, 50.), Telemetry(None, None, None, 10.),
+                     Telemetry(300, 4, 5, 90.)]
+        result = GameResult(agents, Isolation().result(57), [0, 0, 0], [100., 20., 100.],
+                            [2, None, 4], Status.GAME_OVER, agents[0], 0, 0, telemetry)
+        game = summarize_game(result, 150)
+        first, second = game["B"], game["A"]  # agent B moves first from ply 1
+        self.assertEqual((first.moves, second.moves), (2, 1))
+        self.assertAlmostEqual(first.nps, 2000.)
+        self.assertEqual(first.avg_depth, 3)
+        self.assertEqual(first.avg_tt_hits, 5)
+        self.assertEqual(first.min_margin, 60.)
+        self.assertEqual(second.min_margin, 140.)
+        self.assertIsNone(second.nps)
+
+        summary = TelemetrySummary(150)
+        summary.add(result)
+        summary.add(result)
+        self.assertEqual(summary.agents["B"].games, 2)
+        self.assertEqual(summary.agents["B"].moves, 4)
+        self.assertAlmostEqual(summary.agents["B"].nps, 2000.)
+        self.assertIn("B", str(summary))
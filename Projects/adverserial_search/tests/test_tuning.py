@@ -0,0 +1,64 @@
+
+import os
+import pickle
+import tempfile
+import unittest
+
+from Projects.adverserial_search.isolation import fork_get_action
+from Projects.adverserial_search.tuning import (
+    DEFAULT_WEIGHTS, FEATURES, NodeLimitedSearch, TunedPlayer, export_weights, match_score, play_game,
+    random_opening, spsa
+)
+
+
+class TuningTest(unittest.TestCase):
+    def test_node_limit(self):
+        state = random_opening(0)
+        search = NodeLimitedSearch(DEFAULT_WEIGHTS, 200)
+        self.assertIn(search.best_action(state), state.actions())
+        self.assertLessEqual(search.nodes, 201)
+
+    def test_games_are_deterministic(self):
+        game = (DEFAULT_WEIGHTS, (1., -2., 0., 0., 0., 0.), 100, random_opening(3))
+        self.assertEqual(play_game(game), play_game(game))
+
+    def test_spsa(self):
+        scores = []
+        weights = spsa(iterations=1, games=2, node_limit=50, processes=1,
+                       callback=lambda k, theta, score: scores.append(score))
+        self.assertEqual(len(weights), len(FEATURES))
+        self.assertEqual(len(scores), 1)
+
+    def test_games_must_be_even(self):
+        """ Odd numbers of games and fewer than two games are rejected """
+        for games in (0, 1, 3):
+            with self.assertRaises(ValueError):
+                match_score(None, DEFAULT_WEIGHTS, DEFAULT_WEIGHTS, games, 50, 0)
+            with self.assertRaises(ValueError):
+                spsa(iterations=1, games=games, processes=1)
+
+    def test_export_weights(self):
+        """ Exported weights are merged into an existing dict and loaded by TunedPlayer """
+        fd, filename = tempfile.mkstemp(suffix=".pickle")
+        os.close(fd)
+        try:
+            with open(filename, "wb") as f:
+                pickle.dump({"book": 1}, f)
+            export_weights((2., -1., 0., 0., 0., 0.), filename)
+            with open(filename, "rb") as f:
+                data = pickle.load(f)
+            self.assertEqual(data["book"], 1)
+            self.assertEqual(data["weights"]["own_moves"], 2.)
+
+            with open(filename, "wb") as f:
+                pickle.dump([1, 2], f)
+            with self.assertRaises(ValueError):
+                export_weights(DEFAULT_WEIGHTS, filename)
+        finally:
+            os.remove(filename)
+
+    def test_tuned_player(self):
+        state = random_opening(1)
+        player = TunedPlayer(state.player())
+        player.data = {"weights": dict(zip(FEATURES, DEFAULT_WEIGHTS))}
+        self.assertIn(fork_get_action(state, player, 150), state.actions())
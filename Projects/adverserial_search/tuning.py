@@ -0,0 +1,235 @@
+""" Tune heuristic evaluation weights for knight's Isolation with self-play
+
+Playing tuning games through run_match at 150ms per move is far too slow (and
+too noisy) to tune evaluation weights, so this tool plays games in-process with
+a fixed node budget per move instead of a wall-clock time limit. Node-limited
+games are deterministic for a given opening, so the only noise in the results
+comes from the (seeded) random openings, and batches of games run in parallel
+without timing interference.
+
+The weights are tuned with SPSA (simultaneous perturbation stochastic
+approximation): every iteration perturbs all the weights at once in a random
+direction, plays the +perturbation weights against the -perturbation weights,
+and steps the weights along the direction in proportion to the match score.
+
+The evaluation of a leaf is the dot product of the weights with the features
+from `evaluation.features()` (listed in FEATURES), and the tuned weights are
+exported to `data.pickle` under the "weights" key so that `TunedPlayer` (or any
+other DataPlayer) can load them:
+
+    $ python tuning.py -i 200 -g 16 -n 2000 -p 4 -o data.pickle
+"""
+import argparse
+import math
+import os
+import pickle
+import random
+
+from multiprocessing import Pool
+
+from alphabeta import AlphaBetaSearch
+from isolation import Isolation
+from evaluation import features
+from sample_players import DATA_FILE, DataPlayer
+
+FEATURES = ("own_moves", "opp_moves", "own_moves2", "opp_moves2", "own_center", "opp_center")
+DEFAULT_WEIGHTS = (1., -1., 0., 0., 0., 0.)  # MinimaxPlayer.score
+
+
+class NodeLimitReached(Exception): pass
+
+
+def evaluate(state, player_id, weights):
+    """ Return the weighted sum of the FEATURES of `state` for `player_id` """
+    f = features(state.board, state.locs, player_id)
+    return sum(w * getattr(f, name) for w, name in zip(weights, FEATURES))
+
+
+class NodeLimitedSearch(AlphaBetaSearch):
+    """ Iterative deepening alpha-beta search that stops after a fixed number
+    of nodes and returns the best move from the deepest completed iteration
+
+    If `count` is given, it is called for every node visited and may raise
+    StopSearch to end the search (e.g., the `count` method of the agent queue,
+    which enforces the time limit or node budget of a match).
+    """
+    def __init__(self, weights, node_limit, count=None):
+        super().__init__()
+        self.weights = weights
+        self.node_limit = node_limit
+        self.count = count
+
+    def best_action(self, state):
+        actions = state.actions()
+        self.nodes = 0
+        best = actions[0]
+        for depth in range(1, bin(state.board).count("1") + 1):
+            try:
+                best = self.search_root(state, actions, depth)
+            except NodeLimitReached:
+                break
+        return best
+
+    def visit(self):
+        self.nodes += 1
+        if self.nodes > self.node_limit:
+            raise NodeLimitReached
+        if self.count is not None:
+            self.count()
+
+    def score(self, state):
+        return evaluate(state, self.player_id, self.weights)
+
+
+def random_opening(seed):
+    """ Return the state after both players place their token at random """
+    rng = random.Random(seed)
+    state = Isolation()
+    for _ in range(2):
+        state = state.result(rng.choice(state.actions()))
+    return state
+
+
+def play_game(args):
+    """ Play one node-limited game and return the id of the winning player
+
+    Parameters
+    ----------
+    args : tuple
+        (weights of player 0, weights of player 1, node limit, initial state)
+    """
+    weights_0, weights_1, node_limit, state = args
+    searches = [NodeLimitedSearch(weights_0, node_limit), NodeLimitedSearch(weights_1, node_limit)]
+    while not state.terminal_test():
+        state = state.result(searches[state.player()].best_action(state))
+    return 0 if state.utility(0) > 0 else 1
+
+
+def match_score(pool, weights_a, weights_b, num_games, node_limit, seed):
+    """ Return the fraction of games won by `weights_a` against `weights_b`
+
+    Games are played in pairs from the same random opening with each side
+    moving first once, so `num_games` must be even and at least 2.
+    """
+    _check_games(num_games)
+    tasks = []
+    for idx in range(num_games // 2):
+        opening = random_opening(seed + idx)
+        tasks.append((weights_a, weights_b, node_limit, opening))
+        tasks.append((weights_b, weights_a, node_limit, opening))
+    winners = pool.map(play_game, tasks) if pool else list(map(play_game, tasks))
+    wins = sum(int(winner == idx % 2) for idx, winner in enumerate(winners))  # weights_a is player idx % 2
+    return wins / len(tasks)
+
+
+def _check_games(num_games):
+    if num_games < 2 or num_games % 2:
+        raise ValueError("The number of games must be an even number of at least 2 "
+                         "(games are played in pairs); got {}".format(num_games))
+
+
+def spsa(weights=DEFAULT_WEIGHTS, iterations=100, games=16, node_limit=1000, a=0.05, c=0.2,
+         alpha=0.602, gamma=0.101, processes=None, seed=0, callback=None):
+    """ Tune evaluation weights with SPSA and return the final weights
+
+    Parameters
+    ----------
+    weights : sequence
+        Initial weights for each name in FEATURES
+
+    iterations : int
+        Number of SPSA iterations
+
+    games : int
+        Number of games played between the perturbed weights per iteration
+        (an even number of at least 2)
+
+    node_limit : int
+        Number of nodes each player may search per move
+
+    a, c, alpha, gamma : float
+        SPSA gain sequence parameters; iteration k uses the step size
+        a / (k + 1) ** alpha and the perturbation size c / (k + 1) ** gamma
+
+    processes : int
+        Number of worker processes used to play games (1 plays in-process)
+
+    callback : callable (optional)
+        Called as callback(k, weights, score) after every iteration
+    """
+    _check_games(games)
+    rng = random.Random(seed)
+    theta = list(weights)
+    pool = Pool(processes) if processes != 1 else None
+    try:
+        for k in range(iterations):
+            a_k, c_k = a / (k + 1) ** alpha, c / (k + 1) ** gamma
+            delta = [rng.choice((-1, 1)) for _ in theta]
+            plus = tuple(t + c_k * d for t, d in zip(theta, delta))
+            minus = tuple(t - c_k * d for t, d in zip(theta, delta))
+            score = match_score(pool, plus, minus, games, node_limit, seed + k * games)
+            # the match score estimates how much better the plus weights are
+            theta = [t + a_k * (score - 0.5) / (c_k * d) for t, d in zip(theta, delta)]
+            if callback is not None:
+                callback(k, theta, score)
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+    return tuple(theta)
+
+
+def export_weights(weights, filename=DATA_FILE):
+    """ Save the weights in `filename` under the "weights" key, preserving any
+    other entries if the file already contains a dict
+    """
+    data = {}
+    if os.path.isfile(filename):
+        with open(filename, "rb") as f:
+            data = pickle.load(f)
+        if not isinstance(data, dict):
+            raise ValueError("{} does not contain a dict; refusing to overwrite it".format(filename))
+    data["weights"] = dict(zip(FEATURES, weights))
+    with open(filename, "wb") as f:
+        pickle.dump(data, f)
+
+
+class TunedPlayer(DataPlayer):
+    """ Iterative deepening alpha-beta agent that evaluates leaves with the
+    weights saved in data.pickle by tuning.py (or DEFAULT_WEIGHTS)
+    """
+    def get_action(self, state):
+        if None in state.locs:
+            self.queue.put(random.choice(state.actions()))
+            return
+        weights = DEFAULT_WEIGHTS
+        if isinstance(self.data, dict) and "weights" in self.data:
+            weights = tuple(self.data["weights"].get(name, w) for name, w in zip(FEATURES, weights))
+        search = NodeLimitedSearch(weights, math.inf, count=self.queue.count)
+        actions = state.actions()
+        self.queue.put(actions[0])
+        for depth in range(1, bin(state.board).count("1") + 1):
+            self.queue.put(search.search_root(state, actions, depth))  # count() raises StopSearch
+            self.queue.report(depth=depth)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Tune evaluation weights with node-limited self-play.")
+    parser.add_argument('-i', '--iterations', type=int, default=100, help="Number of SPSA iterations.")
+    parser.add_argument('-g', '--games', type=int, default=16, help="Games per iteration (even).")
+    parser.add_argument('-n', '--node_limit', type=int, default=1000, help="Nodes per move.")
+    parser.add_argument('-p', '--processes', type=int, default=None,
+                        help="Number of processes used to play games (default: one per CPU).")
+    parser.add_argument('-s', '--seed', type=int, default=0, help="Seed for openings and perturbations.")
+    parser.add_argument('-o', '--output', type=str, default=DATA_FILE,
+                        help="Pickle file to export the tuned weights to.")
+    args = parser.parse_args()
+
+    def report(k, theta, score):
+        print("{:>5} {:6.1%}  {}".format(k, score, "  ".join("{}={:+.3f}".format(n, w)
+                                                            for n, w in zip(FEATURES, theta))), flush=True)
+
+    tuned = spsa(iterations=args.iterations, games=args.games, node_limit=args.node_limit,
+                 processes=args.processes, seed=args.seed, callback=report)
+    export_weights(tuned, args.output)
+    print("Saved weights to {}".format(args.output))
@@ -3,12 +3,13 @@ from itertools import product
 from timeit import default_timer as timer
 
 from aimacode.logic import associate
-from aimacode.search import InstrumentedProblem
+from aimacode.search import BudgetedProblem
 from aimacode.utils import expr
 
 
-class PrintableProblem(InstrumentedProblem):
-    """ InstrumentedProblem keeps track of stats during search, and this class
+class PrintableProblem(BudgetedProblem):
+    """ InstrumentedProblem keeps track of stats during search (and
+    BudgetedProblem enforces optional search limits), and this class
     modifies the print output of those statistics for air cargo problems.
     """
     def __repr__(self):
@@ -16,21 +17,38 @@ class PrintableProblem(InstrumentedProblem):
             len(self.problem.actions_list), self.succs, self.goal_tests, self.states)
 
 
-def run_search(problem, search_function, parameter=None):
-    ip = PrintableProblem(problem)
+def run_search(problem, search_function, parameter=None, verbose=True, **budget):
+    """ Solve a problem with a search function and return a dict of statistics:
+    the number of actions in the problem, the expansions, goal tests and new
+    nodes of the search, the plan length (None if no plan was found) and the
+    elapsed time in seconds. The statistics and the plan are printed unless
+    verbose is False.
+
+    The keyword arguments node_limit, time_limit and memory_limit set a
+    budget for the search (see aimacode.search.BudgetedProblem); a search that
+    exceeds it raises aimacode.search.SearchAborted.
+    """
+    ip = PrintableProblem(problem, **budget)
     start = timer()
     if parameter is not None:
         node = search_function(ip, parameter)
     else:
         node = search_function(ip)
     end = timer()
-    print("\n# Actions   Expansions   Goal Tests   New Nodes")
-    print("{}\n".format(ip))
-    show_solution(node, end - start)
-    print()
+    if verbose:
+        print("\n# Actions   Expansions   Goal Tests   New Nodes")
+        print("{}\n".format(ip))
+        show_solution(node, end - start)
+        print()
+    return {"actions": len(problem.actions_list), "expansions": ip.succs, "goal_tests": ip.goal_tests,
+            "new_nodes": ip.states, "plan_length": None if node is None else len(node.solution()),
+            "time": end - start}
 
 
 def show_solution(node, elapsed_time):
+    if node is None:
+        print("No solution found  Time elapsed in seconds: {}".format(elapsed_time))
+        return
     print("Plan length: {}  Time elapsed in seconds: {}".format(len(node.solution()), elapsed_time))
     for action in node.solution():
         print("{}{}".format(action.name, action.args))
@@ -109,11 +127,13 @@ def conjunctive_sentence(pos_list, neg_list):
 
 def encode_state(fs, fluent_map):
     """ Convert a FluentState (list of positive fluents and negative fluents) into
-    an ordered sequence of True/False values.
+    an integer bitset of the True fluents
 
     It is sometimes convenient to encode a problem in terms of the specific
     fluents that are True or False in a state, but other times it is easier (or faster)
-    to perform computations on an an array of booleans.
+    to perform computations on a bitset: bit i of the encoded state is set if the
+    fluent fluent_map[i] is True, so whole sets of fluents can be tested or
+    updated with a single integer operation.
 
     Parameters
     ----------
@@ -125,37 +145,38 @@ def encode_state(fs, fluent_map):
     
     Returns
     -------
-    tuple of True/False elements corresponding to the fluents in fluent_map
+    int with bit i set for each fluent in fluent_map[i] that is True in fs
     """
-    return tuple([f in fs.pos for f in fluent_map])
+    pos = set(fs.pos)
+    return sum(1 << idx for idx, f in enumerate(fluent_map) if f in pos)
 
 
 def decode_state(state, fluent_map):
-    """ Convert an ordered list of True/False values into a FluentState
+    """ Convert an integer bitset of True fluents into a FluentState
     (list of positive fluents and negative fluents)
 
     It is sometimes convenient to encode a problem in terms of the specific
     fluents that are True or False in a state, but other times it is easier (or faster)
-    to perform computations on an an array of booleans.
+    to perform computations on a bitset.
 
     Parameters
     ----------
     state:
-        A state represented as an ordered sequence of True/False values
+        A state represented as an integer bitset (see encode_state)
 
     fluent_map:
         An ordered sequence of fluents
 
     Returns
     -------
-    FluentState instance containing the fluents from fluent_map corresponding to True
-    entries from the input state in the pos_list, and containing the fluents from
-    fluent_map corresponding to False entries in the neg_list
+    FluentState instance containing the fluents from fluent_map corresponding to set
+    bits of the input state in the pos_list, and containing the fluents from
+    fluent_map corresponding to unset bits in the neg_list
     """
     fs = FluentState(set(), set())
-    for idx, elem in enumerate(state):
-        if elem:
-            fs.pos.append(fluent_map[idx])
+    for idx, fluent in enumerate(fluent_map):
+        if state >> idx & 1:
+            fs.pos.append(fluent)
         else:
-            fs.neg.append(fluent_map[idx])
+            fs.neg.append(fluent)
     return fs
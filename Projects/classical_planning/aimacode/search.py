@@ -9,6 +9,14 @@ from .utils import (
 )
 
 import sys
+from array import array
+from collections import deque
+from time import perf_counter
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
 
 infinity = float('inf')
 
@@ -76,7 +84,12 @@ class Node:
     the total path_cost (also known as g) to reach the node.  Other functions
     may add an f and h value; see best_first_graph_search and astar_search for
     an explanation of how the f and h values are handled. You will not need to
-    subclass this class."""
+    subclass this class.
+
+    MODIFIED FROM AIMA VERSION
+        - Use __slots__ (f and h are the only extra values searches store)"""
+
+    __slots__ = ('state', 'parent', 'action', 'path_cost', 'depth', 'f', 'h')
 
     def __init__(self, state, parent=None, action=None, path_cost=0):
         "Create a search tree Node, derived from a parent by an action."
@@ -129,6 +142,72 @@ class Node:
     def __hash__(self):
         return hash(self.state)
 
+
+class NodeStore:
+
+    """Compact storage for the nodes of a search tree.
+
+    Searches that only need the parent, action and path cost of a node can
+    store each node as an index into parallel growable arrays instead of as a
+    Node object. States and actions are interned: each distinct state or
+    action is kept once and the arrays hold integer ids, so a node costs a few
+    machine words. Interning states also gives a set of every state reached so
+    far (`state in store`). Node objects are only built for the path to a
+    solution by node(index)."""
+
+    def __init__(self):
+        self.parents = array('i')    # index of the parent node (-1 for a root)
+        self.action_ids = array('i')  # id of the action that made the node (-1 for a root)
+        self.costs = array('d')      # path cost (g) of the node
+        self.state_ids = array('i')  # id of the state of the node
+        self.states, self._state_ids = [], {}
+        self.actions, self._action_ids = [], {}
+
+    def __len__(self):
+        return len(self.parents)
+
+    def __contains__(self, state):
+        "Return True if a node in the store has the state."
+        return state in self._state_ids
+
+    def add(self, state, parent=-1, action=None, path_cost=0):
+        "Store a node and return its index."
+        state_id = self._state_ids.get(state)
+        if state_id is None:
+            state_id = self._state_ids[state] = len(self.states)
+            self.states.append(state)
+        action_id = -1
+        if action is not None:
+            action_id = self._action_ids.get(action)
+            if action_id is None:
+                action_id = self._action_ids[action] = len(self.actions)
+                self.actions.append(action)
+        self.parents.append(parent)
+        self.action_ids.append(action_id)
+        self.costs.append(path_cost)
+        self.state_ids.append(state_id)
+        return len(self.parents) - 1
+
+    def state(self, index):
+        return self.states[self.state_ids[index]]
+
+    def path(self, index):
+        "Return the list of node indices from the root to a node."
+        path_back = []
+        while index >= 0:
+            path_back.append(index)
+            index = self.parents[index]
+        return list(reversed(path_back))
+
+    def node(self, index):
+        "Return a Node (linked to Nodes for its ancestors) for a stored node."
+        node = None
+        for i in self.path(index):
+            action_id = self.action_ids[i]
+            node = Node(self.state(i), node, self.actions[action_id] if action_id >= 0 else None,
+                        self.costs[i])
+        return node
+
 # ______________________________________________________________________________
 # Uninformed Search algorithms
 
@@ -149,17 +228,22 @@ def tree_search(problem, frontier):
 def graph_search(problem, frontier):
     """Search through the successors of a problem to find a goal.
     The argument frontier should be an empty queue.
-    If two paths reach a state, only use the first one. [Figure 3.7]"""
-    frontier.append(Node(problem.initial))
-    explored = set()
+    If two paths reach a state, only use the first one. [Figure 3.7]
+    The nodes are kept in a NodeStore and the frontier holds their indices;
+    a state is skipped if it was ever added to the store, which is the same
+    as skipping the states that are explored or in the frontier."""
+    store = NodeStore()
+    frontier.append(store.add(problem.initial))
     while frontier:
-        node = frontier.pop()
-        if problem.goal_test(node.state):
-            return node
-        explored.add(node.state)
-        frontier.extend(child for child in node.expand(problem)
-                        if child.state not in explored and
-                        child not in frontier)
+        index = frontier.pop()
+        state = store.state(index)
+        if problem.goal_test(state):
+            return store.node(index)
+        cost = store.costs[index]
+        for action in problem.actions(state):
+            child = problem.result(state, action)
+            if child not in store:
+                frontier.append(store.add(child, index, action, problem.path_cost(cost, state, action, child)))
     return None
 
 
@@ -179,37 +263,42 @@ def depth_first_graph_search(problem):
 
 
 def breadth_first_search(problem):
-    "[Figure 3.11]"
-    node = Node(problem.initial)
-    if problem.goal_test(node.state):
-        return node
-    frontier = FIFOQueue()
-    frontier.append(node)
-    explored = set()
+    """[Figure 3.11]
+    The nodes are kept in a NodeStore (see graph_search)."""
+    if problem.goal_test(problem.initial):
+        return Node(problem.initial)
+    store = NodeStore()
+    frontier = deque([store.add(problem.initial)])
     while frontier:
-        node = frontier.pop()
-        explored.add(node.state)
-        for child in node.expand(problem):
-            if child.state not in explored and child not in frontier:
-                if problem.goal_test(child.state):
-                    return child
-                frontier.append(child)
+        index = frontier.popleft()
+        state, cost = store.state(index), store.costs[index]
+        for action in problem.actions(state):
+            child = problem.result(state, action)
+            if child not in store:
+                child_index = store.add(child, index, action, problem.path_cost(cost, state, action, child))
+                if problem.goal_test(child):
+                    return store.node(child_index)
+                frontier.append(child_index)
     return None
 
 
-def best_first_graph_search(problem, f):
+def best_first_graph_search(problem, f, tiebreak=None):
     """Search the nodes with the lowest f scores first.
     You specify the function f(node) that you want to minimize; for example,
     if f is a heuristic estimate to the goal, then we have greedy best
     first search; if f is node.depth then we have breadth-first search.
     There is a subtlety: the line "f = memoize(f, 'f')" means that the f
     values will be cached on the nodes as they are computed. So after doing
-    a best first search you can examine the f values of the path returned."""
+    a best first search you can examine the f values of the path returned.
+    Nodes with equal f are ordered by tiebreak(node) if it is given (e.g.,
+    A* passes h to prefer the nodes closer to the goal), and then first in
+    first out. The frontier holds at most one node per state: a node that
+    reaches a frontier state with a lower f replaces the incumbent."""
     f = memoize(f, 'f')
     node = Node(problem.initial)
     if problem.goal_test(node.state):
         return node
-    frontier = PriorityQueue(min, f)
+    frontier = PriorityQueue(min, f, tiebreak)
     frontier.append(node)
     explored = set()
     while frontier:
@@ -223,7 +312,7 @@ def best_first_graph_search(problem, f):
             elif child in frontier:
                 incumbent = frontier[child]
                 if f(child) < f(incumbent):
-                    # del frontier[incumbent]
+                    del frontier[incumbent]
                     frontier.append(child)
     return None
 
@@ -271,9 +360,10 @@ greedy_best_first_graph_search = best_first_graph_search
 def astar_search(problem, h=None):
     """A* search is best-first graph search with f(n) = g(n)+h(n).
     You need to specify the h function when you call astar_search, or
-    else in your Problem subclass."""
+    else in your Problem subclass. Ties in f are broken in favor of the
+    lower h."""
     h = memoize(h or problem.h, 'h')
-    return best_first_graph_search(problem, lambda n: n.path_cost + h(n))
+    return best_first_graph_search(problem, lambda n: n.path_cost + h(n), h)
 
 # ______________________________________________________________________________
 # Other search algorithms
@@ -286,7 +376,7 @@ def recursive_best_first_search(problem, h=None):
     def RBFS(problem, node, flimit):
         if problem.goal_test(node.state):
             return node, 0   # (The second value is immaterial)
-        successors = node.expand(problem)
+        successors = list(node.expand(problem))
         if len(successors) == 0:
             return None, infinity
         for s in successors:
@@ -353,6 +443,130 @@ class InstrumentedProblem(Problem):
                                      self.states, str(self.found)[:4])
 
 
+class SearchAborted(Exception):
+
+    """Raised by a BudgetedProblem to stop a search that exceeds its budget.
+    The reason is 'nodes', 'timeout' or 'memory'; stats is a dict of the
+    search statistics so far (expansions, goal_tests, new_nodes, time and
+    peak_rss), and best is the best node found so far (or None)."""
+
+    def __init__(self, reason, stats, best=None):
+        super().__init__("search aborted ({}) after {} expansions".format(reason, stats["expansions"]))
+        self.reason = reason
+        self.stats = stats
+        self.best = best
+
+
+class BudgetedProblem(InstrumentedProblem):
+
+    """An InstrumentedProblem that stops the search by raising SearchAborted
+    when it generates more than node_limit new nodes, runs longer than
+    time_limit seconds, or the resident set size of the process grows by more
+    than memory_limit MB. The budget is checked whenever the search expands or
+    generates a node, so it works with every search function. The clock
+    starts, and the memory baseline is taken, when the problem is created, so
+    the memory used by earlier searches in the same process does not count.
+
+    If track_best is True, SearchAborted reports the best node: the expanded
+    node with the lowest h(node), or the most recently expanded node if h is
+    None. Search functions don't share their nodes with the problem, so the
+    problem then records the first path found to every state (one dict entry
+    per new state, about as much memory as the search itself) and the best
+    node follows that path. Without any limit, the problem records nothing and
+    behaves exactly like an InstrumentedProblem."""
+
+    memory_check_interval = 256  # expansions between RSS checks
+
+    def __init__(self, problem, node_limit=None, time_limit=None, memory_limit=None, h=None,
+                 track_best=False):
+        super().__init__(problem)
+        if memory_limit is not None and resource is None:
+            raise ValueError("memory_limit requires the resource module")
+        self.node_limit = node_limit
+        self.time_limit = time_limit
+        self.memory_limit = memory_limit
+        self.h = h
+        self.start = perf_counter()
+        self.limited = not (node_limit is None and time_limit is None and memory_limit is None)
+        self.track_best = self.limited and track_best
+        self._base_rss = None if memory_limit is None else _current_rss()
+        self._parents = {problem.initial: None}
+        self._best, self._best_h = None, infinity
+
+    def actions(self, state):
+        if not self.limited:
+            return super().actions(state)
+        self._check_budget()
+        if self.track_best:
+            self._update_best(state)
+        return super().actions(state)
+
+    def result(self, state, action):
+        child = super().result(state, action)
+        if not self.limited:
+            return child
+        if self.track_best and child not in self._parents:
+            self._parents[child] = (state, action)
+        if self.node_limit is not None and self.states > self.node_limit:
+            self.abort("nodes")
+        return child
+
+    def _update_best(self, state):
+        if self.h is None:
+            self._best = state
+            return
+        value = self.h(Node(state))
+        if value < self._best_h:
+            self._best, self._best_h = state, value
+
+    def _check_budget(self):
+        if self.time_limit is not None and perf_counter() - self.start > self.time_limit:
+            self.abort("timeout")
+        if (self.memory_limit is not None and self.succs % self.memory_check_interval == 0
+                and _current_rss() - self._base_rss > self.memory_limit * 1024):
+            self.abort("memory")
+
+    def abort(self, reason):
+        raise SearchAborted(reason, self.stats(), self.best_node())
+
+    def peak_rss(self):
+        "Return the peak resident set size of the process in kB (None if unknown)."
+        if resource is None:
+            return None
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return rss // 1024 if sys.platform == "darwin" else rss
+
+    def stats(self):
+        return {"expansions": self.succs, "goal_tests": self.goal_tests, "new_nodes": self.states,
+                "time": perf_counter() - self.start, "peak_rss": self.peak_rss()}
+
+    def best_node(self):
+        """Return a Node for the best state expanded so far (None before the
+        first expansion, or if track_best is False)."""
+        if self._best is None:
+            return None
+        path_back, state = [], self._best
+        while self._parents[state] is not None:
+            parent, action = self._parents[state]
+            path_back.append((state, action))
+            state = parent
+        node = Node(state)
+        for state, action in reversed(path_back):
+            node = Node(state, node, action, self.problem.path_cost(node.path_cost, node.state, action, state))
+        return node
+
+
+def _current_rss():
+    """Return the resident set size of the process in kB, or the peak resident
+    set size where the current size is unknown (anywhere without /proc)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * resource.getpagesize() // 1024
+    except OSError:
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return rss // 1024 if sys.platform == "darwin" else rss
+
+
 def compare_searchers(problems, header,
                       searchers=[breadth_first_tree_search,
                                  breadth_first_search,
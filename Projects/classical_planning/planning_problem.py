@@ -1,11 +1,13 @@
 
-from functools import lru_cache
+from itertools import chain
 
 from aimacode.logic import PropKB
 from aimacode.search import Node, Problem
 
-from _utils import encode_state, decode_state
-from my_planning_graph import PlanningGraph
+from _utils import encode_state
+from heuristic_cache import HeuristicCache, cached_heuristic
+from planning_heuristics import HeuristicEngine
+from successor_generator import SuccessorGenerator
 
     ##############################################################################
     #                 YOU DO NOT NEED TO MODIFY CODE IN THIS FILE                #
@@ -13,21 +15,89 @@ from my_planning_graph import PlanningGraph
 
 
 class BasePlanningProblem(Problem):
+    """ Base class for planning problems with states encoded as integer bitsets
+
+    Bit i of a state is set if the fluent self.state_map[i] is True (see
+    _utils.encode_state), so applying an action only takes a few integer
+    operations on the bitmasks compiled for each action in self.actions_list,
+    and the applicable actions are looked up in a SuccessorGenerator built
+    from the precondition masks.
+
+    Heuristic values are cached per state in a HeuristicCache for each
+    heuristic; the default capacity and eviction policy are set by the
+    heuristic_cache_size and heuristic_cache_policy class attributes (see
+    configure_heuristic_cache).
+    """
+    heuristic_cache_size = 1000000
+    heuristic_cache_policy = "lru"
+
     def __init__(self, initial, goal):
         self.state_map = sorted(initial.pos + initial.neg, key=str)
         self.initial_state_TF = encode_state(initial, self.state_map)
         super().__init__(self.initial_state_TF, goal=goal)
-
-    @lru_cache()
+        self.fluent_index = {fluent: idx for idx, fluent in enumerate(self.state_map)}
+        self.goal_mask = self.fluent_mask(goal)
+        self._action_masks = self._effects = self._successors = None
+        self._heuristic_engine = None
+        self._heuristic_caches = {}
+
+    def heuristic_cache(self, name):
+        """ Return the HeuristicCache for the heuristic method `name` """
+        cache = self._heuristic_caches.get(name)
+        if cache is None:
+            cache = HeuristicCache(self.heuristic_cache_size, self.heuristic_cache_policy)
+            self._heuristic_caches[name] = cache
+        return cache
+
+    def configure_heuristic_cache(self, capacity=None, policy="lru"):
+        """ Replace every heuristic cache of this problem with empty caches that
+        hold up to `capacity` entries (None for no limit) and evict entries by
+        `policy` ("lru" or "fifo")
+        """
+        HeuristicCache(capacity, policy)  # validate the arguments before changing anything
+        self.heuristic_cache_size, self.heuristic_cache_policy = capacity, policy
+        self._heuristic_caches = {}
+
+    def fluent_mask(self, fluents):
+        """ Return the bitmask of the fluents in state_map (other fluents are ignored) """
+        index = self.fluent_index
+        return sum(1 << index[f] for f in set(fluents) if f in index)
+
+    def compile_actions(self):
+        """ Return a list of (action, pre, neg, add, rem) tuples with the bitmasks
+        of the positive and negative preconditions and the add and remove effects
+        of every action in self.actions_list
+
+        The masks are compiled on first use because subclasses create actions_list
+        after calling BasePlanningProblem.__init__(). A precondition on a fluent
+        missing from state_map can never be satisfied, so it is encoded as a bit
+        above every fluent that is never set in any state.
+        """
+        if self._action_masks is None:
+            unknown = 1 << len(self.state_map)
+            masks = []
+            for action in self.actions_list:
+                pre = self.fluent_mask(action.precond_pos)
+                neg = self.fluent_mask(action.precond_neg)
+                if any(f not in self.fluent_index for f in chain(action.precond_pos, action.precond_neg)):
+                    pre |= unknown
+                masks.append((action, pre, neg, self.fluent_mask(action.effect_add),
+                               self.fluent_mask(action.effect_rem)))
+            self._action_masks = masks
+            self._effects = {action: (add, rem) for action, _, _, add, rem in masks}
+            self._successors = SuccessorGenerator(masks)
+        return self._action_masks
+
+    @cached_heuristic
     def h_unmet_goals(self, node):
         """ This heuristic estimates the minimum number of actions that must be
         carried out from the current state in order to satisfy all of the goal
         conditions by ignoring the preconditions required for an action to be
         executed.
         """
-        return sum(1 for i, f in enumerate(self.state_map) if not node.state[i] and f in self.goal)
+        return bin(self.goal_mask & ~node.state).count("1")
 
-    @lru_cache()
+    @cached_heuristic
     def h_pg_levelsum(self, node):
         """ This heuristic uses a planning graph representation of the problem
         state space to estimate the sum of the number of actions that must be
@@ -37,12 +107,11 @@ class BasePlanningProblem(Problem):
         See Also
         --------
         Russell-Norvig 10.3.1 (3rd Edition)
+        planning_heuristics.HeuristicEngine
         """
-        pg = PlanningGraph(self, node.state, serialize=True, ignore_mutexes=True)
-        score = pg.h_levelsum()
-        return score
+        return self.heuristic_engine.levelsum(node.state)
 
-    @lru_cache()
+    @cached_heuristic
     def h_pg_maxlevel(self, node):
         """ This heuristic uses a planning graph representation of the problem
         to estimate the maximum level cost out of all the individual goal literals.
@@ -52,12 +121,11 @@ class BasePlanningProblem(Problem):
         See Also
         --------
         Russell-Norvig 10.3.1 (3rd Edition)
+        planning_heuristics.HeuristicEngine
         """
-        pg = PlanningGraph(self, node.state, serialize=True, ignore_mutexes=True)
-        score = pg.h_maxlevel()
-        return score
+        return self.heuristic_engine.maxlevel(node.state)
 
-    @lru_cache()
+    @cached_heuristic
     def h_pg_setlevel(self, node):
         """ This heuristic uses a planning graph representation of the problem
         to estimate the level cost in the planning graph to achieve all of the
@@ -66,38 +134,32 @@ class BasePlanningProblem(Problem):
         See Also
         --------
         Russell-Norvig 10.3.1 (3rd Edition)
+        planning_heuristics.HeuristicEngine
+        """
+        return self.heuristic_engine.setlevel(node.state)
+
+    @property
+    def heuristic_engine(self):
+        """ The planning graph heuristics compiled for this problem (built on
+        first use, after the subclass creates actions_list)
         """
-        pg = PlanningGraph(self, node.state, serialize=True)
-        score = pg.h_setlevel()
-        return score
+        if self._heuristic_engine is None:
+            self._heuristic_engine = HeuristicEngine(self, serialize=True)
+        return self._heuristic_engine
 
     def actions(self, state):
         """ Return the actions that can be executed in the given state. """
-        possible_actions = []
-        fluent = decode_state(state, self.state_map)
-        for action in self.actions_list:
-            is_possible = True
-            for clause in action.precond_pos:
-                if clause not in fluent.pos:
-                    is_possible = False
-                    break
-            if not is_possible: continue
-            for clause in action.precond_neg:
-                if clause not in fluent.neg:
-                    is_possible = False
-                    break
-            if is_possible: possible_actions.append(action)
-        return possible_actions
+        self.compile_actions()
+        return self._successors.applicable(state)
 
     def result(self, state, action):
         """ Return the state that results from executing the given action in the
         given state. The action must be one of self.actions(state).
         """
-        return tuple([
-            (f and s not in action.effect_rem) or (s in action.effect_add)
-            for f, s in zip(state, self.state_map)
-        ])
+        self.compile_actions()
+        add, rem = self._effects[action]
+        return (state & ~rem) | add
 
-    def goal_test(self, state: str) -> bool:
+    def goal_test(self, state: int) -> bool:
         """ Test the state to see if goal is reached """
-        return all(f for f, c in zip(state, self.state_map) if c in self.goal)
+        return state & self.goal_mask == self.goal_mask
@@ -0,0 +1,239 @@
+""" Run the problem x search grid of run_search.py across a process pool
+
+Each run solves one of the PROBLEMS with one of the SEARCHES in a fresh worker
+process, so that a runaway configuration can be stopped by its own time and
+memory limits without blocking the other runs, and so that the peak resident
+set size of each process measures a single search. One row is written to the
+output file (CSV or JSON, chosen by the file extension) as each run finishes:
+
+    problem_id, search_id   the indices used by the -p and -s flags of run_search.py
+    status                  "ok", "no solution", "timeout", "memory", "nodes", or
+                            "error" if the worker raised an exception or died
+    expansions, goal_tests, new_nodes, plan_length, time
+                            the statistics printed by run_search.py (up to
+                            the point where the search was stopped if it
+                            exceeded a limit)
+    peak_rss                the peak resident set size of the worker (kB)
+    error                   the exception of a run with the "error" status
+
+The time and node limits and a soft memory limit on the RSS used by the search
+are enforced by aimacode.search.BudgetedProblem, which stops the search cleanly
+with its statistics so far; the memory limit is also a hard limit on the
+address space of the worker, which stops a search that allocates too much at
+once. (Memory
+limits need the resource module, which is not available on Windows.)
+
+Every run gets a fresh worker process (the pool replaces each worker after a
+single task), so the peak RSS and the resource limits of a run never carry
+over from an earlier run.
+
+Runs that already have a row in the output file are skipped, so an interrupted
+experiment can be resumed with the same command (use --retry to run the failed
+configurations and the runs that raised an error again, e.g. with larger
+limits).
+
+Example Usage:
+
+    $ python run_experiments.py -o results.csv                     # the full grid
+    $ python run_experiments.py -p 3 4 -s 1 8 9 -j 4 --time_limit 600 --memory_limit 4096 -o results.json
+    $ python run_experiments.py -p 4 --node_limit 1000000 -o p4.csv
+"""
+import argparse
+import csv
+import json
+import os
+import queue
+
+from timeit import default_timer as timer
+from collections import namedtuple
+from multiprocessing import Pool, SimpleQueue, active_children
+
+from aimacode.search import SearchAborted
+from run_search import PROBLEMS, SEARCHES
+from _utils import run_search
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+FIELDS = ["problem_id", "search_id", "problem", "search", "heuristic", "status", "actions",
+          "expansions", "goal_tests", "new_nodes", "plan_length", "time", "peak_rss", "error"]
+FAILED = ("timeout", "memory", "nodes", "error")
+HARD_MEMORY_FACTOR = 2  # address space limit as a multiple of the memory limit
+CHECK_INTERVAL = 1  # seconds between checks for workers that died during a run
+
+Run = namedtuple("Run", "problem_id search_id time_limit memory_limit node_limit", defaults=(None,))
+
+
+def run_experiment(run):
+    """ Solve one problem with one search under the time limit (seconds),
+    memory limit (MB) and node limit of the run, and return its result row
+    """
+    row = _new_row(run)
+    problem_fn = PROBLEMS[run.problem_id - 1][1]
+    search_fn = SEARCHES[run.search_id - 1][1]
+    heuristic = row["heuristic"]
+    if run.memory_limit and resource is not None:
+        limit = HARD_MEMORY_FACTOR * run.memory_limit * 2**20
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    start = timer()
+    try:
+        problem = problem_fn()
+        heuristic_fn = None if not heuristic else getattr(problem, heuristic)
+        row.update(run_search(problem, search_fn, heuristic_fn, verbose=False, node_limit=run.node_limit,
+                              time_limit=run.time_limit, memory_limit=run.memory_limit))
+        row["status"] = "ok" if row["plan_length"] is not None else "no solution"
+    except SearchAborted as error:
+        row.update(error.stats, status=error.reason)
+    except MemoryError:
+        row.update(status="memory", time=timer() - start)
+    if resource is not None:
+        row["peak_rss"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return row
+
+
+_started = None  # queue of the (pid, run) pairs sent by each worker as it starts a run
+
+
+def _init_worker(started):
+    global _started
+    _started = started
+
+
+def _start_run(experiment, run):
+    _started.put((os.getpid(), run))
+    return experiment(run)
+
+
+def _pool_results(runs, processes):
+    """ Run every run in a pool with a new worker process per run, and yield a
+    (run, row or exception) pair as each run finishes
+
+    multiprocessing.Pool waits forever for the result of a worker that dies
+    (e.g., if it is killed by the operating system), so the workers report the
+    run they start, and a run whose worker has exited for CHECK_INTERVAL
+    seconds without a result yields a RuntimeError.
+    """
+    started, finished = SimpleQueue(), queue.Queue()
+    with Pool(processes, _init_worker, (started,), maxtasksperchild=1) as pool:
+        for run in runs:
+            pool.apply_async(_start_run, (run_experiment, run),
+                             callback=lambda row, run=run: finished.put((run, row)),
+                             error_callback=lambda error, run=run: finished.put((run, error)))
+        running, exited, done = {}, set(), set()  # pid: run started by the worker
+        while len(done) < len(runs):
+            try:
+                run, result = finished.get(timeout=CHECK_INTERVAL)
+            except queue.Empty:
+                while not started.empty():
+                    pid, run = started.get()
+                    running[pid] = run
+                alive = {p.pid for p in active_children()}
+                for pid in [pid for pid in running if pid not in alive]:
+                    if running[pid] in done:
+                        del running[pid]
+                    elif pid in exited:  # no result since the last check
+                        run, result = running.pop(pid), RuntimeError("the worker process died")
+                        done.add(run)
+                        yield run, result
+                    exited.add(pid)
+                continue
+            if run not in done:
+                done.add(run)
+                yield run, result
+
+
+def _new_row(run):
+    pname = PROBLEMS[run.problem_id - 1][0]
+    sname, _, heuristic = SEARCHES[run.search_id - 1]
+    return {"problem_id": run.problem_id, "search_id": run.search_id,
+            "problem": pname, "search": sname, "heuristic": heuristic}
+
+
+def load_results(path):
+    """ Return the result rows in an output file (an empty list if the file
+    does not exist)
+    """
+    if not os.path.exists(path):
+        return []
+    with open(path, newline="") as f:
+        if path.endswith(".json"):
+            return json.load(f)
+        return list(csv.DictReader(f))
+
+
+def _save_results(path, rows, append=False):
+    """ Write the rows to an output file; with append=True only the last row is
+    appended to an existing CSV file (JSON files are always rewritten)
+    """
+    if path.endswith(".json"):
+        with open(path + ".tmp", "w") as f:
+            json.dump(rows, f, indent=1)
+        os.replace(path + ".tmp", path)
+        return
+    if append and os.path.exists(path) and os.path.getsize(path):
+        with open(path, "a", newline="") as f:
+            csv.DictWriter(f, FIELDS, extrasaction="ignore").writerow(rows[-1])
+        return
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, FIELDS, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def run_experiments(p_choices, s_choices, output, processes=None, time_limit=None, memory_limit=None,
+                    node_limit=None, retry=False):
+    """ Run every pending combination of the chosen problems & searches across
+    a process pool, saving each result row as soon as its run finishes, and
+    return every row in the output file
+    """
+    rows = load_results(output)
+    if retry:
+        rows = [row for row in rows if row["status"] not in FAILED]
+        _save_results(output, rows)
+    done = {(int(row["problem_id"]), int(row["search_id"])) for row in rows}
+    runs = [Run(p, s, time_limit, memory_limit, node_limit) for p in p_choices for s in s_choices if (p, s) not in done]
+    print("Running {} searches ({} already finished)".format(len(runs), len(done)))
+
+    for run, row in _pool_results(runs, processes):
+        if isinstance(row, Exception):
+            error, row = row, _new_row(run)
+            row.update(status="error", error="{}: {}".format(type(error).__name__, error))
+        rows.append(row)
+        _save_results(output, rows, append=True)
+        elapsed = "-" if row.get("time") is None else "{:.2f}s".format(row["time"])
+        print("{}, {}{}: {} ({} expansions, {}, {} kB)".format(
+            row["problem"], row["search"], " with " + row["heuristic"] if row["heuristic"] else "",
+            row.get("error") or row["status"], row.get("expansions", "-"), elapsed, row.get("peak_rss", "-")))
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the air cargo problems with the search algorithms " +
+        "of run_search.py in parallel, and save the search statistics to a CSV or JSON file.")
+    parser.add_argument('-p', '--problems', nargs="+", choices=range(1, len(PROBLEMS)+1), type=int, metavar='',
+                        default=list(range(1, len(PROBLEMS)+1)),
+                        help="Indices of the problems to solve (default: every problem).")
+    parser.add_argument('-s', '--searches', nargs="+", choices=range(1, len(SEARCHES)+1), type=int, metavar='',
+                        default=list(range(1, len(SEARCHES)+1)),
+                        help="Indices of the search algorithms to use (default: every search).")
+    parser.add_argument('-o', '--output', default="results.csv",
+                        help="Output file; the format is JSON if the name ends with .json, and CSV otherwise.")
+    parser.add_argument('-j', '--processes', type=int, default=os.cpu_count(),
+                        help="Number of searches to run in parallel.")
+    parser.add_argument('--time_limit', type=float, default=None,
+                        help="Wall clock time limit for each search in seconds.")
+    parser.add_argument('--memory_limit', type=int, default=None,
+                        help="Limit on the resident memory used by each search in MB (the address " +
+                        "space is limited to {} times this value).".format(HARD_MEMORY_FACTOR))
+    parser.add_argument('--node_limit', type=int, default=None,
+                        help="Limit on the number of new nodes generated by each search.")
+    parser.add_argument('--retry', action="store_true",
+                        help="Run the searches that hit a time, memory or node limit or raised an error again.")
+    args = parser.parse_args()
+    if args.memory_limit is not None and resource is None:
+        parser.error("--memory_limit requires the resource module, which is not available on this platform")
+
+    run_experiments(sorted(set(args.problems)), sorted(set(args.searches)), args.output,
+                    args.processes, args.time_limit, args.memory_limit, args.node_limit, args.retry)
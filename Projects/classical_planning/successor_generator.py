@@ -0,0 +1,67 @@
+""" Successor generator for bitset planning states
+
+Testing every action against every state makes node expansion linear in the
+number of actions, which grows as cargos x planes x airports in the air cargo
+domain. The successor generator indexes each action under one of its positive
+preconditions (the "key" fluent), choosing the fluent shared by the fewest
+actions. An action can only be applicable in states where its key fluent is
+True, so a lookup only tests the actions indexed under the True fluents of the
+state (plus the few actions without positive preconditions) instead of every
+action.
+
+The index works on any BasePlanningProblem because it is built from the
+precondition masks in `BasePlanningProblem.compile_actions()`.
+"""
+from collections import Counter
+
+
+class SuccessorGenerator:
+    """ Index of the actions applicable in each state
+
+    Parameters
+    ----------
+    compiled_actions : list
+        A list of (action, pre, neg, add, rem) tuples where pre and neg are the
+        bitmasks of the positive and negative preconditions of each action
+        (see BasePlanningProblem.compile_actions)
+
+    Examples
+    --------
+    >>> generator = SuccessorGenerator(problem.compile_actions())
+    >>> generator.applicable(problem.initial)  # same as problem.actions(problem.initial)
+    """
+    def __init__(self, compiled_actions):
+        self.actions = [entry[0] for entry in compiled_actions]
+        uses = Counter(v for _, pre, _, _, _ in compiled_actions for v in _bits(pre))
+        buckets, self.unkeyed = {}, []
+        for idx, (_, pre, neg, _, _) in enumerate(compiled_actions):
+            if not pre:
+                self.unkeyed.append((idx, pre, neg))
+                continue
+            key = min(_bits(pre), key=lambda v: (uses[v], v))
+            buckets.setdefault(key, []).append((idx, pre, neg))
+        self.key_mask = sum(1 << v for v in buckets)
+        self.buckets = [tuple(buckets.get(v, ())) for v in range(max(buckets, default=-1) + 1)]
+
+    def applicable(self, state):
+        """ Return the actions whose preconditions hold in `state`, in the same
+        order as the compiled action list
+        """
+        indices = [idx for idx, pre, neg in self.unkeyed if state & pre == pre and not state & neg]
+        keys, buckets = state & self.key_mask, self.buckets
+        while keys:
+            bit = keys & -keys
+            keys ^= bit
+            indices.extend([idx for idx, pre, neg in buckets[bit.bit_length() - 1]
+                            if state & pre == pre and not state & neg])
+        indices.sort()
+        actions = self.actions
+        return [actions[idx] for idx in indices]
+
+
+def _bits(mask):
+    """ Yield the index of each set bit of `mask` """
+    while mask:
+        bit = mask & -mask
+        mask ^= bit
+        yield bit.bit_length() - 1
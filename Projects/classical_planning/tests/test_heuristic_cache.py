@@ -0,0 +1,54 @@
+import unittest
+
+from aimacode.search import Node, astar_search
+from air_cargo_problems import air_cargo_p1
+from heuristic_cache import HeuristicCache
+
+
+class HeuristicCacheTest(unittest.TestCase):
+    def test_lru_eviction(self):
+        """ LRU caches evict the least recently used entry """
+        cache = HeuristicCache(2, "lru")
+        cache.put(1, "a")
+        cache.put(2, "b")
+        self.assertEqual(cache.get(1), "a")
+        cache.put(3, "c")
+        self.assertNotIn(2, cache)
+        self.assertIn(1, cache)
+        self.assertEqual((cache.hits, cache.misses, cache.evictions), (1, 0, 1))
+
+    def test_fifo_eviction(self):
+        """ FIFO caches evict the oldest entry even if it was just used """
+        cache = HeuristicCache(2, "fifo")
+        cache.put(1, "a")
+        cache.put(2, "b")
+        cache.get(1)
+        cache.put(3, "c")
+        self.assertNotIn(1, cache)
+        self.assertIsNone(cache.get(1))
+        self.assertEqual(cache.stats()["misses"], 1)
+
+    def test_invalid_configuration(self):
+        with self.assertRaises(ValueError):
+            HeuristicCache(10, "random")
+        with self.assertRaises(ValueError):
+            HeuristicCache(0)
+
+    def test_transpositions_share_entries(self):
+        """ Different nodes with the same state hit the same cache entry """
+        problem = air_cargo_p1()
+        first, second = Node(problem.initial), Node(problem.initial, path_cost=3)
+        self.assertEqual(problem.h_unmet_goals(first), problem.h_unmet_goals(second))
+        cache = problem.heuristic_cache("h_unmet_goals")
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_bounded_search(self):
+        """ A* finds the same plan with a tiny cache, and the cache stays bounded """
+        problem = air_cargo_p1()
+        expected = len(astar_search(problem, problem.h_pg_levelsum).solution())
+        problem.configure_heuristic_cache(capacity=8, policy="fifo")
+        self.assertEqual(len(problem.heuristic_cache("h_pg_levelsum")), 0)
+        self.assertEqual(len(astar_search(problem, problem.h_pg_levelsum).solution()), expected)
+        cache = problem.heuristic_cache("h_pg_levelsum")
+        self.assertEqual(len(cache), 8)
+        self.assertGreater(cache.evictions, 0)
@@ -0,0 +1,66 @@
+import unittest
+
+from itertools import combinations
+
+from aimacode.utils import expr
+from air_cargo_problems import air_cargo_p1
+from example_have_cake import have_cake
+from layers import _Index
+from my_planning_graph import PlanningGraph, ActionLayer
+
+
+def pairwise_mutex(layer, a, b):
+    """ The mutex relation from the pairwise tests of a layer """
+    if isinstance(layer, ActionLayer):
+        return ((layer._serialize and not a.no_op and not b.no_op)
+                or layer._inconsistent_effects(a, b) or layer._interference(a, b)
+                or (not layer._ignore_mutexes and layer._competing_needs(a, b)))
+    return (layer._negation(a, b)
+            or (not layer._ignore_mutexes and len(layer.parent_layer) > 0 and layer._inconsistent_support(a, b)))
+
+
+class BitsetMutexTest(unittest.TestCase):
+    def assertSameMutexes(self, graph):
+        for layer in graph.action_layers + graph.literal_layers:
+            for a, b in combinations(layer, 2):
+                self.assertEqual(layer.is_mutex(a, b), pairwise_mutex(layer, a, b), (a, b))
+                self.assertEqual(layer.is_mutex(a, b), layer.is_mutex(b, a))
+
+    def test_matches_pairwise_mutexes(self):
+        """ update_mutexes finds exactly the pairs from the pairwise tests """
+        for problem in (have_cake(), air_cargo_p1()):
+            for serialize in (True, False):
+                graph = PlanningGraph(problem, problem.initial, serialize).fill()
+                self.assertSameMutexes(graph)
+
+    def test_ignore_mutexes(self):
+        """ Layers skip only the dynamic mutexes, and graphs that ignore mutexes skip them all """
+        problem = air_cargo_p1()
+        graph = PlanningGraph(problem, problem.initial).fill()
+        for layer in graph.action_layers + graph.literal_layers:
+            layer._ignore_mutexes = True
+            layer.update_mutexes()
+        self.assertSameMutexes(graph)
+        graph = PlanningGraph(problem, problem.initial, ignore_mutexes=True).fill()
+        self.assertFalse(any(layer._mutexes for layer in graph.action_layers + graph.literal_layers))
+
+    def test_negation_ids(self):
+        """ A literal and its negation have adjacent ids """
+        index = _Index()
+        literal = expr("Fake(Literal)")
+        mask = index.literals([literal])
+        self.assertEqual(index.negate(mask), 1 << index.literal(~literal))
+        self.assertEqual(index.negate(index.negate(mask)), mask)
+
+    def test_index_per_graph(self):
+        """ Every layer of a graph shares the graph's index, and graphs don't share indexes """
+        problem = air_cargo_p1()
+        graphs = [PlanningGraph(problem, problem.initial).fill() for _ in range(2)]
+        for graph in graphs:
+            index = graph.literal_layers[0]._index
+            self.assertTrue(all(layer._index is index for layer in graph.action_layers + graph.literal_layers))
+        self.assertIsNot(graphs[0].literal_layers[0]._index, graphs[1].literal_layers[0]._index)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,135 @@
+import unittest
+
+from aimacode.search import Node, breadth_first_search
+from _utils import decode_state
+from air_cargo_problems import air_cargo_p1, air_cargo_p2
+from example_have_cake import have_cake
+from my_planning_graph import PlanningGraph
+
+
+def _reference_actions(problem, state):
+    fluent = decode_state(state, problem.state_map)
+    return [a for a in problem.actions_list
+            if all(c in fluent.pos for c in a.precond_pos) and all(c in fluent.neg for c in a.precond_neg)]
+
+
+def _reference_result(problem, state, action):
+    fluent = decode_state(state, problem.state_map)
+    pos = (set(fluent.pos) - action.effect_rem) | action.effect_add
+    return sum(1 << i for i, f in enumerate(problem.state_map) if f in pos)
+
+
+class BitsetStateTest(unittest.TestCase):
+    def test_round_trip(self):
+        """ decode_state recovers the initial FluentState fluents """
+        problem = air_cargo_p1()
+        fluent = decode_state(problem.initial, problem.state_map)
+        self.assertIn(problem.state_map[0], fluent.pos + fluent.neg)
+        self.assertEqual(len(fluent.pos), 4)
+        self.assertEqual(problem.h_unmet_goals(Node(problem.initial)), 2)
+
+    def test_matches_fluent_semantics(self):
+        """ actions, result and goal_test match a scan of the decoded fluents """
+        for problem in (have_cake(), air_cargo_p1(), air_cargo_p2()):
+            frontier, seen = [problem.initial], {problem.initial}
+            while frontier and len(seen) < 300:
+                state = frontier.pop()
+                fluent = decode_state(state, problem.state_map)
+                self.assertEqual(problem.goal_test(state), all(g in fluent.pos for g in problem.goal))
+                actions = problem.actions(state)
+                self.assertEqual(actions, _reference_actions(problem, state))
+                for action in actions:
+                    child = problem.result(state, action)
+                    self.assertEqual(child, _reference_result(problem, state, action))
+                    if child not in seen:
+                        seen.add(child)
+                        frontier.append(child)
+
+    def test_search(self):
+        """ Breadth-first search still finds the shortest air cargo plan """
+        node = breadth_first_search(air_cargo_p1())
+        self.assertEqual(len(node.solution()), 6)
+
+
+class SuccessorGeneratorTest(unittest.TestCase):
+    def test_matches_linear_scan(self):
+        """ The index returns exactly the actions a linear scan of the masks finds """
+        from random import Random
+        from successor_generator import SuccessorGenerator
+        rng = Random(0)
+        for problem in (have_cake(), air_cargo_p1(), air_cargo_p2()):
+            compiled = problem.compile_actions()
+            generator = SuccessorGenerator(compiled)
+            # random states, not just reachable ones, exercise the negative preconditions too
+            for _ in range(200):
+                state = rng.getrandbits(len(problem.state_map))
+                expected = [a for a, pre, neg, _, _ in compiled if state & pre == pre and not state & neg]
+                self.assertEqual(generator.applicable(state), expected)
+
+    def test_conflicting_preconditions(self):
+        """ Actions with unsatisfiable or empty preconditions are handled """
+        from successor_generator import SuccessorGenerator
+        compiled = [("never", 0b1, 0b1, 0, 0), ("always", 0, 0, 0, 0), ("not_b", 0, 0b10, 0, 0)]
+        generator = SuccessorGenerator(compiled)
+        self.assertEqual(generator.applicable(0b01), ["always", "not_b"])
+        self.assertEqual(generator.applicable(0b10), ["always"])
+
+
+def _naive_level_costs(problem, state):
+    """ Level costs from relaxed reachability, testing every action at every level """
+    reached, level, costs = {f for i, f in enumerate(problem.state_map) if state >> i & 1}, 0, {}
+    while True:
+        for goal in problem.goal:
+            if goal in reached and goal not in costs: costs[goal] = level
+        new = set(reached)
+        for action in problem.actions_list:
+            if action.precond_pos <= reached:  # air cargo actions have no negative preconditions
+                new |= action.effect_add
+        if new == reached or len(costs) == len(problem.goal):
+            return [costs.get(goal, float("inf")) for goal in problem.goal]
+        reached, level = new, level + 1
+
+
+class HeuristicEngineTest(unittest.TestCase):
+    def test_initial_states(self):
+        """ The compiled heuristics match the planning graph values for the test problems """
+        from air_cargo_problems import air_cargo_p3
+        for problem, expected in ((have_cake(), (1, 1, 2)), (air_cargo_p1(), (2, 4, 4)),
+                                  (air_cargo_p2(), (2, 6, 4)), (air_cargo_p3(), (3, 10, 6))):
+            node = Node(problem.initial)
+            self.assertEqual((problem.h_pg_maxlevel(node), problem.h_pg_levelsum(node),
+                              problem.h_pg_setlevel(node)), expected)
+
+    def test_level_costs_match_reachability(self):
+        """ Level costs match a naive relaxed reachability computation on reachable states """
+        problem = air_cargo_p2()
+        engine = problem.heuristic_engine
+        states, seen = [problem.initial], {problem.initial}
+        for state in states:
+            if len(seen) > 200: break
+            costs = _naive_level_costs(problem, state)
+            self.assertEqual(engine.maxlevel(state), max(costs))
+            self.assertEqual(engine.levelsum(state), sum(costs))
+            self.assertLessEqual(engine.maxlevel(state), engine.setlevel(state))
+            for action in problem.actions(state):
+                child = problem.result(state, action)
+                if child not in seen:
+                    seen.add(child)
+                    states.append(child)
+
+    def test_matches_planning_graph(self):
+        """ The compiled heuristics match the PlanningGraph heuristics on reachable states """
+        problem = air_cargo_p1()
+        engine = problem.heuristic_engine
+        states, seen = [problem.initial], {problem.initial}
+        for state in states:
+            if len(seen) > 60: break
+            graph = lambda **kwargs: PlanningGraph(problem, state, **kwargs)
+            self.assertEqual(graph(ignore_mutexes=True).h_levelsum(), engine.levelsum(state))
+            self.assertEqual(graph(ignore_mutexes=True).h_maxlevel(), engine.maxlevel(state))
+            self.assertEqual(graph().h_setlevel(), engine.setlevel(state))
+            for action in problem.actions(state):
+                child = problem.result(state, action)
+                if child not in seen:
+                    seen.add(child)
+                    states.append(child)
@@ -0,0 +1,73 @@
+import csv
+import os
+import tempfile
+import unittest
+
+from unittest import mock
+
+import run_experiments as experiments
+from run_experiments import Run, run_experiment, run_experiments
+
+
+def failing_run(run):
+    """ Raise an exception in the worker for problem 1, and kill it for problem 2 """
+    if run.problem_id == 1:
+        raise RuntimeError("bad run")
+    os._exit(1)
+
+
+def pid_run(run):
+    """ Return a row that records the process id of the worker """
+    return dict(experiments._new_row(run), status="ok", pid=os.getpid())
+
+
+class RunExperimentsTest(unittest.TestCase):
+    def test_run_experiment(self):
+        row = run_experiment(Run(1, 1, None, None))
+        self.assertEqual((row["status"], row["plan_length"], row["expansions"]), ("ok", 6, 43))
+        self.assertGreater(row["peak_rss"], 0)
+
+    def test_time_limit(self):
+        row = run_experiment(Run(4, 11, 0.2, None))
+        self.assertEqual(row["status"], "timeout")
+        self.assertLess(row["time"], 5)
+
+    def test_resume(self):
+        """ Finished runs are skipped, and --retry reruns only the failed ones """
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "results.csv")
+            run_experiments([1], [1, 3], path, processes=1)
+            with open(path, "a", newline="") as f:
+                csv.writer(f).writerow([1, 8, "", "", "", "timeout"])
+            rows = run_experiments([1], [1, 3, 8], path, processes=1)
+            self.assertEqual(len(rows), 3)
+            rows = run_experiments([1], [1, 3, 8], path, processes=1, retry=True)
+            self.assertEqual(sorted((int(r["search_id"]), r["status"]) for r in rows),
+                             [(1, "ok"), (3, "ok"), (8, "ok")])
+            with open(path) as f:
+                self.assertEqual(len(list(csv.DictReader(f))), 3)
+
+    def test_errors(self):
+        """ A run that raises or kills its worker is saved as an error row """
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "results.csv")
+            with mock.patch.object(experiments, "run_experiment", failing_run):
+                rows = run_experiments([1, 2], [1], path, processes=1)
+            errors = {int(row["problem_id"]): row["error"] for row in rows}
+            self.assertEqual([row["status"] for row in rows], ["error", "error"])
+            self.assertEqual(errors[1], "RuntimeError: bad run")
+            self.assertEqual(errors[2], "RuntimeError: the worker process died")
+            rows = run_experiments([1, 2], [1], path, processes=1, retry=True)
+            self.assertEqual([row["status"] for row in rows], ["ok", "ok"])
+
+    def test_worker_per_run(self):
+        """ Every run gets a new worker process, even with a single process """
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "results.csv")
+            with mock.patch.object(experiments, "run_experiment", pid_run):
+                rows = run_experiments([1, 2, 3], [1], path, processes=1)
+            self.assertEqual(len({row["pid"] for row in rows}), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,175 @@
+import unittest
+
+from aimacode.search import (
+    astar_search, uniform_cost_search, depth_first_graph_search, breadth_first_search, Node, NodeStore,
+    BudgetedProblem, SearchAborted, recursive_best_first_search, iterative_deepening_search
+)
+from aimacode.utils import PriorityQueue, Stack, FIFOQueue
+from air_cargo_problems import air_cargo_p1, air_cargo_p3
+
+
+class QueueTest(unittest.TestCase):
+    def test_membership(self):
+        """ Every queue type tracks membership through duplicates and pops """
+        for queue in (Stack(), FIFOQueue()):
+            queue.extend([1, 2, 1])
+            self.assertIn(1, queue)
+            queue.pop()
+            queue.pop()
+            self.assertEqual((1 in queue) + (2 in queue), 1)
+            queue.pop()
+            self.assertNotIn(1, queue)
+            self.assertNotIn(2, queue)
+
+    def test_stack_order(self):
+        queue = Stack()
+        queue.extend("abc")
+        self.assertEqual([queue.pop() for _ in range(3)], ["c", "b", "a"])
+
+    def test_priority_queue_replaces_items(self):
+        """ Deleting and appending an item changes its priority in place """
+        priority = {"a": 3, "b": 2, "c": 1}
+        queue = PriorityQueue(min, lambda x: priority[x])
+        queue.extend("abc")
+        del queue["a"]
+        priority["a"] = 0
+        queue.append("a")
+        self.assertEqual(len(queue), 3)
+        self.assertEqual(queue["a"], "a")
+        self.assertEqual([queue.pop() for _ in range(3)], ["a", "c", "b"])
+        self.assertNotIn("a", queue)
+
+    def test_priority_queue_purges_stale_entries(self):
+        queue = PriorityQueue(min, lambda x: x)
+        queue.extend(range(10))
+        for item in range(9):
+            del queue[item]
+        self.assertLessEqual(len(queue.A), 2 * len(queue) + 1)
+        self.assertEqual(queue.pop(), 9)
+
+    def test_tiebreak(self):
+        """ Equal priorities are ordered by the tiebreak, then first in first out """
+        queue = PriorityQueue(min, lambda x: 0, lambda x: -x[1])
+        queue.extend([("a", 1), ("b", 2), ("c", 2)])
+        self.assertEqual([queue.pop()[0] for _ in range(3)], ["b", "c", "a"])
+
+
+class NodeStoreTest(unittest.TestCase):
+    def test_path_reconstruction(self):
+        """ Stored nodes rebuild the same path as linked Nodes """
+        store = NodeStore()
+        root = store.add("s0")
+        child = store.add("s1", root, "a1", 1)
+        leaf = store.add("s0", child, "a2", 2.5)
+        self.assertEqual(len(store.states), 2)
+        self.assertIn("s1", store)
+        self.assertEqual(store.path(leaf), [root, child, leaf])
+        node = store.node(leaf)
+        self.assertEqual(node.solution(), ["a1", "a2"])
+        self.assertEqual((node.state, node.path_cost, node.depth), ("s0", 2.5, 2))
+        self.assertEqual(node.path()[0].state, "s0")
+
+    def test_node_slots(self):
+        node = Node("s0")
+        with self.assertRaises(AttributeError):
+            node.extra = 1
+
+    def test_breadth_first_search(self):
+        """ Breadth first search returns a shortest plan as a linked Node """
+        problem = air_cargo_p1()
+        node = breadth_first_search(problem)
+        self.assertTrue(problem.goal_test(node.state))
+        self.assertEqual(len(node.solution()), 6)
+        self.assertEqual(node.depth, 6)
+        state = problem.initial
+        for action in node.solution():
+            state = problem.result(state, action)
+        self.assertEqual(state, node.state)
+
+
+class BestFirstSearchTest(unittest.TestCase):
+    def test_astar_is_optimal(self):
+        """ A* with an admissible heuristic finds plans as short as uniform cost search """
+        for problem in (air_cargo_p1(), air_cargo_p3()):
+            optimal = len(uniform_cost_search(problem).solution())
+            self.assertEqual(len(astar_search(problem, problem.h_unmet_goals).solution()), optimal)
+
+    def test_depth_first_graph_search(self):
+        problem = air_cargo_p1()
+        node = depth_first_graph_search(problem)
+        self.assertTrue(problem.goal_test(node.state))
+
+
+class BudgetedProblemTest(unittest.TestCase):
+    def test_unlimited(self):
+        """ Without limits a budgeted problem finds the same plan as the problem """
+        problem = BudgetedProblem(air_cargo_p1())
+        self.assertEqual(len(breadth_first_search(problem).solution()), 6)
+
+    def test_node_limit(self):
+        """ Every search function stops at the node limit with partial statistics """
+        searches = [breadth_first_search, depth_first_graph_search, uniform_cost_search,
+                    iterative_deepening_search, lambda p: astar_search(p, p.h_unmet_goals),
+                    lambda p: recursive_best_first_search(p, p.h_unmet_goals)]
+        for search in searches:
+            problem = BudgetedProblem(air_cargo_p3(), node_limit=100, track_best=True)
+            with self.assertRaises(SearchAborted) as context:
+                search(problem)
+            error = context.exception
+            self.assertEqual(error.reason, "nodes")
+            self.assertEqual(error.stats["new_nodes"], 101)
+            self.assertEqual(error.stats["expansions"], problem.succs)
+            self.assertIsNotNone(error.best)
+
+    def test_no_paths_without_track_best(self):
+        """ Without track_best the problem records no paths and reports no best node """
+        problem = BudgetedProblem(air_cargo_p3(), node_limit=100)
+        with self.assertRaises(SearchAborted) as context:
+            breadth_first_search(problem)
+        self.assertIsNone(context.exception.best)
+        self.assertEqual(len(problem._parents), 1)
+
+    def test_best_node(self):
+        """ The best node is the expanded node with the lowest h, with a valid path to it """
+        base = air_cargo_p3()
+        problem = BudgetedProblem(base, node_limit=2000, h=base.h_unmet_goals, track_best=True)
+        with self.assertRaises(SearchAborted) as context:
+            breadth_first_search(problem)
+        best = context.exception.best
+        state = base.initial
+        for action in best.solution():
+            self.assertIn(action, base.actions(state))
+            state = base.result(state, action)
+        self.assertEqual(state, best.state)
+        self.assertEqual(best.path_cost, len(best.solution()))
+        self.assertLess(base.h_unmet_goals(best), base.h_unmet_goals(Node(base.initial)))
+
+    def test_time_limit(self):
+        problem = BudgetedProblem(air_cargo_p3(), time_limit=0)
+        with self.assertRaises(SearchAborted) as context:
+            breadth_first_search(problem)
+        self.assertEqual(context.exception.reason, "timeout")
+        self.assertIsNone(context.exception.best)
+
+    def test_memory_limit(self):
+        """ The memory limit applies to the growth of the process during the search """
+        held = []
+        problem = BudgetedProblem(air_cargo_p3(), memory_limit=8, h=lambda node: held.append(b"x" * 2**20) or 0,
+                                  track_best=True)
+        problem.memory_check_interval = 1
+        with self.assertRaises(SearchAborted) as context:
+            breadth_first_search(problem)
+        self.assertEqual(context.exception.reason, "memory")
+        self.assertGreater(context.exception.stats["peak_rss"], 8 * 1024)
+        self.assertGreaterEqual(problem.succs, 8)
+
+    def test_memory_baseline(self):
+        """ Memory held before the problem is created does not count against its limit """
+        ballast = bytearray(64 * 2**20)
+        problem = BudgetedProblem(air_cargo_p1(), memory_limit=16)
+        self.assertEqual(len(breadth_first_search(problem).solution()), 6)
+        del ballast
+
+
+if __name__ == '__main__':
+    unittest.main()